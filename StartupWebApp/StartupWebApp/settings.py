@@ -278,14 +278,38 @@ LOGGING = {
 # Cache Configuration
 # For development: uses local memory cache (simple, no dependencies)
 # For production: configure Redis via settings_production.py
-# Used by django-ratelimit for tracking request counts
+# 'default' is used by django-ratelimit for tracking request counts
+# 'shared' holds data that every gunicorn worker must agree on (catalog version and
+# cached catalog payloads). LocMemCache is per-process, so settings_production.py
+# replaces it with a database-backed cache visible to all workers and ECS tasks.
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'shared-cache',
+    },
 }
 
+# Seconds a worker trusts its copy of the Orderconfiguration values and the shipping method
+# table before checking their shared versions (see order/utilities/local_registry.py). Tests
+# check on every lookup, since the shared cache is cleared between tests without firing signals.
+LOCAL_REGISTRY_CHECK_INTERVAL = 0 if 'test' in sys.argv else 5
+
+# Stripe API client (see order/utilities/stripe_gateway.py). Keys and log level come from
+# settings_secret / settings_production. A sync worker waits out every Stripe call, so
+# calls time out in seconds rather than the stripe library's default 80.
+STRIPE_CONNECT_TIMEOUT = 3
+STRIPE_READ_TIMEOUT = 10
+# Retries of connection errors, 409s and 5xx responses, with exponential backoff and jitter
+STRIPE_MAX_NETWORK_RETRIES = 2
+# Consecutive connection, rate limit or server errors that open the circuit breaker, and
+# seconds it stays open before one trial call is let through
+STRIPE_CIRCUIT_BREAKER_FAILURES = 5
+STRIPE_CIRCUIT_BREAKER_RESET_SECONDS = 30
+
 # Rate Limiting Configuration (django-ratelimit)
 # Protects against abuse on public endpoints
 # Disable during tests to avoid interference with existing test suite
@@ -171,6 +171,22 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = secrets['email_user']
 EMAIL_HOST_PASSWORD = secrets['email_password']
 
+# Shared cache for cross-worker data (catalog version and cached catalog payloads)
+# gunicorn workers and ECS tasks don't share memory, so use a table in the RDS database.
+# The table is created by order migration 0009_create_shared_cache_table.
+# Django's default of 300 entries would cull live payloads (and the version keys) as soon
+# as a few versions' worth of product details were cached. Culling deletes expired rows
+# first, then 1/CULL_FREQUENCY of the rest in key order, so old catalog versions go first.
+# Each cache read is one query; see order/utilities/catalog_cache.py for the cost per request.
+CACHES['shared'] = {  # noqa: F405
+    'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+    'LOCATION': 'django_shared_cache',
+    'OPTIONS': {
+        'MAX_ENTRIES': 50000,
+        'CULL_FREQUENCY': 10,
+    },
+}
+
 # Production Security Settings (enforced when DEBUG=False)
 SECURE_SSL_REDIRECT = True
 # Tell Django to trust X-Forwarded-Proto header from ALB (which terminates SSL)
@@ -19,6 +19,7 @@ Usage:
             pass
 """
 
+from django.core.cache import caches
 from django.test import TransactionTestCase
 
 
@@ -38,6 +39,8 @@ class PostgreSQLTestCase(TransactionTestCase):
     - reset_sequences=True: Resets database sequences after each test
       This is critical for PostgreSQL when tests use explicit IDs (e.g., id=1)
       SQLite handles this automatically, but PostgreSQL requires explicit resets
+    - Caches are cleared after each test: table flushes between tests don't fire
+      model signals, so cached catalog payloads would otherwise leak between tests
 
     Why reset_sequences is needed:
     - Many tests create objects with explicit IDs: Model.objects.create(id=1, ...)
@@ -69,6 +72,11 @@ class PostgreSQLTestCase(TransactionTestCase):
     """
     reset_sequences = True
 
+    def _post_teardown(self):
+        super()._post_teardown()
+        for cache in caches.all():
+            cache.clear()
+
 
 # Alias for backward compatibility and shorter imports
 BaseTestCase = PostgreSQLTestCase
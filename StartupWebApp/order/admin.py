@@ -1,7 +1,7 @@
 from django.contrib import admin
 from order.models import (
     Orderpayment, Ordershippingaddress, Orderbillingaddress, Order, Ordersku,
-    Status, Orderstatus, Ordershippingmethod, Orderemailfailure
+    Status, Orderstatus, Ordershippingmethod, Orderemailfailure, Webhookevent
 )
 from order.models import (
     Orderconfiguration, Cartshippingaddress, Cart, Cartsku, Sku, Skuprice,
@@ -206,6 +206,28 @@ class OrderemailfailureAdmin(admin.ModelAdmin):
         return obj.error_message
     error_message_short.short_description = 'Error Message'
 
+# Define a new Webhookevent admin
+
+
+class WebhookeventAdmin(admin.ModelAdmin):
+    list_display = (
+        'stripe_event_id',
+        'event_type',
+        'status',
+        'attempts',
+        'received_date_time',
+        'processed_date_time',
+        'next_attempt_date_time')
+    list_filter = ('status', 'event_type', 'received_date_time')
+    search_fields = ('stripe_event_id', 'last_error')
+    readonly_fields = (
+        'stripe_event_id',
+        'event_type',
+        'payload',
+        'received_date_time',
+        'processed_date_time',
+        'last_error')
+
 
 # Register your models here.
 admin.site.register(Orderpayment, OrderpaymentAdmin)
@@ -233,3 +255,4 @@ admin.site.register(Productsku, ProductskuAdmin)
 admin.site.register(Shippingmethod, ShippingmethodAdmin)
 admin.site.register(Cartshippingmethod, CartshippingmethodAdmin)
 admin.site.register(Orderemailfailure, OrderemailfailureAdmin)
+admin.site.register(Webhookevent, WebhookeventAdmin)
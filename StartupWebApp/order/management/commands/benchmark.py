@@ -0,0 +1,289 @@
+"""
+Django management command to benchmark hot order-app code paths.
+
+Each scenario builds its own fixture data inside a transaction that is rolled
+back at the end, so it is safe to run against a development database. Query
+counts are captured per call; latency is the median wall-clock time over
+--iterations calls.
+
+Usage:
+    python manage.py benchmark --scenario product-detail
+    python manage.py benchmark --scenario product-detail --iterations 50
+    python manage.py benchmark --scenario search --sku-count 100000
+    python manage.py benchmark --scenario stripe-gateway   # Stripe calls against a local fake Stripe server
+    python manage.py benchmark --scenario checkout-session # first vs repeat checkout click, fake Stripe server
+"""
+
+import statistics
+import time
+
+import stripe
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from order.models import (
+    Product, Productimage, Productsku, Productvideo, Sku, Skuimage, Skuinventory, Skuprice, Skutype
+)
+from order.utilities import (
+    catalog_utils, checkout_sessions, search_utils, stripe_gateway
+)
+from order.utilities.fake_stripe_server import FakeStripeServer
+
+
+def create_benchmark_product(identifier, sku_count):
+    """Create a product with sku_count SKUs, each with a price history and images"""
+    skutype, created = Skutype.objects.get_or_create(title='product')
+    skuinventory = Skuinventory.objects.create(
+        title='Benchmark Stock',
+        identifier=f'{identifier}-stock',
+        description='Created by manage.py benchmark'
+    )
+    product = Product.objects.create(
+        title=f'Benchmark {identifier}',
+        title_url=f'Benchmark{identifier}',
+        identifier=identifier,
+        headline='Benchmark product'
+    )
+    for image_number in range(3):
+        Productimage.objects.create(
+            product=product,
+            image_url=f'https://example.com/{identifier}/{image_number}.jpg',
+            main_image=(image_number == 0)
+        )
+    Productvideo.objects.create(
+        product=product,
+        video_url=f'https://example.com/{identifier}.mp4',
+        video_thumbnail_url=f'https://example.com/{identifier}.jpg'
+    )
+    now = timezone.now()
+    for sku_number in range(sku_count):
+        sku = Sku.objects.create(
+            color=f'Color {sku_number}',
+            size='Medium',
+            sku_type=skutype,
+            sku_inventory=skuinventory
+        )
+        Skuprice.objects.create(sku=sku, price=sku_number + 10, created_date_time=now - timezone.timedelta(days=1))
+        Skuprice.objects.create(sku=sku, price=sku_number + 1, created_date_time=now)
+        Productsku.objects.create(product=product, sku=sku)
+        for image_number in range(2):
+            Skuimage.objects.create(
+                sku=sku,
+                image_url=f'https://example.com/{identifier}/{sku_number}/{image_number}.jpg',
+                main_image=(image_number == 0)
+            )
+    return product
+
+
+def create_search_catalog(sku_count, skus_per_product=10):
+    """Bulk-create a catalog of sku_count SKUs with varied searchable text; bypasses model signals"""
+    colors = ['Red', 'Blue', 'Green', 'Silver', 'Gold', 'Black', 'White', 'Orange']
+    nouns = ['Paper Clips', 'Binder', 'Stapler', 'Notebook', 'Pencil', 'Eraser', 'Folder', 'Marker']
+    skutype, created = Skutype.objects.get_or_create(title='product')
+    skuinventory = Skuinventory.objects.create(
+        title='Benchmark Stock',
+        identifier='BENCHMARK-SEARCH-stock',
+        description='Created by manage.py benchmark'
+    )
+    product_count = max(1, sku_count // skus_per_product)
+    products = Product.objects.bulk_create([
+        Product(
+            title=f'{nouns[number % len(nouns)]} {number}',
+            title_url=f'BenchmarkSearch{number}',
+            identifier=f'BENCHMARK-SEARCH-{number}',
+            headline=f'Heavy duty {nouns[(number // len(nouns)) % len(nouns)].lower()} for the office',
+            description_part_1=f'Catalog item number {number}',
+        )
+        for number in range(product_count)
+    ])
+    skus = Sku.objects.bulk_create([
+        Sku(
+            color=colors[number % len(colors)],
+            size=f'Size {number % 7}',
+            description=f'Variant {number}',
+            sku_type=skutype,
+            sku_inventory=skuinventory,
+        )
+        for number in range(product_count * skus_per_product)
+    ])
+    Productsku.objects.bulk_create([
+        Productsku(product=products[number // skus_per_product], sku=sku)
+        for number, sku in enumerate(skus)
+    ])
+    return products
+
+
+def measure(function, iterations):
+    """
+    Call function iterations times.
+
+    Returns:
+        tuple: (queries per call, median seconds per call, last return value)
+    """
+    durations = []
+    result = None
+    query_count = 0
+    for _ in range(iterations):
+        with CaptureQueriesContext(connection) as context:
+            started = time.perf_counter()
+            result = function()
+            durations.append(time.perf_counter() - started)
+        query_count = len(context.captured_queries)
+    return query_count, statistics.median(durations), result
+
+
+class Command(BaseCommand):
+    help = 'Benchmark order-app code paths against a rolled-back fixture'
+
+    scenarios = {
+        'product-detail': 'benchmark_product_detail',
+        'search': 'benchmark_search',
+        'stripe-gateway': 'benchmark_stripe_gateway',
+        'checkout-session': 'benchmark_checkout_session',
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario',
+            choices=sorted(self.scenarios),
+            default='product-detail',
+            help='Code path to benchmark',
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=20,
+            help='Calls per measured function (default: 20)',
+        )
+        parser.add_argument(
+            '--sku-count',
+            type=int,
+            default=100000,
+            help='SKUs in the generated catalog for the search scenario (default: 100000)',
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        with transaction.atomic():
+            getattr(self, self.scenarios[options['scenario']])(options)
+            # Never keep fixture data
+            transaction.set_rollback(True)
+
+    def report(self, label, query_count, seconds):
+        self.stdout.write(f'  {label:<36} {query_count:>6} queries  {seconds * 1000:>9.2f} ms (median)')
+
+    def benchmark_product_detail(self, options):
+        iterations = options['iterations']
+        self.stdout.write(f'product-detail: prefetch pipeline by SKU count, {iterations} iterations')
+        for sku_count in [1, 10, 50]:
+            product = create_benchmark_product(f'BENCHMARK-PRODUCT-DETAIL-{sku_count}', sku_count)
+            query_count, seconds, _ = measure(lambda: catalog_utils.get_product_data(product.identifier), iterations)
+            self.report(f'{sku_count} SKUs', query_count, seconds)
+
+    def benchmark_search(self, options):
+        iterations = options['iterations']
+        started = time.perf_counter()
+        products = create_search_catalog(options['sku_count'])
+        self.stdout.write(
+            f'search: {len(products)} products, {options["sku_count"]} SKUs '
+            f'(created in {time.perf_counter() - started:.1f} s), {iterations} iterations')
+
+        started = time.perf_counter()
+        document_count = search_utils.refresh_search_documents(product.id for product in products)
+        self.stdout.write(f'  rebuilt {document_count} search documents in {time.perf_counter() - started:.1f} s')
+        refreshed_product_id = products[len(products) // 2].id
+        query_count, seconds, document_count = measure(
+            lambda: search_utils.refresh_search_documents([refreshed_product_id]), iterations)
+        self.report('refresh one product', query_count, seconds)
+
+        for query_text in ['stapler', 'gold notebook', '"paper clips" -binder', 'variant 4242', 'nomatchatall']:
+            query_count, seconds, results = measure(lambda: search_utils.search_products(query_text), iterations)
+            self.report(f'{query_text!r} ({len(results)} hits)', query_count, seconds)
+
+    def benchmark_stripe_gateway(self, options):
+        iterations = options['iterations']
+        latency = 0.005
+        read_timeout = 0.2
+        self.stdout.write(
+            f'stripe-gateway: fake Stripe server answering in {latency * 1000:.0f} ms, '
+            f'{read_timeout * 1000:.0f} ms read timeout; {iterations} iterations')
+
+        api_base = stripe.api_base
+        stripe_settings = override_settings(
+            STRIPE_SERVER_SECRET_KEY='sk_test_benchmark', STRIPE_LOG_LEVEL=None, STRIPE_READ_TIMEOUT=read_timeout,
+            STRIPE_CIRCUIT_BREAKER_FAILURES=1, STRIPE_CIRCUIT_BREAKER_RESET_SECONDS=3600)
+        try:
+            with stripe_settings, FakeStripeServer(latency=latency) as server:
+                stripe.api_base = server.url
+                stripe_gateway.configure()
+                stripe_gateway.circuit_breaker.reset()
+                session_id = stripe_gateway.create_checkout_session(mode='payment').id
+
+                def retrieve_with_new_connection():
+                    stripe.default_http_client = stripe.RequestsClient(timeout=read_timeout)
+                    return stripe_gateway.retrieve_checkout_session(session_id)
+
+                connection_count = server.connection_count
+                query_count, seconds, _ = measure(
+                    lambda: stripe_gateway.retrieve_checkout_session(session_id), iterations)
+                self.report('retrieve, pooled connection', query_count, seconds)
+                self.stdout.write(f'  {"":<36} {server.connection_count - connection_count:>6} new connections')
+                connection_count = server.connection_count
+                query_count, seconds, _ = measure(retrieve_with_new_connection, iterations)
+                self.report('retrieve, new connection per call', query_count, seconds)
+                self.stdout.write(f'  {"":<36} {server.connection_count - connection_count:>6} new connections')
+                stripe_gateway.configure()
+
+                # Stripe stops answering in time: the first call waits out its timeout and
+                # retries and opens the circuit, later calls fail without a request
+                server.latency = read_timeout * 2
+                for label in ['retrieve, Stripe timing out', 'retrieve, circuit open']:
+                    started = time.perf_counter()
+                    try:
+                        stripe_gateway.retrieve_checkout_session(session_id)
+                    except stripe.error.APIConnectionError as e:
+                        error = type(e).__name__
+                    seconds = time.perf_counter() - started
+                    self.stdout.write(f'  {label:<36} {error:>20}  {seconds * 1000:>9.2f} ms')
+        finally:
+            stripe.api_base = api_base
+            stripe_gateway.configure()
+            stripe_gateway.circuit_breaker.reset()
+
+    def benchmark_checkout_session(self, options):
+        iterations = options['iterations']
+        latency = 0.3
+        self.stdout.write(
+            f'checkout-session: fake Stripe server answering in {latency * 1000:.0f} ms; {iterations} iterations')
+
+        api_base = stripe.api_base
+        stripe_settings = override_settings(STRIPE_SERVER_SECRET_KEY='sk_test_benchmark', STRIPE_LOG_LEVEL=None)
+        try:
+            with stripe_settings, FakeStripeServer(latency=latency) as server:
+                stripe.api_base = server.url
+                stripe_gateway.configure()
+                # Unique per run, so sessions cached by an earlier run are not reused
+                cart_ids = (f'benchmark-{time.time_ns()}-{number}' for number in range(iterations))
+                session_params = []
+
+                def first_click():
+                    session_params.append({'mode': 'payment', 'metadata': {'cart_id': next(cart_ids)}})
+                    return checkout_sessions.get_or_create_checkout_session(session_params[-1])
+
+                def repeat_click():
+                    return checkout_sessions.get_or_create_checkout_session(session_params[0])
+
+                query_count, seconds, _ = measure(first_click, iterations)
+                self.report('first click', query_count, seconds)
+                request_count = server.request_count
+                query_count, seconds, _ = measure(repeat_click, iterations)
+                self.report('repeat click', query_count, seconds)
+                self.stdout.write(f'  {"":<36} {server.request_count - request_count:>6} Stripe requests')
+        finally:
+            stripe.api_base = api_base
+            stripe_gateway.configure()
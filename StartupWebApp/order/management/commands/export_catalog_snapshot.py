@@ -0,0 +1,206 @@
+"""
+Django management command to export the catalog as static JSON files.
+
+Writes the /order/products response and every /order/product/<identifier>
+response, byte for byte as the endpoints serve them, into a directory that can
+be synced to S3 and served from CloudFront. The endpoints remain the source of
+truth; the snapshot is a copy that lets the edge answer catalog reads without
+reaching Django.
+
+Layout of the output directory:
+    manifest.json                         entry point; serve with a short max-age
+    products.<hash>.json[.gz|.br]         products listing
+    product/<identifier>.<hash>.json[.gz|.br]
+
+Payload file names carry a hash of their content, so they never change once
+written and can be served with a long, immutable max-age. Each file also gets
+precompressed .gz and (when the optional brotli package is installed) .br
+variants for the edge to serve with Content-Encoding.
+
+Runs are incremental: payloads are read from the stored catalog payloads (see
+order/utilities/catalog_blobs.py), so only products changed since they were
+last built are re-encoded, and only payloads whose content hash differs from
+the previous manifest are compressed and written. --full rewrites every file.
+After raw SQL changes to the catalog, run rebuild_catalog_payloads first.
+
+Usage:
+    python manage.py export_catalog_snapshot --output-dir /srv/catalog-snapshot
+    python manage.py export_catalog_snapshot --output-dir /srv/catalog-snapshot --full
+    python manage.py export_catalog_snapshot --output-dir /srv/catalog-snapshot --prune
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from urllib.parse import quote
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from order.utilities import catalog_blobs
+from order.views import order_api_version, product_response_body, products_response_body
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_FILENAME = 'manifest.json'
+PRODUCT_DIRECTORY = 'product'
+
+
+def get_encodings():
+    """Precompressed variants written next to each payload file, as (encoding, file suffix) pairs."""
+    encodings = [('gzip', '.gz')]
+    if brotli is not None:
+        encodings.append(('br', '.br'))
+    return encodings
+
+
+def compress(body, encoding):
+    if encoding == 'gzip':
+        # mtime=0 keeps the output identical across runs
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    return brotli.compress(body, quality=11)
+
+
+def write_file(path, content):
+    """Write content to path atomically, creating parent directories."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = f'{path}.tmp'
+    with open(temporary_path, 'wb') as snapshot_file:
+        snapshot_file.write(content)
+    os.replace(temporary_path, path)
+
+
+def read_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILENAME), encoding='utf-8') as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return None
+    except ValueError as e:
+        raise CommandError(f'{MANIFEST_FILENAME} in {output_dir} is not valid JSON: {e}')
+
+
+def manifest_paths(manifest):
+    """Every payload path referenced by a manifest, including compressed variants."""
+    if manifest is None:
+        return set()
+    entries = [manifest['products']] + list(manifest['product'].values())
+    suffixes = [''] + list(manifest['encodings'].values())
+    return {entry['path'] + suffix for entry in entries for suffix in suffixes}
+
+
+class Command(BaseCommand):
+    help = 'Export the products listing and product detail responses as versioned static files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir',
+            required=True,
+            help='Directory to write the snapshot into',
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Rewrite every payload file, including those unchanged since the last snapshot',
+        )
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Delete payload files referenced by neither this snapshot nor the previous one',
+        )
+
+    def handle(self, *args, **options):
+        output_dir = options['output_dir']
+        encodings = get_encodings()
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('brotli is not installed - skipping .br variants'))
+
+        previous_manifest = read_manifest(output_dir)
+        incremental = (
+            previous_manifest is not None
+            and not options['full']
+            and previous_manifest.get('order-api-version') == order_api_version
+            and previous_manifest.get('encodings') == dict(encodings)
+        )
+        self.written_count = 0
+
+        products_body = products_response_body(catalog_blobs.get_products_json())
+        products_entry = self.export_payload(
+            output_dir, 'products', products_body, previous_manifest['products'] if incremental else None)
+
+        product_entries = self.export_products(
+            output_dir, previous_manifest['product'] if incremental else {})
+
+        manifest = {
+            'snapshot_version': (previous_manifest or {}).get('snapshot_version', 0) + 1,
+            'generated_date_time': timezone.now().isoformat(),
+            'order-api-version': order_api_version,
+            'encodings': dict(encodings),
+            'products': products_entry,
+            'product': product_entries,
+        }
+        write_file(
+            os.path.join(output_dir, MANIFEST_FILENAME),
+            json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'),
+        )
+
+        removed_count = 0
+        if options['prune']:
+            removed_count = self.prune(output_dir, manifest_paths(manifest) | manifest_paths(previous_manifest))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Snapshot {manifest["snapshot_version"]}: {len(product_entries)} product(s), '
+            f'{self.written_count} payload file(s) written, '
+            f'{removed_count} file(s) pruned'
+        ))
+
+    def export_payload(self, output_dir, name, body, previous_entry):
+        """
+        Write body and its compressed variants unless an identical payload is already on disk.
+
+        Returns:
+            dict: Manifest entry for the payload
+        """
+        sha256 = hashlib.sha256(body).hexdigest()
+        if previous_entry is not None and previous_entry['sha256'] == sha256:
+            return previous_entry
+
+        path = f'{name}.{sha256[:16]}.json'
+        write_file(os.path.join(output_dir, path), body)
+        for encoding, suffix in get_encodings():
+            write_file(os.path.join(output_dir, path + suffix), compress(body, encoding))
+        self.written_count += 1
+        return {'path': path, 'sha256': sha256, 'size': len(body)}
+
+    def export_products(self, output_dir, previous_entries):
+        """
+        Export every product whose payload differs from the previous snapshot.
+
+        Returns:
+            dict: Manifest entries by product identifier
+        """
+        product_entries = {}
+        for product_identifier, product_json in catalog_blobs.iter_product_jsons():
+            product_entries[product_identifier] = self.export_payload(
+                output_dir,
+                f'{PRODUCT_DIRECTORY}/{quote(product_identifier, safe="")}',
+                product_response_body(product_identifier, product_json),
+                previous_entries.get(product_identifier),
+            )
+        return product_entries
+
+    def prune(self, output_dir, keep_paths):
+        """Delete payload files not in keep_paths; other files in output_dir are left alone."""
+        removed_count = 0
+        for directory, subdirectories, filenames in os.walk(output_dir):
+            for filename in filenames:
+                path = os.path.relpath(os.path.join(directory, filename), output_dir).replace(os.sep, '/')
+                is_payload = path.startswith('products.') or path.startswith(f'{PRODUCT_DIRECTORY}/')
+                if is_payload and path not in keep_paths:
+                    os.remove(os.path.join(output_dir, path))
+                    removed_count += 1
+        return removed_count
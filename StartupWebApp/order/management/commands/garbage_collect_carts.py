@@ -0,0 +1,135 @@
+"""
+Django management command to delete abandoned anonymous carts.
+
+Every anonymous visitor who adds to cart leaves a Cart with its Cartsku and
+Cartshippingmethod rows (and possibly a Cartshippingaddress and Cartpayment).
+This deletes anonymous carts whose last_modified_date_time is older than
+--days, oldest first, in batches of --batch-size carts.
+
+Each batch is its own transaction: the carts are locked with SKIP LOCKED (so a
+cart in use by a request is left for the next run) and their rows are removed
+with one DELETE per table. Because every batch commits on its own, an
+interrupted run loses nothing and the next run carries on where it stopped.
+Member carts are never deleted.
+
+Usage:
+    python manage.py garbage_collect_carts                     # Carts untouched for 30 days
+    python manage.py garbage_collect_carts --days 90 --batch-size 5000
+    python manage.py garbage_collect_carts --max-batches 10    # Bound the run time
+    python manage.py garbage_collect_carts --dry-run           # Report only; delete nothing
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from order.models import Cart, Cartpayment, Cartshippingaddress, Cartshippingmethod, Cartsku
+from order.utilities import order_utils
+
+
+def expired_anonymous_carts(cutoff):
+    return Cart.objects.filter(member__isnull=True, last_modified_date_time__lt=cutoff)
+
+
+def delete_expired_cart_batch(cutoff, batch_size):
+    """
+    Delete up to batch_size expired anonymous carts, oldest first, in one transaction.
+
+    Returns:
+        dict: Number of rows deleted per table; just {'carts': 0} when none are left
+    """
+    with transaction.atomic():
+        carts = list(
+            expired_anonymous_carts(cutoff)
+            .order_by('last_modified_date_time', 'id')
+            .select_for_update(skip_locked=True)
+            .values_list('id', 'shipping_address_id', 'payment_id')[:batch_size]
+        )
+        if not carts:
+            return {'carts': 0}
+        cart_ids = [cart_id for cart_id, shipping_address_id, payment_id in carts]
+        shipping_address_ids = [shipping_address_id for cart_id, shipping_address_id, payment_id in carts
+                                if shipping_address_id is not None]
+        payment_ids = [payment_id for cart_id, shipping_address_id, payment_id in carts if payment_id is not None]
+
+        deleted_counts = {
+            'cart_skus': order_utils.bulk_delete(Cartsku.objects.filter(cart_id__in=cart_ids)),
+            'cart_shipping_methods': order_utils.bulk_delete(Cartshippingmethod.objects.filter(cart_id__in=cart_ids)),
+            'carts': order_utils.bulk_delete(Cart.objects.filter(id__in=cart_ids)),
+        }
+        # Addresses and payments hang off the cart rather than the other way round,
+        # so they are deleted after the carts that referenced them
+        deleted_counts['cart_shipping_addresses'] = order_utils.bulk_delete(
+            Cartshippingaddress.objects.filter(id__in=shipping_address_ids, cart__isnull=True))
+        deleted_counts['cart_payments'] = order_utils.bulk_delete(
+            Cartpayment.objects.filter(id__in=payment_ids, cart__isnull=True))
+    return deleted_counts
+
+
+class Command(BaseCommand):
+    help = 'Delete anonymous carts that have not been modified for a number of days'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Delete anonymous carts not modified for this many days (default: 30)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Carts deleted per transaction (default: 1000)',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help='Stop after this many batches; the next run continues from there',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many carts have expired',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--days and --batch-size must be at least 1')
+        cutoff = timezone.now() - timedelta(days=options['days'])
+
+        if options['dry_run']:
+            expired_count = expired_anonymous_carts(cutoff).count()
+            self.stdout.write(f'{expired_count} anonymous cart(s) not modified since {cutoff.isoformat()}')
+            return
+
+        totals = {}
+        batch_count = 0
+        start_time = time.monotonic()
+        while options['max_batches'] is None or batch_count < options['max_batches']:
+            deleted_counts = delete_expired_cart_batch(cutoff, options['batch_size'])
+            if not deleted_counts['carts']:
+                break
+            batch_count += 1
+            for table, count in deleted_counts.items():
+                totals[table] = totals.get(table, 0) + count
+            elapsed = time.monotonic() - start_time
+            self.stdout.write(
+                f'Batch {batch_count}: {deleted_counts["carts"]} cart(s), '
+                f'{deleted_counts["cart_skus"]} cart line(s) deleted '
+                f'({totals["carts"] / elapsed:.0f} carts/s)'
+            )
+
+        elapsed = time.monotonic() - start_time
+        deleted_cart_count = totals.get('carts', 0)
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted_cart_count} cart(s), {totals.get("cart_skus", 0)} cart line(s), '
+            f'{totals.get("cart_shipping_methods", 0)} shipping method selection(s), '
+            f'{totals.get("cart_shipping_addresses", 0)} shipping address(es) and '
+            f'{totals.get("cart_payments", 0)} payment(s) in {batch_count} batch(es), {elapsed:.1f}s '
+            f'({deleted_cart_count / elapsed if elapsed else 0:.0f} carts/s)'
+        ))
@@ -0,0 +1,104 @@
+"""
+Django management command to process the Stripe webhook inbox.
+
+stripe_webhook stores each verified Stripe event as a Webhookevent and answers
+Stripe at once; this worker does the work the webhook used to do inline:
+creating the order, sending the confirmation email and deleting the cart. It
+claims due events --batch-size at a time with SKIP LOCKED, so several workers
+can run side by side, and retries or dead-letters failed events (see
+order/utilities/webhook_inbox.py).
+
+Each poll starts by closing database connections that have failed or
+outlived CONN_MAX_AGE, as Django does around every request, so a worker
+outlives database restarts and failovers.
+
+After every batch it logs a [WEBHOOK_INBOX] line with the queue depth, the
+age of the oldest waiting event and the processing latency, for CloudWatch.
+
+Usage:
+    python manage.py process_webhook_events                   # Run until stopped, polling every 2s
+    python manage.py process_webhook_events --once            # Process the due events, then exit
+    python manage.py process_webhook_events --batch-size 50 --poll-interval 5
+    python manage.py process_webhook_events --stats           # Report queue depth and latency only
+"""
+
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from order.utilities import webhook_inbox
+from order.views import process_stripe_event
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Process Stripe webhook events stored by the stripe-webhook endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10,
+            help='Events claimed at a time (default: 10)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait when no event is due (default: 2)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once no event is due instead of polling',
+        )
+        parser.add_argument(
+            '--stats',
+            action='store_true',
+            help='Only report queue depth and processing latency',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['poll_interval'] <= 0:
+            raise CommandError('--batch-size must be at least 1 and --poll-interval positive')
+
+        if options['stats']:
+            self.stdout.write(self.format_stats(webhook_inbox.get_queue_stats()))
+            return
+
+        totals = {}
+        while True:
+            close_old_connections()
+            webhook_events = webhook_inbox.claim_due_events(options['batch_size'])
+            if not webhook_events:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                continue
+
+            batch_counts = {}
+            for webhook_event in webhook_events:
+                status = webhook_inbox.process_event(webhook_event, process_stripe_event)
+                batch_counts[status] = batch_counts.get(status, 0) + 1
+                totals[status] = totals.get(status, 0) + 1
+            logger.info(f'[WEBHOOK_INBOX] {self.format_stats(webhook_inbox.get_queue_stats())}')
+            self.stdout.write(f'Batch: {self.format_counts(batch_counts)}')
+
+        self.stdout.write(self.style.SUCCESS(f'Done: {self.format_counts(totals)}'))
+
+    def format_counts(self, counts):
+        return ', '.join(f'{counts.get(status, 0)} {status}' for status in ['processed', 'pending', 'dead'])
+
+    def format_stats(self, stats):
+        def seconds(value):
+            return f'{value:.1f}s' if value is not None else '-'
+
+        return (
+            f'depth={stats["queue_depth"]} oldest_waiting={seconds(stats["oldest_waiting_seconds"])} '
+            f'dead={stats["dead_count"]} processed_last_hour={stats["processed_count"]} '
+            f'latency_avg={seconds(stats["average_latency_seconds"])} '
+            f'latency_max={seconds(stats["max_latency_seconds"])}'
+        )
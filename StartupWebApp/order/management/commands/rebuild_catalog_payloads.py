@@ -0,0 +1,24 @@
+"""
+Django management command to rebuild the stored catalog JSON payloads.
+
+Payloads are normally rebuilt one product at a time as catalog rows change
+(see order/utilities/catalog_blobs.py). Run this after bulk loads or raw SQL
+changes to the catalog, or to warm the store after a deploy.
+
+Usage:
+    python manage.py rebuild_catalog_payloads
+"""
+
+from django.core.management.base import BaseCommand
+
+from order.utilities import catalog_blobs, catalog_cache
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the pre-encoded products listing and product detail payloads'
+
+    def handle(self, *args, **options):
+        product_count = catalog_blobs.rebuild_all()
+        # Payloads cached under the current version may predate the rebuild
+        catalog_cache.bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt products listing and {product_count} product payload(s)'))
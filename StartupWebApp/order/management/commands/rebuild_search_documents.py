@@ -0,0 +1,24 @@
+"""
+Django management command to rebuild the product full-text search documents.
+
+Documents are normally refreshed one product at a time as catalog rows change
+(see order/utilities/search_utils.py). Run this after bulk loads or raw SQL
+changes to the catalog.
+
+Usage:
+    python manage.py rebuild_search_documents
+"""
+
+from django.core.management.base import BaseCommand
+
+from order.utilities import catalog_cache, search_utils
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search document of every product'
+
+    def handle(self, *args, **options):
+        document_count = search_utils.refresh_search_documents()
+        # Cached search results may predate the rebuild
+        catalog_cache.bump_catalog_version()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {document_count} search document(s)'))
@@ -0,0 +1,58 @@
+"""
+Django management command to check and repair the running totals on Cart.
+
+Cart.item_count, item_subtotal and shipping_subtotal are maintained by
+Cartsku.save(), Cartshippingmethod.save(), Skucurrentprice.refresh_for_sku()
+and the delete receivers in order/signals.py, but writes that bypass the ORM
+(bulk_create, queryset.update(), raw SQL) leave them stale.
+
+Usage:
+    python manage.py sync_cart_totals          # Repair every out-of-sync cart
+    python manage.py sync_cart_totals --check  # Report only; exit non-zero if out of sync
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from order.models import Cart
+
+
+def find_out_of_sync_cart_ids():
+    """Return ids of carts whose stored totals differ from their lines, prices and shipping method."""
+    expected_totals = {f'expected_{name}': expression for name, expression in Cart.totals_expressions().items()}
+    carts = Cart.objects.annotate(**expected_totals).values(
+        'id',
+        'item_count',
+        'item_subtotal',
+        'shipping_subtotal',
+        *expected_totals,
+    ).order_by('id')
+    return [
+        cart['id'] for cart in carts
+        if (cart['item_count'], cart['item_subtotal'], cart['shipping_subtotal']) != (
+            cart['expected_item_count'], cart['expected_item_subtotal'], cart['expected_shipping_subtotal'])
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Check or repair the running totals stored on each Cart'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report out-of-sync carts; exit with an error if any are found',
+        )
+
+    def handle(self, *args, **options):
+        out_of_sync_cart_ids = find_out_of_sync_cart_ids()
+        if not out_of_sync_cart_ids:
+            self.stdout.write(self.style.SUCCESS('All cart totals are in sync'))
+            return
+
+        if options['check']:
+            raise CommandError(
+                f'{len(out_of_sync_cart_ids)} cart total(s) out of sync: '
+                f'{", ".join(str(cart_id) for cart_id in out_of_sync_cart_ids)}'
+            )
+        Cart.refresh_totals(out_of_sync_cart_ids, touch=False)
+        self.stdout.write(self.style.SUCCESS(f'Repaired {len(out_of_sync_cart_ids)} cart total(s)'))
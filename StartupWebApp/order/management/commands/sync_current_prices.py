@@ -0,0 +1,110 @@
+"""
+Django management command to check and repair the Skucurrentprice table and
+the Product.price_low/price_high columns derived from it.
+
+Skucurrentprice holds the newest Skuprice for every Sku. It is maintained by
+Skuprice.save() and the Skuprice post_delete receiver, but writes that bypass
+the ORM (bulk_create, queryset.update(), raw SQL, db_inserts.sql) leave it stale.
+
+Usage:
+    python manage.py sync_current_prices          # Repair every out-of-sync SKU
+    python manage.py sync_current_prices --check  # Report only; exit non-zero if out of sync
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import OuterRef, Subquery
+
+from order.models import Product, Sku, Skucurrentprice, Skuprice
+from order.utilities import catalog_blobs, catalog_cache
+
+
+def find_out_of_sync_sku_ids():
+    """
+    Return ids of SKUs whose Skucurrentprice does not match their newest Skuprice.
+
+    Covers missing rows, rows pointing at an older Skuprice, rows whose copied
+    price/timestamp differ from the Skuprice they point at, and rows left behind
+    for SKUs that no longer have any prices. Runs as a single query.
+    """
+    latest_skuprices = Skuprice.objects.filter(sku=OuterRef('pk')).order_by('-created_date_time', '-id')
+    skus = Sku.objects.annotate(
+        latest_skuprice_id=Subquery(latest_skuprices.values('id')[:1]),
+        latest_price=Subquery(latest_skuprices.values('price')[:1]),
+        latest_created_date_time=Subquery(latest_skuprices.values('created_date_time')[:1]),
+    ).values(
+        'id',
+        'latest_skuprice_id',
+        'latest_price',
+        'latest_created_date_time',
+        'current_price__skuprice_id',
+        'current_price__price',
+        'current_price__created_date_time',
+    ).order_by('id')
+
+    out_of_sync_sku_ids = []
+    for sku in skus:
+        expected = (sku['latest_skuprice_id'], sku['latest_price'], sku['latest_created_date_time'])
+        actual = (
+            sku['current_price__skuprice_id'],
+            sku['current_price__price'],
+            sku['current_price__created_date_time'],
+        )
+        if expected != actual:
+            out_of_sync_sku_ids.append(sku['id'])
+    return out_of_sync_sku_ids
+
+
+def find_out_of_sync_product_ids():
+    """Return ids of products whose price_low/price_high differ from their SKUs' current prices."""
+    current_prices = Skucurrentprice.objects.filter(sku__productsku__product=OuterRef('pk'))
+    products = Product.objects.annotate(
+        expected_price_low=Subquery(current_prices.order_by('price').values('price')[:1]),
+        expected_price_high=Subquery(current_prices.order_by('-price').values('price')[:1]),
+    ).values('id', 'price_low', 'price_high', 'expected_price_low', 'expected_price_high').order_by('id')
+    return [
+        product['id'] for product in products
+        if (product['price_low'], product['price_high']) != (
+            product['expected_price_low'], product['expected_price_high'])
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Check or repair Skucurrentprice and product price ranges against the Skuprice history'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report out-of-sync SKUs; exit with an error if any are found',
+        )
+
+    def handle(self, *args, **options):
+        out_of_sync_sku_ids = find_out_of_sync_sku_ids()
+        if out_of_sync_sku_ids:
+            if options['check']:
+                raise CommandError(
+                    f'{len(out_of_sync_sku_ids)} SKU current price(s) out of sync: '
+                    f'{", ".join(str(sku_id) for sku_id in out_of_sync_sku_ids)}'
+                )
+            for sku_id in out_of_sync_sku_ids:
+                Skucurrentprice.refresh_for_sku(sku_id)
+            self.stdout.write(self.style.SUCCESS(f'Repaired {len(out_of_sync_sku_ids)} SKU current price(s)'))
+
+        out_of_sync_product_ids = find_out_of_sync_product_ids()
+        if out_of_sync_product_ids:
+            if options['check']:
+                raise CommandError(
+                    f'{len(out_of_sync_product_ids)} product price range(s) out of sync: '
+                    f'{", ".join(str(product_id) for product_id in out_of_sync_product_ids)}'
+                )
+            Product.refresh_price_ranges(out_of_sync_product_ids)
+            self.stdout.write(
+                self.style.SUCCESS(f'Repaired {len(out_of_sync_product_ids)} product price range(s)'))
+
+        if not out_of_sync_sku_ids and not out_of_sync_product_ids:
+            self.stdout.write(self.style.SUCCESS('All SKU current prices are in sync'))
+            return
+
+        # Repairs write through refresh/update calls that fire no catalog signals
+        catalog_blobs.invalidate()
+        catalog_cache.bump_catalog_version()
@@ -0,0 +1,23 @@
+# Create the database table backing the 'shared' cache in production
+# (settings_production.py uses DatabaseCache so every gunicorn worker and ECS
+# task sees the same catalog version). Deployments only run "migrate", so the
+# table is created here instead of with a separate createcachetable step.
+
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_cache_tables(apps, schema_editor):
+    # No-op when no DatabaseCache is configured (development, tests)
+    call_command('createcachetable', database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0008_remove_discount_models'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_cache_tables, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Add the denormalized Skucurrentprice table and backfill it from the existing
+# Skuprice history. Later inserts are kept in sync by Skuprice.save().
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_current_prices(apps, schema_editor):
+    Skuprice = apps.get_model('order', 'Skuprice')
+    Skucurrentprice = apps.get_model('order', 'Skucurrentprice')
+
+    current_prices = {}
+    for skuprice in Skuprice.objects.order_by('sku_id', '-created_date_time', '-id'):
+        if skuprice.sku_id not in current_prices:
+            current_prices[skuprice.sku_id] = Skucurrentprice(
+                sku_id=skuprice.sku_id,
+                skuprice_id=skuprice.id,
+                price=skuprice.price,
+                created_date_time=skuprice.created_date_time,
+            )
+    Skucurrentprice.objects.bulk_create(current_prices.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0009_create_shared_cache_table'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='skuprice',
+            index=models.Index(fields=['sku', '-created_date_time', '-id'], name='idx_sku_price_latest'),
+        ),
+        migrations.CreateModel(
+            name='Skucurrentprice',
+            fields=[
+                ('sku', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='current_price', serialize=False, to='order.sku')),
+                ('skuprice', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='order.skuprice')),
+                ('price', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('created_date_time', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'order_sku_current_price',
+            },
+        ),
+        migrations.RunPython(backfill_current_prices, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Store for pre-encoded catalog JSON (see order/utilities/catalog_blobs.py).
+# Rows are built on first read, so no backfill is needed.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0010_skucurrentprice'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Catalogpayload',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, unique=True)),
+                ('body', models.BinaryField(blank=True, null=True)),
+                ('updated_date_time', models.DateTimeField()),
+                ('product', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='order.product')),
+            ],
+            options={
+                'db_table': 'order_catalog_payload',
+            },
+        ),
+    ]
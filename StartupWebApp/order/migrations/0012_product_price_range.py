@@ -0,0 +1,45 @@
+# Denormalized product price range used to sort and filter the paginated
+# products listing, backfilled from Skucurrentprice. Kept up to date by
+# Product.refresh_price_ranges().
+
+from django.db import migrations, models
+
+
+def backfill_price_ranges(apps, schema_editor):
+    Product = apps.get_model('order', 'Product')
+    Skucurrentprice = apps.get_model('order', 'Skucurrentprice')
+
+    current_prices = Skucurrentprice.objects.filter(sku__productsku__product=models.OuterRef('pk'))
+    Product.objects.update(
+        price_low=models.Subquery(current_prices.order_by('price').values('price')[:1]),
+        price_high=models.Subquery(current_prices.order_by('-price').values('price')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0011_catalogpayload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='price_high',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='price_low',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['title', 'id'], name='idx_product_title_id'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['price_low', 'id'], name='idx_product_price_low_id'),
+        ),
+        migrations.RunPython(backfill_price_ranges, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Full-text search documents for the order/search endpoint, with a GIN index on
+# the weighted tsvector. Built from the existing catalog here; kept current by
+# order/utilities/search_utils.py afterwards.
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+import django.db.models.deletion
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+
+def build_search_documents(apps, schema_editor):
+    Product = apps.get_model('order', 'Product')
+    Productsearchdocument = apps.get_model('order', 'Productsearchdocument')
+
+    products = Product.objects.annotate(
+        sku_text=StringAgg(
+            Concat('productsku__sku__color', Value(' '), 'productsku__sku__size', Value(' '),
+                   'productsku__sku__description'),
+            delimiter=' ',
+            default=Value(''),
+        )
+    ).values('id', 'title', 'headline', 'description_part_1', 'description_part_2', 'sku_text')
+    now = timezone.now()
+    Productsearchdocument.objects.bulk_create([
+        Productsearchdocument(
+            product_id=product['id'],
+            title=product['title'],
+            headline=product['headline'] or '',
+            description=' '.join(filter(None, [product['description_part_1'], product['description_part_2']])),
+            sku_text=product['sku_text'],
+            updated_date_time=now,
+        )
+        for product in products
+    ])
+    Productsearchdocument.objects.update(search_vector=(
+        SearchVector('title', weight='A', config='english')
+        + SearchVector('headline', weight='B', config='english')
+        + SearchVector('description', weight='C', config='english')
+        + SearchVector('sku_text', weight='D', config='english')
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0012_product_price_range'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Productsearchdocument',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='order.product')),
+                ('title', models.CharField(max_length=200)),
+                ('headline', models.TextField(blank=True)),
+                ('description', models.TextField(blank=True)),
+                ('sku_text', models.TextField(blank=True)),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(blank=True, null=True)),
+                ('updated_date_time', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'order_product_search_document',
+                'indexes': [django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='idx_product_search_vector')],
+            },
+        ),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,58 @@
+# Denormalized cart running totals, backfilled from the cart lines, current
+# SKU prices and selected shipping method. Kept up to date by
+# Cart.refresh_totals().
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_cart_totals(apps, schema_editor):
+    Cart = apps.get_model('order', 'Cart')
+    Cartsku = apps.get_model('order', 'Cartsku')
+    Cartshippingmethod = apps.get_model('order', 'Cartshippingmethod')
+
+    cart_lines = Cartsku.objects.filter(cart=models.OuterRef('pk')).order_by().values('cart')
+    Cart.objects.update(
+        item_count=Coalesce(models.Subquery(cart_lines.annotate(count=models.Count('id')).values('count')), 0),
+        item_subtotal=Coalesce(
+            models.Subquery(cart_lines.annotate(
+                subtotal=models.Sum(models.F('sku__current_price__price') * models.F('quantity'))
+            ).values('subtotal')),
+            Decimal('0.00'),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        ),
+        shipping_subtotal=Coalesce(
+            models.Subquery(Cartshippingmethod.objects.filter(cart=models.OuterRef('pk')).order_by('id').values(
+                'shippingmethod__shipping_cost')[:1]),
+            Decimal('0.00'),
+            output_field=models.DecimalField(max_digits=10, decimal_places=2),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0013_productsearchdocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='item_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='item_subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='shipping_subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunPython(backfill_cart_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Index for looking up anonymous carts by the an_ct cookie value.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0014_cart_totals'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['anonymous_cart_id'], name='idx_cart_anonymous_cart_id'),
+        ),
+    ]
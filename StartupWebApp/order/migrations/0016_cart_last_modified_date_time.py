@@ -0,0 +1,29 @@
+# Cart.last_modified_date_time, for garbage collecting abandoned anonymous carts.
+# Existing carts start from the migration time, so none expire straight away.
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0015_cart_anonymous_cart_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='last_modified_date_time',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(
+                condition=models.Q(member__isnull=True),
+                fields=['last_modified_date_time'],
+                name='idx_cart_anonymous_modified',
+            ),
+        ),
+    ]
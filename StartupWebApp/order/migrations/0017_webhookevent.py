@@ -0,0 +1,50 @@
+# Webhookevent: the inbox of verified Stripe webhook events, processed by the
+# process_webhook_events command. The partial index covers only the events a
+# worker may still claim.
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('order', '0016_cart_last_modified_date_time'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Webhookevent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stripe_event_id', models.CharField(max_length=255, unique=True)),
+                ('event_type', models.CharField(max_length=100)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(
+                    choices=[
+                        ('pending', 'Waiting to be processed'),
+                        ('processing', 'Claimed by a worker'),
+                        ('processed', 'Processed'),
+                        ('dead', 'Failed permanently'),
+                    ],
+                    default='pending',
+                    max_length=20,
+                )),
+                ('attempts', models.IntegerField(default=0)),
+                ('next_attempt_date_time', models.DateTimeField(default=django.utils.timezone.now)),
+                ('received_date_time', models.DateTimeField(auto_now_add=True)),
+                ('processed_date_time', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'order_webhook_event',
+                'indexes': [
+                    models.Index(
+                        condition=models.Q(status__in=['pending', 'processing']),
+                        fields=['next_attempt_date_time'],
+                        name='idx_webhook_event_due',
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -1,4 +1,10 @@
-from django.db import models
+from decimal import Decimal
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models.functions import Coalesce, Now
+from django.utils import timezone
 from user.models import Member, Prospect
 
 # Create your models here.
@@ -56,14 +62,123 @@ class Cart(models.Model):
         blank=True,
         null=True)
     payment = models.ForeignKey(Cartpayment, on_delete=models.CASCADE, blank=True, null=True)
+    # Running totals kept by refresh_totals() so cart reads are a single-row fetch
+    item_count = models.IntegerField(default=0, editable=False)
+    item_subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    shipping_subtotal = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    # Last change to the cart or its lines/shipping method; garbage_collect_carts deletes
+    # anonymous carts left untouched for too long
+    last_modified_date_time = models.DateTimeField(auto_now=True)
+
+    TOTALS_FIELDS = ('item_count', 'item_subtotal', 'shipping_subtotal')
+    # Carts per UPDATE when a price or shipping cost change refreshes every cart it affects
+    REFRESH_BATCH_SIZE = 500
 
     class Meta:
         db_table = 'order_cart'
+        indexes = [
+            models.Index(fields=['anonymous_cart_id'], name='idx_cart_anonymous_cart_id'),
+            models.Index(
+                fields=['last_modified_date_time'],
+                name='idx_cart_anonymous_modified',
+                condition=models.Q(member__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         return str(self.member.user.username if self.member is not None else None) + \
             ": " + str(self.anonymous_cart_id)
 
+    def save(self, *args, **kwargs):
+        # The running totals belong to refresh_totals(); saving a Cart loaded before
+        # its lines changed must not write its stale copies back
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.TOTALS_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def refresh_totals(cls, cart_ids, touch=True):
+        """
+        Recompute item_count, item_subtotal and shipping_subtotal in one UPDATE.
+
+        Called in the same transaction as the write by Cartsku.save(),
+        Cartshippingmethod.save() and the delete receivers in order/signals.py,
+        and after commit, in batches, through refresh_totals_after_commit().
+        Uses queryset.update(), so no Cart signals fire. Writes that bypass all
+        of these must be followed by `manage.py sync_cart_totals`.
+
+        Args:
+            cart_ids: Iterable or queryset of Cart ids
+            touch (bool): Also set last_modified_date_time; pass False when the
+                change is not the visitor's (price or shipping cost changes, repairs)
+        """
+        updates = cls.totals_expressions()
+        if touch:
+            updates['last_modified_date_time'] = Now()
+        cls.objects.filter(id__in=cart_ids).update(**updates)
+
+    @classmethod
+    def refresh_totals_after_commit(cls, cart_rows):
+        """
+        Refresh the totals of the carts in cart_rows once the current transaction commits.
+
+        For changes that reach any number of carts (a SKU price, a shipping cost):
+        the carts are refreshed REFRESH_BATCH_SIZE at a time, in cart id order, each
+        batch its own UPDATE, so the transaction making the change (and the row
+        locks it holds) does not grow with the number of carts. Until the batches
+        have run, the carts show their old totals; if the process dies first, they
+        stay stale until `manage.py sync_cart_totals`.
+
+        Args:
+            cart_rows: Queryset of rows with a cart_id (Cartsku, Cartshippingmethod),
+                evaluated after commit
+        """
+        def refresh():
+            last_cart_id = 0
+            while True:
+                cart_ids = list(cart_rows.filter(cart_id__gt=last_cart_id).order_by('cart_id').values_list(
+                    'cart_id', flat=True).distinct()[:cls.REFRESH_BATCH_SIZE])
+                if not cart_ids:
+                    break
+                cls.refresh_totals(cart_ids, touch=False)
+                last_cart_id = cart_ids[-1]
+
+        transaction.on_commit(refresh)
+
+    @staticmethod
+    def totals_expressions():
+        """
+        Expressions computing each Cart's running totals from its lines, prices and shipping method.
+
+        item_count counts every line, but a line whose SKU has no current price adds nothing to
+        item_subtotal. Such SKUs cannot be added to a cart (see order_utils.get_sellable_product_skus());
+        a line left without a price because its prices were deleted is flagged by
+        order_utils.get_cart_items() and makes create_checkout_session refuse the cart.
+        """
+        cart_lines = Cartsku.objects.filter(cart=models.OuterRef('pk')).order_by().values('cart')
+        return {
+            'item_count': Coalesce(
+                models.Subquery(cart_lines.annotate(count=models.Count('id')).values('count')),
+                0,
+            ),
+            'item_subtotal': Coalesce(
+                models.Subquery(cart_lines.annotate(
+                    subtotal=models.Sum(models.F('sku__current_price__price') * models.F('quantity'))
+                ).values('subtotal')),
+                Decimal('0.00'),
+                output_field=models.DecimalField(max_digits=12, decimal_places=2),
+            ),
+            'shipping_subtotal': Coalesce(
+                models.Subquery(Cartshippingmethod.objects.filter(cart=models.OuterRef('pk')).order_by('id').values(
+                    'shippingmethod__shipping_cost')[:1]),
+                Decimal('0.00'),
+                output_field=models.DecimalField(max_digits=10, decimal_places=2),
+            ),
+        }
+
 
 class Skutype(models.Model):
     title = models.CharField(max_length=100)
@@ -109,10 +224,71 @@ class Skuprice(models.Model):
 
     class Meta:
         db_table = 'order_sku_price'
+        indexes = [
+            models.Index(fields=['sku', '-created_date_time', '-id'], name='idx_sku_price_latest'),
+        ]
 
     def __str__(self):
         return str(self.sku.id) + ": $" + str(self.price) + ": " + str(self.created_date_time)
 
+    def save(self, *args, **kwargs):
+        # Keep Skucurrentprice in the same transaction as the price history row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Skucurrentprice.refresh_for_sku(self.sku_id)
+
+
+class Skucurrentprice(models.Model):
+    """
+    Denormalized newest Skuprice for each Sku.
+
+    Maintained by Skuprice.save() and the Skuprice post_delete receiver in
+    order/signals.py. Writes that bypass both (bulk_create, queryset.update(),
+    raw SQL) must be followed by `manage.py sync_current_prices`.
+    """
+    sku = models.OneToOneField(Sku, on_delete=models.CASCADE, primary_key=True, related_name='current_price')
+    skuprice = models.ForeignKey(Skuprice, on_delete=models.CASCADE)
+    price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    created_date_time = models.DateTimeField()
+
+    class Meta:
+        db_table = 'order_sku_current_price'
+
+    def __str__(self):
+        return str(self.sku_id) + ": $" + str(self.price) + ": " + str(self.created_date_time)
+
+    @classmethod
+    def refresh_for_sku(cls, sku_id):
+        """
+        Point the Sku's current price at its newest Skuprice (or remove it if there is none).
+
+        Locks the Sku row so concurrent price inserts for the same SKU serialize.
+        The totals of carts holding the SKU are refreshed after commit, outside
+        that lock (see Cart.refresh_totals_after_commit()).
+
+        Returns:
+            Skucurrentprice: The refreshed row, or None if the SKU has no prices
+        """
+        with transaction.atomic():
+            if Sku.objects.select_for_update().filter(id=sku_id).first() is None:
+                return None
+            latest_skuprice = Skuprice.objects.filter(sku_id=sku_id).order_by('-created_date_time', '-id').first()
+            if latest_skuprice is None:
+                cls.objects.filter(sku_id=sku_id).delete()
+                current_price = None
+            else:
+                current_price, created = cls.objects.update_or_create(
+                    sku_id=sku_id,
+                    defaults={
+                        'skuprice': latest_skuprice,
+                        'price': latest_skuprice.price,
+                        'created_date_time': latest_skuprice.created_date_time,
+                    },
+                )
+            Product.refresh_price_ranges(Productsku.objects.filter(sku_id=sku_id).values('product_id'))
+            Cart.refresh_totals_after_commit(Cartsku.objects.filter(sku_id=sku_id))
+            return current_price
+
 
 class Skuimage(models.Model):
     sku = models.ForeignKey(Sku, on_delete=models.CASCADE)
@@ -139,6 +315,12 @@ class Cartsku(models.Model):
     def __str__(self):
         return str(self.cart) + ": " + str(self.sku) + ": " + str(self.quantity)
 
+    def save(self, *args, **kwargs):
+        # Keep the cart's running totals in the same transaction as the line
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Cart.refresh_totals([self.cart_id])
+
 
 class Product(models.Model):
     title = models.CharField(max_length=200)
@@ -147,13 +329,37 @@ class Product(models.Model):
     headline = models.CharField(max_length=5000, blank=True, null=True)
     description_part_1 = models.CharField(max_length=5000, blank=True, null=True)
     description_part_2 = models.CharField(max_length=5000, blank=True, null=True)
+    # Lowest/highest current SKU price, kept by refresh_price_ranges() for sorting and filtering
+    price_low = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, editable=False)
+    price_high = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, editable=False)
 
     class Meta:
         db_table = 'order_product'
+        indexes = [
+            models.Index(fields=['title', 'id'], name='idx_product_title_id'),
+            models.Index(fields=['price_low', 'id'], name='idx_product_price_low_id'),
+        ]
 
     def __str__(self):
         return self.title_url
 
+    @classmethod
+    def refresh_price_ranges(cls, product_ids):
+        """
+        Recompute price_low/price_high from the current prices of each product's SKUs.
+
+        Called from Skucurrentprice.refresh_for_sku() and the Productsku receivers in
+        order/signals.py. Uses queryset.update(), so no Product signals fire.
+
+        Args:
+            product_ids: Iterable or queryset of Product ids
+        """
+        current_prices = Skucurrentprice.objects.filter(sku__productsku__product=models.OuterRef('pk'))
+        cls.objects.filter(id__in=product_ids).update(
+            price_low=models.Subquery(current_prices.order_by('price').values('price')[:1]),
+            price_high=models.Subquery(current_prices.order_by('-price').values('price')[:1]),
+        )
+
 
 class Productimage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
@@ -193,6 +399,50 @@ class Productsku(models.Model):
         return str(self.product) + ": " + str(self.sku)
 
 
+class Catalogpayload(models.Model):
+    """
+    Pre-encoded JSON for the products listing and each product detail payload.
+
+    Managed by order/utilities/catalog_blobs.py. Rows are deleted when the
+    catalog rows they were built from change and rebuilt on the next read.
+    """
+    key = models.CharField(unique=True, max_length=200)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, blank=True, null=True)
+    body = models.BinaryField(blank=True, null=True)
+    updated_date_time = models.DateTimeField()
+
+    class Meta:
+        db_table = 'order_catalog_payload'
+
+    def __str__(self):
+        return self.key + ": " + str(self.updated_date_time)
+
+
+class Productsearchdocument(models.Model):
+    """
+    Full-text search document for a product and its SKUs.
+
+    Maintained by order/utilities/search_utils.py whenever catalog rows change;
+    `python manage.py rebuild_search_documents` rebuilds every document.
+    """
+    product = models.OneToOneField(Product, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    title = models.CharField(max_length=200)
+    headline = models.TextField(blank=True)
+    description = models.TextField(blank=True)
+    sku_text = models.TextField(blank=True)
+    search_vector = SearchVectorField(blank=True, null=True)
+    updated_date_time = models.DateTimeField()
+
+    class Meta:
+        db_table = 'order_product_search_document'
+        indexes = [
+            GinIndex(fields=['search_vector'], name='idx_product_search_vector'),
+        ]
+
+    def __str__(self):
+        return str(self.product_id) + ": " + self.title
+
+
 class Shippingmethod(models.Model):
     identifier = models.CharField(max_length=100)
     carrier = models.CharField(max_length=100)
@@ -219,6 +469,11 @@ class Cartshippingmethod(models.Model):
     def __str__(self):
         return str(self.cart) + ": " + str(self.shippingmethod)
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            Cart.refresh_totals([self.cart_id])
+
 
 class Orderpayment(models.Model):
     email = models.CharField(max_length=254, blank=True, null=True)
@@ -435,3 +690,40 @@ class Orderemailfailure(models.Model):
         else:
             return 'Undefined'
     order_identifier.short_description = 'Order Identifier'
+
+
+class Webhookevent(models.Model):
+    """
+    A verified Stripe webhook event, stored by stripe_webhook and processed by
+    the process_webhook_events command (see order/utilities/webhook_inbox.py).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Waiting to be processed'),
+        ('processing', 'Claimed by a worker'),
+        ('processed', 'Processed'),
+        ('dead', 'Failed permanently'),
+    ]
+
+    stripe_event_id = models.CharField(max_length=255, unique=True)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    # When a pending event is next due, or when a worker's claim on a processing event lapses
+    next_attempt_date_time = models.DateTimeField(default=timezone.now)
+    received_date_time = models.DateTimeField(auto_now_add=True)
+    processed_date_time = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'order_webhook_event'
+        indexes = [
+            models.Index(
+                fields=['next_attempt_date_time'],
+                condition=models.Q(status__in=['pending', 'processing']),
+                name='idx_webhook_event_due',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.stripe_event_id}: {self.event_type} ({self.status})"
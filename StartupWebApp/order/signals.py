@@ -0,0 +1,152 @@
+"""
+Signal receivers for the order app.
+
+Connected in OrderConfig.ready().
+"""
+
+from django.contrib.admin.models import LogEntry
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from order.models import (
+    Cart, Cartshippingmethod, Cartsku, Orderconfiguration, Product, Productimage, Productsku, Productvideo,
+    Shippingmethod, Sku, Skucurrentprice, Skuimage, Skuinventory, Skuprice
+)
+from order.utilities import catalog_blobs, catalog_cache, order_configuration, search_utils, shipping_method_table
+
+# Models whose rows feed the products / product detail payloads
+CATALOG_MODELS = (
+    Product,
+    Productsku,
+    Productimage,
+    Productvideo,
+    Sku,
+    Skuimage,
+    Skuinventory,
+    Skuprice,
+)
+
+# Catalog models whose rows feed the search documents (see search_utils._refresh_batch)
+SEARCH_INDEXED_MODELS = (
+    Product,
+    Productsku,
+    Sku,
+)
+
+
+def get_affected_product_ids(instance):
+    """Ids of the products whose payloads include the given catalog row."""
+    if isinstance(instance, Product):
+        return [instance.id]
+    if isinstance(instance, (Productsku, Productimage, Productvideo)):
+        return [instance.product_id]
+    if isinstance(instance, Sku):
+        return list(Productsku.objects.filter(sku_id=instance.id).values_list('product_id', flat=True))
+    if isinstance(instance, (Skuimage, Skuprice)):
+        return list(Productsku.objects.filter(sku_id=instance.sku_id).values_list('product_id', flat=True))
+    if isinstance(instance, Skuinventory):
+        return list(
+            Productsku.objects.filter(sku__sku_inventory_id=instance.id).values_list('product_id', flat=True))
+    return None
+
+
+def invalidate_catalog_cache(sender, instance=None, **kwargs):
+    # Work out the affected products now, while the changed rows are still visible
+    product_ids = get_affected_product_ids(instance) if instance is not None else None
+
+    def invalidate():
+        # A price, image, video or inventory change leaves the indexed text as it was
+        if product_ids is not None and isinstance(instance, SEARCH_INDEXED_MODELS):
+            search_utils.refresh_search_documents(product_ids)
+        # Drop stored payloads before bumping the version, otherwise a reader could
+        # re-cache a stale blob under the new version
+        catalog_blobs.invalidate(product_ids)
+        catalog_cache.bump_catalog_version()
+
+    # Run after commit so a concurrent reader can't cache pre-commit data under the new version
+    transaction.on_commit(invalidate)
+
+
+for catalog_model in CATALOG_MODELS:
+    post_save.connect(
+        invalidate_catalog_cache,
+        sender=catalog_model,
+        dispatch_uid=f'catalog_cache_post_save_{catalog_model.__name__}')
+    post_delete.connect(
+        invalidate_catalog_cache,
+        sender=catalog_model,
+        dispatch_uid=f'catalog_cache_post_delete_{catalog_model.__name__}')
+
+
+@receiver(post_save, sender=LogEntry, dispatch_uid='catalog_cache_admin_log_entry')
+def invalidate_catalog_cache_on_admin_edit(sender, instance, created, **kwargs):
+    # Admin edits normally fire the model signals above as well; this also covers
+    # admin actions that write through queryset.update() and skip them
+    if not created or instance.content_type_id is None:
+        return
+    model_class = ContentType.objects.get_for_id(instance.content_type_id).model_class()
+    if model_class in CATALOG_MODELS:
+        # Deleted objects are gone, so every stored payload is dropped for those
+        changed_object = model_class._default_manager.filter(pk=instance.object_id).first()
+        invalidate_catalog_cache(sender, instance=changed_object)
+
+
+# Models held in a process-local registry (see order/utilities/local_registry.py)
+LOCAL_REGISTRY_INVALIDATORS = {
+    Orderconfiguration: order_configuration.invalidate,
+    Shippingmethod: shipping_method_table.invalidate,
+}
+
+
+def invalidate_local_registry(sender, **kwargs):
+    # After commit, so no worker reloads the values before the change is visible
+    transaction.on_commit(LOCAL_REGISTRY_INVALIDATORS[sender])
+
+
+for registry_model in LOCAL_REGISTRY_INVALIDATORS:
+    post_save.connect(
+        invalidate_local_registry,
+        sender=registry_model,
+        dispatch_uid=f'local_registry_post_save_{registry_model.__name__}')
+    post_delete.connect(
+        invalidate_local_registry,
+        sender=registry_model,
+        dispatch_uid=f'local_registry_post_delete_{registry_model.__name__}')
+
+
+@receiver(post_save, sender=LogEntry, dispatch_uid='local_registry_admin_log_entry')
+def invalidate_local_registry_on_admin_edit(sender, instance, created, **kwargs):
+    # Covers admin actions that write through queryset.update() and skip the receivers above
+    if not created or instance.content_type_id is None:
+        return
+    model_class = ContentType.objects.get_for_id(instance.content_type_id).model_class()
+    if model_class in LOCAL_REGISTRY_INVALIDATORS:
+        invalidate_local_registry(model_class)
+
+
+@receiver(post_delete, sender=Skuprice, dispatch_uid='sku_current_price_post_delete')
+def refresh_current_price_on_skuprice_delete(sender, instance, **kwargs):
+    # Inserts and edits are handled in Skuprice.save(); deletes (including queryset
+    # and cascade deletes) run inside the deletion transaction here
+    Skucurrentprice.refresh_for_sku(instance.sku_id)
+
+
+@receiver(post_save, sender=Productsku, dispatch_uid='product_price_range_productsku_post_save')
+@receiver(post_delete, sender=Productsku, dispatch_uid='product_price_range_productsku_post_delete')
+def refresh_price_range_on_productsku_change(sender, instance, **kwargs):
+    Product.refresh_price_ranges([instance.product_id])
+
+
+@receiver(post_delete, sender=Cartsku, dispatch_uid='cart_totals_cartsku_post_delete')
+@receiver(post_delete, sender=Cartshippingmethod, dispatch_uid='cart_totals_cartshippingmethod_post_delete')
+def refresh_cart_totals_on_delete(sender, instance, **kwargs):
+    # Saves are handled in Cartsku.save() / Cartshippingmethod.save()
+    Cart.refresh_totals([instance.cart_id])
+
+
+@receiver(post_save, sender=Shippingmethod, dispatch_uid='cart_totals_shippingmethod_post_save')
+def refresh_cart_totals_on_shipping_cost_change(sender, instance, created, **kwargs):
+    if not created:
+        Cart.refresh_totals_after_commit(Cartshippingmethod.objects.filter(shippingmethod=instance))
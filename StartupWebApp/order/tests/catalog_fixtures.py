@@ -0,0 +1,114 @@
+# Catalog fixtures shared by the order tests
+
+from django.utils import timezone
+
+from order.models import (
+    Product, Productimage, Productsku, Productvideo, Sku, Skuimage, Skuinventory, Skuprice, Skutype
+)
+
+
+def reference_product_data(product_identifier):
+    """
+    Product detail payload built the way order.views.product originally did it.
+
+    Issues one price query, one inventory lookup and one image query per SKU.
+    Used as the expected payload for catalog_utils.get_product_data. Ties
+    between non-main images are broken by id, which the original queries left
+    unspecified.
+    """
+    product = Product.objects.get(identifier=product_identifier)
+
+    product_data = {}
+    product_data['title'] = product.title
+    product_data['title_url'] = product.title_url
+    product_data['identifier'] = product.identifier
+    product_data['headline'] = product.headline
+    product_data['description_part_1'] = product.description_part_1
+    product_data['description_part_2'] = product.description_part_2
+
+    product_images = {}
+    for product_image in Productimage.objects.filter(product=product).order_by('-main_image', 'id'):
+        product_image_data = {}
+        product_image_data['image_url'] = product_image.image_url
+        product_image_data['main'] = product_image.main_image
+        product_image_data['caption'] = product_image.caption
+        product_images[product_image.id] = product_image_data
+    product_data['product_images'] = product_images
+
+    product_videos = {}
+    for product_video in Productvideo.objects.filter(product=product).order_by('-id'):
+        product_video_data = {}
+        product_video_data['video_url'] = product_video.video_url
+        product_video_data['video_thumbnail_url'] = product_video.video_thumbnail_url
+        product_video_data['caption'] = product_video.caption
+        product_videos[product_video.id] = product_video_data
+    product_data['product_videos'] = product_videos
+
+    product_skus = {}
+    for product_sku in Productsku.objects.filter(product=product).order_by('sku__id'):
+        product_sku_data = {}
+        product_sku_data['color'] = product_sku.sku.color
+        product_sku_data['size'] = product_sku.sku.size
+        product_sku_data['description'] = product_sku.sku.description
+        product_sku_data['price'] = Skuprice.objects.filter(sku=product_sku.sku).latest('created_date_time').price
+        product_sku_data['inventory_status_identifier'] = product_sku.sku.sku_inventory.identifier
+        product_sku_data['inventory_status_title'] = product_sku.sku.sku_inventory.title
+        product_sku_data['inventory_status_description'] = product_sku.sku.sku_inventory.description
+
+        sku_images = {}
+        for sku_image in Skuimage.objects.filter(sku=product_sku.sku).order_by('-main_image', 'id'):
+            sku_image_data = {}
+            sku_image_data['image_url'] = sku_image.image_url
+            sku_image_data['main'] = sku_image.main_image
+            sku_image_data['caption'] = sku_image.caption
+            sku_images[sku_image.id] = sku_image_data
+        product_sku_data['sku_images'] = sku_images
+
+        product_skus[product_sku.sku.id] = product_sku_data
+    product_data['skus'] = product_skus
+    return product_data
+
+
+def create_catalog_product(identifier, sku_count):
+    """Create a product with sku_count SKUs, each with a price history and images"""
+    skutype, created = Skutype.objects.get_or_create(title='product')
+    skuinventory = Skuinventory.objects.create(
+        title='Test Stock',
+        identifier=f'{identifier}-stock',
+        description='Created by order tests'
+    )
+    product = Product.objects.create(
+        title=f'Test {identifier}',
+        title_url=f'Test{identifier}',
+        identifier=identifier,
+        headline='Test product'
+    )
+    for image_number in range(3):
+        Productimage.objects.create(
+            product=product,
+            image_url=f'https://example.com/{identifier}/{image_number}.jpg',
+            main_image=(image_number == 0)
+        )
+    Productvideo.objects.create(
+        product=product,
+        video_url=f'https://example.com/{identifier}.mp4',
+        video_thumbnail_url=f'https://example.com/{identifier}.jpg'
+    )
+    now = timezone.now()
+    for sku_number in range(sku_count):
+        sku = Sku.objects.create(
+            color=f'Color {sku_number}',
+            size='Medium',
+            sku_type=skutype,
+            sku_inventory=skuinventory
+        )
+        Skuprice.objects.create(sku=sku, price=sku_number + 10, created_date_time=now - timezone.timedelta(days=1))
+        Skuprice.objects.create(sku=sku, price=sku_number + 1, created_date_time=now)
+        Productsku.objects.create(product=product, sku=sku)
+        for image_number in range(2):
+            Skuimage.objects.create(
+                sku=sku,
+                image_url=f'https://example.com/{identifier}/{sku_number}/{image_number}.jpg',
+                main_image=(image_number == 0)
+            )
+    return product
@@ -0,0 +1,184 @@
+# Unit tests for the cart-apply batch cart mutation endpoint
+
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from order.models import (
+    Cart, Cartshippingmethod, Cartsku, Orderconfiguration, Product, Productimage, Productsku, Shippingmethod, Sku,
+    Skuinventory, Skuprice, Skutype
+)
+from user.models import Member, Termsofuse
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+from StartupWebApp.utilities import unittest_utilities
+
+
+class CartApplyTest(PostgreSQLTestCase):
+    """Test the /order/cart-apply endpoint"""
+
+    def setUp(self):
+        Group.objects.create(name='Members')
+        Termsofuse.objects.create(version='1', version_note='Test', publication_date_time=timezone.now())
+        user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass123')
+        member = Member.objects.create(user=user, mb_cd='MEMBER123')
+
+        Orderconfiguration.objects.create(key='usernames_allowed_to_checkout', string_value='*')
+        Orderconfiguration.objects.create(key='an_ct_values_allowed_to_checkout', string_value='*')
+        Orderconfiguration.objects.create(key='default_shipping_method', string_value='USPSRetailGround')
+        self.default_shipping_method = Shippingmethod.objects.create(
+            identifier='USPSRetailGround', carrier='USPS', shipping_cost=Decimal('4.75'), active=True)
+        self.express_shipping_method = Shippingmethod.objects.create(
+            identifier='USPSPriorityMail2Day', carrier='USPS', shipping_cost=Decimal('7.50'), active=True)
+
+        skutype = Skutype.objects.create(title='product')
+        skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        product = Product.objects.create(title='Paper Clips', title_url='PaperClips', identifier='PROD001')
+        Productimage.objects.create(product=product, image_url='https://example.com/clips.jpg', main_image=True)
+        self.skus = []
+        for price in ['1.00', '2.00', '3.00', '4.00', '5.00', '6.00']:
+            sku = Sku.objects.create(color='Silver', size='Medium', sku_type=skutype, sku_inventory=skuinventory)
+            Skuprice.objects.create(sku=sku, price=Decimal(price), created_date_time=timezone.now())
+            Productsku.objects.create(product=product, sku=sku)
+            self.skus.append(sku)
+
+        self.cart = Cart.objects.create(member=member)
+        Cartsku.objects.create(cart=self.cart, sku=self.skus[0], quantity=1)
+        Cartsku.objects.create(cart=self.cart, sku=self.skus[1], quantity=1)
+        Cartshippingmethod.objects.create(cart=self.cart, shippingmethod=self.express_shipping_method)
+        self.client.login(username='testuser', password='testpass123')
+
+    def apply(self, operations):
+        response = self.client.post('/order/cart-apply', {'operations': json.dumps(operations)})
+        unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+        return json.loads(response.content.decode('utf8'))
+
+    def cart_quantities(self, cart=None):
+        return dict(Cartsku.objects.filter(cart=cart or self.cart).values_list('sku_id', 'quantity'))
+
+    def test_operations_are_applied_in_order(self):
+        """Test that add/update/remove operations are applied and the resulting snapshot is returned"""
+        data = self.apply([
+            {'action': 'update', 'sku_id': self.skus[0].id, 'quantity': 3},
+            {'action': 'remove', 'sku_id': self.skus[1].id},
+            {'action': 'add', 'sku_id': self.skus[2].id, 'quantity': '2'},
+            {'action': 'add', 'sku_id': self.skus[2].id, 'quantity': 1},
+        ])
+
+        self.assertEqual(data['cart_apply'], 'success')
+        self.assertEqual(self.cart_quantities(), {self.skus[0].id: 3, self.skus[2].id: 3})
+        self.assertEqual(len(data['item_data']['product_sku_data']), 2)
+        # Removing a line clears the selected shipping method, so the default is selected again
+        self.assertEqual(data['shipping_method_selected'], 'USPSRetailGround')
+        self.assertEqual(data['cart_totals_data'], {
+            'item_subtotal': '12.00', 'shipping_subtotal': '4.75', 'cart_total': '16.75'})
+        self.assertEqual(data['cart_totals_data'], self.client.get('/order/cart-snapshot').json()['cart_totals_data'])
+        cart = Cart.objects.get(id=self.cart.id)
+        self.assertEqual((cart.item_count, cart.item_subtotal), (2, Decimal('12.00')))
+
+    def test_failing_operation_changes_nothing(self):
+        """Test that an operation that cannot be applied rolls back the whole batch"""
+        sku_without_product = Sku.objects.create(
+            color='Gold', size='Small', sku_type=self.skus[0].sku_type, sku_inventory=self.skus[0].sku_inventory)
+
+        for operations, error_dict in [
+            ([{'action': 'remove', 'sku_id': self.skus[0].id},
+              {'action': 'update', 'sku_id': self.skus[3].id, 'quantity': 1}], {'error': 'cart-sku-not-found'}),
+            ([{'action': 'update', 'sku_id': self.skus[0].id, 'quantity': 5},
+              {'action': 'add', 'sku_id': sku_without_product.id, 'quantity': 1}], {'error': 'sku-not-found'}),
+        ]:
+            data = self.apply(operations)
+            self.assertEqual(data['cart_apply'], 'error')
+            self.assertEqual(data['errors'], error_dict)
+            self.assertEqual(data['operation_index'], 1)
+
+        self.assertEqual(self.cart_quantities(), {self.skus[0].id: 1, self.skus[1].id: 1})
+        self.assertTrue(Cartshippingmethod.objects.filter(cart=self.cart).exists())
+
+    def test_invalid_requests_are_rejected(self):
+        """Test that missing, malformed and oversized operation lists return errors"""
+        response = self.client.post('/order/cart-apply', {})
+        self.assertEqual(response.json()['errors'], {'error': 'operations-required'})
+        response = self.client.post('/order/cart-apply', {'operations': 'not json'})
+        self.assertEqual(response.json()['errors'], {'error': 'operations-invalid'})
+
+        too_many = [{'action': 'remove', 'sku_id': self.skus[0].id}] * 51
+        for operations, error_dict, operation_index in [
+            ({'action': 'remove'}, {'error': 'operations-invalid'}, None),
+            ([], {'error': 'operations-required'}, None),
+            (too_many, {'error': 'too-many-operations'}, None),
+            ([{'action': 'replace', 'sku_id': self.skus[0].id}], {'error': 'operation-invalid'}, 0),
+            ([{'action': 'remove'}], {'error': 'sku-id-required'}, 0),
+            ([{'action': 'remove', 'sku_id': 'abc'}], {'error': 'sku-not-found'}, 0),
+        ]:
+            data = self.apply(operations)
+            self.assertEqual(data['cart_apply'], 'error')
+            self.assertEqual(data['errors'], error_dict)
+            self.assertEqual(data.get('operation_index'), operation_index)
+
+        for quantity in [100, 'two', None, True]:
+            data = self.apply([
+                {'action': 'remove', 'sku_id': self.skus[1].id},
+                {'action': 'update', 'sku_id': self.skus[0].id, 'quantity': quantity},
+            ])
+            self.assertEqual(list(data['errors']), ['quantity'])
+            self.assertEqual(data['operation_index'], 1)
+        self.assertEqual(self.cart_quantities(), {self.skus[0].id: 1, self.skus[1].id: 1})
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        """Test that applying many add/update/remove operations costs the same queries as applying three"""
+        # Load the configuration and shipping method registries up front, so neither measurement includes them
+        self.client.get('/order/cart-snapshot')
+        Cartsku.objects.create(cart=self.cart, sku=self.skus[2], quantity=1)
+        with CaptureQueriesContext(connection) as small_context:
+            data = self.apply([
+                {'action': 'update', 'sku_id': self.skus[0].id, 'quantity': 2},
+                {'action': 'add', 'sku_id': self.skus[3].id, 'quantity': 1},
+                {'action': 'remove', 'sku_id': self.skus[2].id},
+            ])
+        self.assertEqual(data['cart_apply'], 'success')
+
+        for sku in self.skus[2:]:
+            Cartsku.objects.update_or_create(cart=self.cart, sku=sku, defaults={'quantity': 1})
+        Cartshippingmethod.objects.create(cart=self.cart, shippingmethod=self.express_shipping_method)
+        with CaptureQueriesContext(connection) as large_context:
+            data = self.apply(
+                [{'action': 'update', 'sku_id': sku.id, 'quantity': 4} for sku in self.skus[:3]]
+                + [{'action': 'add', 'sku_id': sku.id, 'quantity': 1} for sku in self.skus[:3]]
+                + [{'action': 'remove', 'sku_id': sku.id} for sku in self.skus[3:]]
+            )
+
+        self.assertEqual(len(large_context.captured_queries), len(small_context.captured_queries))
+        self.assertEqual(self.cart_quantities(), {self.skus[0].id: 5, self.skus[1].id: 5, self.skus[2].id: 5})
+        cart = Cart.objects.get(id=self.cart.id)
+        # The removal cleared the express method; the snapshot selected the default one again
+        self.assertEqual(
+            (cart.item_count, cart.item_subtotal, cart.shipping_subtotal), (3, Decimal('30.00'), Decimal('4.75')))
+
+    def test_anonymous_add_creates_cart(self):
+        """Test that an anonymous batch with an add creates a cart and sets the an_ct cookie"""
+        self.client.logout()
+
+        data = self.apply([{'action': 'update', 'sku_id': self.skus[0].id, 'quantity': 1}])
+        self.assertEqual(data['errors'], {'error': 'cart-not-found'})
+        data = self.apply([{'action': 'add', 'sku_id': 'nope', 'quantity': 1}])
+        self.assertEqual(data['errors'], {'error': 'sku-not-found'})
+        data = self.apply([
+            {'action': 'add', 'sku_id': self.skus[5].id, 'quantity': 1},
+            {'action': 'add', 'sku_id': 0, 'quantity': 1},
+        ])
+        self.assertEqual(data['errors'], {'error': 'sku-not-found'})
+        self.assertEqual(Cart.objects.count(), 1)
+
+        operations = [{'action': 'add', 'sku_id': self.skus[5].id, 'quantity': 2}]
+        response = self.client.post('/order/cart-apply', {'operations': json.dumps(operations)})
+
+        self.assertEqual(response.json()['cart_apply'], 'success')
+        self.assertIn('an_ct', response.cookies)
+        anonymous_cart = Cart.objects.get(member=None)
+        self.assertEqual(self.cart_quantities(anonymous_cart), {self.skus[5].id: 2})
+        self.assertEqual(self.client.get('/order/cart-snapshot').json()['cart_totals_data']['item_subtotal'], '12.00')
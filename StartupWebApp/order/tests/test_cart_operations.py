@@ -1,7 +1,10 @@
 # Unit tests for cart operations endpoints
 
 import json
+import threading
 
+from django.db import connection
+from django.test import Client
 from django.utils import timezone
 from django.contrib.auth.models import User, Group
 
@@ -297,6 +300,43 @@ class CartAddProductSkuEndpointTest(PostgreSQLTestCase):
         cart = Cart.objects.first()
         self.assertEqual(cart.member, member)
 
+    def test_cart_add_product_sku_concurrent_adds_are_all_counted(self):
+        """Test that parallel adds of the same SKU to one cart neither fail nor lose an increment"""
+        Group.objects.create(name='Members')
+        Termsofuse.objects.create(version='1', version_note='Test', publication_date_time=timezone.now())
+        user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass123')
+        cart = Cart.objects.create(member=Member.objects.create(user=user, mb_cd='MEMBER123'))
+        thread_count = 8
+
+        def add_in_parallel():
+            barrier = threading.Barrier(thread_count)
+            results = []
+
+            def add():
+                try:
+                    client = Client()
+                    client.force_login(user)
+                    barrier.wait()
+                    response = client.post('/order/cart-add-product-sku', {'sku_id': str(self.sku.id), 'quantity': '1'})
+                    results.append(json.loads(response.content.decode('utf8'))['cart_add_product_sku'])
+                finally:
+                    connection.close()
+
+            threads = [threading.Thread(target=add) for _ in range(thread_count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return results
+
+        # First round races to create the cart line, second round to increment it
+        for expected_quantity in [thread_count, 2 * thread_count]:
+            self.assertEqual(add_in_parallel(), ['success'] * thread_count)
+            cartsku = Cartsku.objects.get(cart=cart, sku=self.sku)
+            self.assertEqual(cartsku.quantity, expected_quantity)
+            cart.refresh_from_db()
+            self.assertEqual(cart.item_subtotal, 10 * expected_quantity)
+
 
 class CartUpdateSkuQuantityEndpointTest(PostgreSQLTestCase):
     """Test the cart_update_sku_quantity endpoint"""
@@ -0,0 +1,122 @@
+# Unit tests for the cart-snapshot and confirm-snapshot endpoints
+
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from order.models import (
+    Cart, Cartsku, Orderconfiguration, Product, Productimage, Productsku, Shippingmethod, Sku, Skuinventory,
+    Skuprice, Skutype
+)
+from user.models import Member, Termsofuse
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+from StartupWebApp.utilities import unittest_utilities
+
+
+class CartSnapshotTest(PostgreSQLTestCase):
+    """Test that the snapshot endpoints match the endpoints they combine"""
+
+    def setUp(self):
+        Group.objects.create(name='Members')
+        Termsofuse.objects.create(version='1', version_note='Test', publication_date_time=timezone.now())
+        self.user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass123')
+        member = Member.objects.create(user=self.user, mb_cd='MEMBER123')
+
+        Orderconfiguration.objects.create(key='usernames_allowed_to_checkout', string_value='testuser')
+        Orderconfiguration.objects.create(key='an_ct_values_allowed_to_checkout', string_value='test_token')
+        Orderconfiguration.objects.create(key='default_shipping_method', string_value='USPSRetailGround')
+        Shippingmethod.objects.create(
+            identifier='USPSRetailGround', carrier='USPS', shipping_cost=Decimal('4.75'), active=True)
+        Shippingmethod.objects.create(
+            identifier='USPSPriorityMail2Day', carrier='USPS', shipping_cost=Decimal('7.50'), active=True)
+
+        skutype = Skutype.objects.create(title='product')
+        skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        product = Product.objects.create(title='Paper Clips', title_url='PaperClips', identifier='PROD001')
+        Productimage.objects.create(product=product, image_url='https://example.com/clips.jpg', main_image=True)
+        self.cart = Cart.objects.create(member=member)
+        for price, quantity in [(Decimal('3.50'), 2), (Decimal('10.00'), 1)]:
+            sku = Sku.objects.create(color='Silver', size='Medium', sku_type=skutype, sku_inventory=skuinventory)
+            Skuprice.objects.create(sku=sku, price=price, created_date_time=timezone.now())
+            Productsku.objects.create(product=product, sku=sku)
+            Cartsku.objects.create(cart=self.cart, sku=sku, quantity=quantity)
+
+        self.client.login(username='testuser', password='testpass123')
+
+    def get(self, endpoint):
+        response = self.client.get(f'/order/{endpoint}')
+        unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+        return json.loads(response.content.decode('utf8'))
+
+    def test_cart_snapshot_matches_cart_endpoints(self):
+        """Test that cart-snapshot combines cart-items, cart-shipping-methods, cart-totals and checkout-allowed"""
+        snapshot = self.get('cart-snapshot')
+
+        self.assertTrue(snapshot['cart_found'])
+        self.assertTrue(snapshot['checkout_allowed'])
+        self.assertEqual(snapshot['order-api-version'], '0.0.1')
+        self.assertEqual(snapshot['item_data'], self.get('cart-items')['item_data'])
+        shipping_methods = self.get('cart-shipping-methods')
+        self.assertEqual(snapshot['cart_shipping_methods'], shipping_methods['cart_shipping_methods'])
+        self.assertEqual(snapshot['shipping_method_selected'], 'USPSRetailGround')
+        self.assertEqual(snapshot['shipping_method_selected'], shipping_methods['shipping_method_selected'])
+        # The default shipping method selected by the snapshot is included in its totals
+        self.assertEqual(snapshot['cart_totals_data'], self.get('cart-totals')['cart_totals_data'])
+        self.assertEqual(snapshot['cart_totals_data']['cart_total'], '21.75')
+
+    def test_cart_snapshot_without_cart(self):
+        """Test that cart-snapshot reports an empty cart when there is none"""
+        self.cart.delete()
+
+        snapshot = self.get('cart-snapshot')
+
+        self.assertFalse(snapshot['cart_found'])
+        self.assertEqual(snapshot['item_data'], {})
+        self.assertEqual(snapshot['cart_shipping_methods'], {})
+        self.assertIsNone(snapshot['shipping_method_selected'])
+        self.assertEqual(snapshot['cart_totals_data']['cart_total'], 0)
+
+    def test_cart_snapshot_costs_fewer_queries_than_separate_endpoints(self):
+        """Test that one snapshot request runs fewer queries than the four requests it replaces"""
+        self.get('cart-snapshot')
+
+        with CaptureQueriesContext(connection) as separate_context:
+            for endpoint in ['cart-items', 'cart-shipping-methods', 'cart-totals', 'checkout-allowed']:
+                self.get(endpoint)
+        with CaptureQueriesContext(connection) as snapshot_context:
+            self.get('cart-snapshot')
+
+        self.assertLess(len(snapshot_context.captured_queries), len(separate_context.captured_queries))
+        cart_queries = [
+            query for query in snapshot_context.captured_queries if query['sql'].startswith('SELECT "order_cart"."id"')
+        ]
+        self.assertEqual(len(cart_queries), 1)
+
+    def test_confirm_snapshot_matches_confirm_endpoints(self):
+        """Test that confirm-snapshot combines confirm-items, confirm-shipping-method and confirm-totals"""
+        self.get('cart-shipping-methods')
+
+        snapshot = self.get('confirm-snapshot')
+
+        self.assertTrue(snapshot['checkout_allowed'])
+        self.assertTrue(snapshot['cart_found'])
+        self.assertEqual(snapshot['item_data'], self.get('confirm-items')['item_data'])
+        self.assertEqual(
+            snapshot['confirm_shipping_method'], self.get('confirm-shipping-method')['confirm_shipping_method'])
+        self.assertEqual(snapshot['confirm_shipping_method']['identifier'], 'USPSRetailGround')
+        self.assertEqual(snapshot['confirm_totals_data'], self.get('confirm-totals')['confirm_totals_data'])
+
+    def test_confirm_snapshot_when_checkout_not_allowed(self):
+        """Test that confirm-snapshot only reports checkout_allowed when checkout is not allowed"""
+        configuration = Orderconfiguration.objects.get(key='usernames_allowed_to_checkout')
+        configuration.string_value = 'someoneelse'
+        configuration.save()
+
+        snapshot = self.get('confirm-snapshot')
+
+        self.assertEqual(snapshot, {'checkout_allowed': False, 'order-api-version': '0.0.1'})
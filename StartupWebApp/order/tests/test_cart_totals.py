@@ -0,0 +1,172 @@
+# Unit tests for the running totals stored on Cart
+
+import json
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from order.models import (
+    Cart, Cartshippingmethod, Cartsku, Product, Productsku, Shippingmethod, Sku, Skuinventory, Skuprice, Skutype
+)
+from order.utilities import order_utils
+from user.models import Member, Termsofuse
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+
+
+class CartTotalsTest(PostgreSQLTestCase):
+    """Test that Cart.item_count/item_subtotal/shipping_subtotal follow every cart mutation"""
+
+    def setUp(self):
+        skutype = Skutype.objects.create(title='product')
+        skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        self.cart = Cart.objects.create(anonymous_cart_id='anon_cart_123')
+        self.sku = Sku.objects.create(color='Silver', size='Medium', sku_type=skutype, sku_inventory=skuinventory)
+        self.other_sku = Sku.objects.create(color='Gold', size='Large', sku_type=skutype, sku_inventory=skuinventory)
+        Skuprice.objects.create(sku=self.sku, price=3.50, created_date_time=timezone.now())
+        Skuprice.objects.create(sku=self.other_sku, price=10.00, created_date_time=timezone.now())
+        self.shippingmethod = Shippingmethod.objects.create(
+            identifier='USPSPriorityMail2Day', carrier='USPS', shipping_cost=Decimal('5.00'), active=True)
+
+    def get_totals(self):
+        cart = Cart.objects.get(id=self.cart.id)
+        return cart.item_count, cart.item_subtotal, cart.shipping_subtotal
+
+    def test_totals_follow_cart_lines(self):
+        """Test that adding, requantifying and removing lines update the totals"""
+        cartsku = Cartsku.objects.create(cart=self.cart, sku=self.sku, quantity=2)
+        self.assertEqual(self.get_totals(), (1, Decimal('7.00'), Decimal('0.00')))
+
+        Cartsku.objects.create(cart=self.cart, sku=self.other_sku, quantity=1)
+        cartsku.quantity = 4
+        cartsku.save()
+        self.assertEqual(self.get_totals(), (2, Decimal('24.00'), Decimal('0.00')))
+
+        cartsku.delete()
+        self.assertEqual(self.get_totals(), (1, Decimal('10.00'), Decimal('0.00')))
+
+    def test_totals_follow_shipping_method_and_prices(self):
+        """Test that shipping method selection, shipping cost and SKU price changes update the totals"""
+        Cartsku.objects.create(cart=self.cart, sku=self.sku, quantity=2)
+        cart_shipping_method = Cartshippingmethod.objects.create(cart=self.cart, shippingmethod=self.shippingmethod)
+        self.assertEqual(self.get_totals(), (1, Decimal('7.00'), Decimal('5.00')))
+
+        self.shippingmethod.shipping_cost = Decimal('6.50')
+        self.shippingmethod.save()
+        Skuprice.objects.create(sku=self.sku, price=3.00, created_date_time=timezone.now())
+        self.assertEqual(self.get_totals(), (1, Decimal('6.00'), Decimal('6.50')))
+
+        cart_shipping_method.delete()
+        self.assertEqual(self.get_totals(), (1, Decimal('6.00'), Decimal('0.00')))
+
+    def test_price_change_refreshes_carts_in_batches_after_commit(self):
+        """Test that a price change leaves cart totals alone until commit, then refreshes them batch by batch"""
+        carts = [self.cart] + [Cart.objects.create(anonymous_cart_id=f'anon_cart_{number}') for number in range(4)]
+        for cart in carts:
+            Cartsku.objects.create(cart=cart, sku=self.sku, quantity=2)
+
+        with patch.object(Cart, 'REFRESH_BATCH_SIZE', 2), patch.object(
+                Cart, 'refresh_totals', wraps=Cart.refresh_totals) as mock_refresh_totals:
+            with transaction.atomic():
+                Skuprice.objects.create(sku=self.sku, price=3.00, created_date_time=timezone.now())
+                self.assertEqual(self.get_totals(), (1, Decimal('7.00'), Decimal('0.00')))
+                mock_refresh_totals.assert_not_called()
+
+        self.assertEqual([len(call.args[0]) for call in mock_refresh_totals.call_args_list], [2, 2, 1])
+        self.assertEqual(
+            set(Cart.objects.filter(id__in=[cart.id for cart in carts]).values_list('item_subtotal', flat=True)),
+            {Decimal('6.00')})
+
+    def test_sku_without_price_cannot_be_added(self):
+        """Test that a SKU with no current price is refused rather than added at no cost"""
+        product = Product.objects.create(title='Paper Clips', title_url='PaperClips', identifier='PROD001')
+        unpriced_sku = Sku.objects.create(
+            color='Red', size='Small', sku_type=self.sku.sku_type, sku_inventory=self.sku.sku_inventory)
+        Productsku.objects.create(product=product, sku=unpriced_sku)
+        Productsku.objects.create(product=product, sku=self.sku)
+
+        self.assertEqual(
+            order_utils.apply_cart_operations(self.cart, [('add', self.sku.id, 1), ('add', unpriced_sku.id, 1)]),
+            ({'error': 'sku-not-found'}, 1))
+        with self.assertRaises(Productsku.DoesNotExist):
+            order_utils.add_cart_sku(self.cart, unpriced_sku.id, 1)
+
+        self.assertEqual(self.get_totals(), (0, Decimal('0.00'), Decimal('0.00')))
+
+    def test_saving_stale_cart_keeps_totals(self):
+        """Test that saving a Cart instance loaded before its lines changed does not reset the totals"""
+        stale_cart = Cart.objects.get(id=self.cart.id)
+        Cartsku.objects.create(cart=self.cart, sku=self.sku, quantity=2)
+
+        stale_cart.anonymous_cart_id = 'anon_cart_456'
+        stale_cart.save()
+
+        self.assertEqual(self.get_totals(), (1, Decimal('7.00'), Decimal('0.00')))
+        self.assertEqual(Cart.objects.get(id=self.cart.id).anonymous_cart_id, 'anon_cart_456')
+
+    def test_summary_is_single_row_fetch(self):
+        """Test that cart totals are read with one query however many lines the cart has"""
+        Cartsku.objects.create(cart=self.cart, sku=self.sku, quantity=2)
+        Cartsku.objects.create(cart=self.cart, sku=self.other_sku, quantity=1)
+
+        with CaptureQueriesContext(connection) as context:
+            cart_totals = order_utils.get_cart_totals(self.cart)
+
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(cart_totals['cart_total'], Decimal('17.00'))
+
+    def test_cart_endpoints_report_updated_totals(self):
+        """Test that cart endpoints see totals written earlier in the same request"""
+        Group.objects.create(name='Members')
+        Termsofuse.objects.create(version='1', version_note='Test', publication_date_time=timezone.now())
+        user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass123')
+        Cart.objects.filter(id=self.cart.id).update(member=Member.objects.create(user=user, mb_cd='MEMBER123'))
+        Cartsku.objects.create(cart=self.cart, sku=self.sku, quantity=2)
+        self.client.login(username='testuser', password='testpass123')
+
+        response = self.client.post('/order/cart-update-sku-quantity', {'sku_id': str(self.sku.id), 'quantity': '3'})
+        self.assertEqual(json.loads(response.content.decode('utf8'))['cart_totals_data']['item_subtotal'], '10.50')
+
+        response = self.client.get('/order/cart-totals')
+        self.assertEqual(json.loads(response.content.decode('utf8'))['cart_totals_data'], {
+            'item_subtotal': '10.50', 'shipping_subtotal': 0, 'cart_total': '10.50'})
+
+
+class SyncCartTotalsCommandTest(PostgreSQLTestCase):
+    """Test the sync_cart_totals management command"""
+
+    def setUp(self):
+        skutype = Skutype.objects.create(title='product')
+        skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        self.cart = Cart.objects.create(anonymous_cart_id='anon_cart_123')
+        self.sku = Sku.objects.create(color='Silver', size='Medium', sku_type=skutype, sku_inventory=skuinventory)
+        Skuprice.objects.create(sku=self.sku, price=3.50, created_date_time=timezone.now())
+        Cartsku.objects.create(cart=self.cart, sku=self.sku, quantity=2)
+        Cart.objects.create(anonymous_cart_id='anon_cart_456')
+
+    def test_check_passes_when_in_sync(self):
+        """Test that --check succeeds when every cart is in sync"""
+        out = StringIO()
+        call_command('sync_cart_totals', '--check', stdout=out)
+        self.assertIn('in sync', out.getvalue())
+
+    def test_check_reports_and_repair_fixes_drift(self):
+        """Test that a quantity changed with queryset.update() is reported and repaired"""
+        Cartsku.objects.filter(cart=self.cart).update(quantity=5)
+
+        with self.assertRaisesMessage(CommandError, f'1 cart total(s) out of sync: {self.cart.id}'):
+            call_command('sync_cart_totals', '--check', stdout=StringIO())
+
+        out = StringIO()
+        call_command('sync_cart_totals', stdout=out)
+
+        self.assertIn('Repaired 1', out.getvalue())
+        self.assertEqual(Cart.objects.get(id=self.cart.id).item_subtotal, Decimal('17.50'))
+        call_command('sync_cart_totals', '--check', stdout=StringIO())
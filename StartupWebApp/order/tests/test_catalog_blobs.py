@@ -0,0 +1,126 @@
+# Unit tests for the pre-encoded catalog payload store
+
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.http import JsonResponse
+from django.utils import timezone
+
+from order.models import Catalogpayload, Product, Productimage, Skuinventory, Skuprice
+from order.tests.catalog_fixtures import create_catalog_product
+from order.utilities import catalog_blobs, catalog_cache, catalog_utils
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+
+
+class CatalogBlobsTest(PostgreSQLTestCase):
+    """Test the stored catalog JSON payloads and their incremental maintenance"""
+
+    def setUp(self):
+        self.first_product = create_catalog_product('PROD001', sku_count=3)
+        self.second_product = create_catalog_product('PROD002', sku_count=2)
+
+    def clear_shared_cache(self):
+        caches[catalog_cache.CATALOG_CACHE_ALIAS].clear()
+
+    def stored_keys(self):
+        return set(Catalogpayload.objects.exclude(body=None).values_list('key', flat=True))
+
+    def test_products_response_is_byte_identical_to_json_response(self):
+        """Test that the products endpoint returns the bytes JsonResponse would produce"""
+        response = self.client.get('/order/products')
+
+        expected_response = JsonResponse(
+            {'products_data': catalog_utils.get_products_data(), 'order-api-version': '0.0.1'},
+            safe=False,
+        )
+        self.assertEqual(response.content, expected_response.content)
+        self.assertEqual(response['Content-Type'], expected_response['Content-Type'])
+
+    def test_product_response_is_byte_identical_to_json_response(self):
+        """Test that the product endpoint returns the bytes JsonResponse would produce"""
+        response = self.client.get('/order/product/PROD001')
+
+        expected_response = JsonResponse(
+            {
+                'product': 'success',
+                'product_identifier': 'PROD001',
+                'product_data': catalog_utils.get_product_data('PROD001'),
+                'order-api-version': '0.0.1',
+            },
+            safe=False,
+        )
+        self.assertEqual(response.content, expected_response.content)
+        self.assertEqual(response['Content-Type'], expected_response['Content-Type'])
+
+    def test_stored_payload_is_served_without_rebuilding(self):
+        """Test that a stored payload is read with a single query once the shared cache is cold"""
+        self.client.get('/order/product/PROD001')
+        self.clear_shared_cache()
+
+        with self.assertNumQueries(1):
+            body = catalog_blobs.get_product_json('PROD001')
+
+        self.assertEqual(body, catalog_blobs.encode_json(catalog_utils.get_product_data('PROD001')))
+
+    def test_price_change_invalidates_only_affected_product(self):
+        """Test that a Skuprice insert drops the listing and that product's payload only"""
+        self.client.get('/order/products')
+        self.client.get('/order/product/PROD001')
+        self.client.get('/order/product/PROD002')
+        self.assertEqual(self.stored_keys(), {
+            'products',
+            catalog_blobs.product_key(self.first_product.id),
+            catalog_blobs.product_key(self.second_product.id),
+        })
+
+        sku = self.first_product.productsku_set.order_by('sku__id').first().sku
+        Skuprice.objects.create(sku=sku, price=42.00, created_date_time=timezone.now())
+
+        self.assertEqual(self.stored_keys(), {catalog_blobs.product_key(self.second_product.id)})
+        response = self.client.get('/order/product/PROD001')
+        self.assertIn(b'"price": "42.00"', response.content)
+
+    def test_inventory_change_invalidates_products_using_it(self):
+        """Test that editing a Skuinventory drops the payloads of products whose SKUs use it"""
+        self.client.get('/order/product/PROD001')
+        self.client.get('/order/product/PROD002')
+
+        skuinventory = Skuinventory.objects.get(identifier='PROD001-stock')
+        skuinventory.title = 'Back Ordered'
+        skuinventory.save()
+
+        self.assertEqual(self.stored_keys(), {catalog_blobs.product_key(self.second_product.id)})
+
+    def test_product_delete_removes_payload(self):
+        """Test that deleting a product deletes its stored payload"""
+        self.client.get('/order/product/PROD002')
+
+        Product.objects.filter(identifier='PROD002').delete()
+
+        self.assertFalse(Catalogpayload.objects.filter(key=catalog_blobs.product_key(self.second_product.id)).exists())
+
+    def test_invalidation_during_build_discards_stale_payload(self):
+        """Test that a payload built across a concurrent invalidation is not stored"""
+        def build_then_invalidate():
+            product_data = catalog_utils.get_product_data('PROD001')
+            # Another worker commits a catalog change while this build is in flight
+            Productimage.objects.create(product=self.first_product, image_url='https://example.com/new.jpg')
+            return product_data
+
+        catalog_blobs._build_and_store(
+            catalog_blobs.product_key(self.first_product.id), self.first_product.id, build_then_invalidate)
+
+        self.assertNotIn(catalog_blobs.product_key(self.first_product.id), self.stored_keys())
+        self.assertIn(b'https://example.com/new.jpg', catalog_blobs.get_product_json('PROD001'))
+
+    def test_rebuild_command_writes_every_payload(self):
+        """Test that rebuild_catalog_payloads stores the listing and every product"""
+        Product.objects.create(title='No SKUs', title_url='NoSkus', identifier='PROD003')
+
+        out = StringIO()
+        call_command('rebuild_catalog_payloads', stdout=out)
+
+        self.assertIn('3 product payload(s)', out.getvalue())
+        self.assertEqual(Catalogpayload.objects.exclude(body=None).count(), 4)
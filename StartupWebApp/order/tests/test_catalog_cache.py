@@ -0,0 +1,196 @@
+# Unit tests for the versioned catalog cache
+
+import json
+
+from django.contrib.admin.models import LogEntry, CHANGE
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+
+from order.models import (
+    Product, Productimage, Productsku, Productvideo,
+    Sku, Skuimage, Skuinventory, Skuprice, Skutype
+)
+from order.utilities import catalog_cache
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+
+
+class CatalogCacheTest(PostgreSQLTestCase):
+    """Test catalog payload caching and signal-driven invalidation"""
+
+    def setUp(self):
+        self.skutype = Skutype.objects.create(title='product')
+        self.skuinventory = Skuinventory.objects.create(
+            title='In Stock',
+            identifier='in-stock',
+            description='In Stock items'
+        )
+        self.product = Product.objects.create(
+            title='Paper Clips',
+            title_url='PaperClips',
+            identifier='PROD001',
+            headline='High quality paper clips'
+        )
+        self.sku = Sku.objects.create(
+            color='Silver',
+            size='Medium',
+            sku_type=self.skutype,
+            sku_inventory=self.skuinventory
+        )
+        Skuprice.objects.create(sku=self.sku, price=3.50, created_date_time=timezone.now())
+        Productsku.objects.create(product=self.product, sku=self.sku)
+        Productimage.objects.create(
+            product=self.product,
+            image_url='https://example.com/paperclip.jpg',
+            main_image=True
+        )
+
+    def get_json(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content.decode('utf8'))
+
+    def test_repeat_products_reads_do_not_query_database(self):
+        """Test that a cached products listing is served without database queries"""
+        self.get_json('/order/products')
+
+        with self.assertNumQueries(0):
+            data = self.get_json('/order/products')
+
+        self.assertEqual(data['products_data']['PROD001']['price_low'], '3.50')
+
+    def test_repeat_product_reads_do_not_query_database(self):
+        """Test that a cached product detail is served without database queries"""
+        self.get_json('/order/product/PROD001')
+
+        with self.assertNumQueries(0):
+            data = self.get_json('/order/product/PROD001')
+
+        self.assertEqual(data['product'], 'success')
+        self.assertEqual(data['product_data']['title'], 'Paper Clips')
+
+    def test_product_not_found_is_not_cached(self):
+        """Test that a missing product is reported and a later insert is visible"""
+        data = self.get_json('/order/product/PROD002')
+        self.assertEqual(data['product'], 'error')
+
+        Product.objects.create(title='Notebooks', title_url='Notebooks', identifier='PROD002')
+
+        data = self.get_json('/order/product/PROD002')
+        self.assertEqual(data['product'], 'success')
+
+    def test_new_price_bumps_version_and_refreshes_payloads(self):
+        """Test that inserting a Skuprice invalidates cached listing and detail payloads"""
+        self.get_json('/order/products')
+        self.get_json('/order/product/PROD001')
+        version_before = catalog_cache.get_catalog_version()
+
+        Skuprice.objects.create(sku=self.sku, price=4.25, created_date_time=timezone.now())
+
+        self.assertNotEqual(catalog_cache.get_catalog_version(), version_before)
+        data = self.get_json('/order/products')
+        self.assertEqual(data['products_data']['PROD001']['price_low'], '4.25')
+        data = self.get_json('/order/product/PROD001')
+        self.assertEqual(data['product_data']['skus'][str(self.sku.id)]['price'], '4.25')
+
+    def test_each_catalog_model_write_bumps_version(self):
+        """Test that saves and deletes on every catalog model change the version"""
+        writes = [
+            lambda: Product.objects.filter(id=self.product.id).first().save(),
+            lambda: Productvideo.objects.create(
+                product=self.product,
+                video_url='https://example.com/clip.mp4',
+                video_thumbnail_url='https://example.com/clip.jpg'
+            ),
+            lambda: Skuimage.objects.create(sku=self.sku, image_url='https://example.com/sku.jpg'),
+            lambda: Productimage.objects.filter(product=self.product).first().delete(),
+            lambda: Skuinventory.objects.filter(id=self.skuinventory.id).first().save(),
+            lambda: Sku.objects.filter(id=self.sku.id).first().save(),
+            lambda: Productsku.objects.filter(product=self.product).first().delete(),
+        ]
+        for write in writes:
+            version_before = catalog_cache.get_catalog_version()
+            write()
+            self.assertNotEqual(catalog_cache.get_catalog_version(), version_before)
+
+    def test_admin_log_entry_bumps_version(self):
+        """Test that an admin change logged against a catalog model changes the version"""
+        user = User.objects.create_user(username='admin', password='adminpass123', is_staff=True)
+        version_before = catalog_cache.get_catalog_version()
+
+        LogEntry.objects.create(
+            user=user,
+            content_type=ContentType.objects.get_for_model(Product),
+            object_id=str(self.product.id),
+            object_repr=str(self.product),
+            action_flag=CHANGE,
+        )
+
+        self.assertNotEqual(catalog_cache.get_catalog_version(), version_before)
+
+    def test_version_is_read_from_shared_cache(self):
+        """Test that a version bump made by another worker is picked up"""
+        self.get_json('/order/products')
+
+        # Simulate another worker bumping the version and caching a different payload
+        shared_cache = caches[catalog_cache.CATALOG_CACHE_ALIAS]
+        shared_cache.set(catalog_cache.CATALOG_VERSION_KEY, 42)
+        shared_cache.set('catalog:42:products', b'{"PROD999": {"identifier": "PROD999"}}')
+
+        data = self.get_json('/order/products')
+        self.assertEqual(list(data['products_data'].keys()), ['PROD999'])
+
+    def test_bump_recovers_when_version_key_is_missing(self):
+        """Test that bumping works after the version key was evicted"""
+        caches[catalog_cache.CATALOG_CACHE_ALIAS].delete(catalog_cache.CATALOG_VERSION_KEY)
+
+        version = catalog_cache.bump_catalog_version()
+
+        self.assertEqual(catalog_cache.get_catalog_version(), version)
+
+
+@override_settings(
+    CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_shared_cache',
+            'OPTIONS': {'MAX_ENTRIES': 50000, 'CULL_FREQUENCY': 10},
+        },
+    },
+    LOCAL_REGISTRY_CHECK_INTERVAL=60,
+)
+class CatalogCacheQueryCostTest(PostgreSQLTestCase):
+    """Pin the queries a warm catalog request costs with the production database-backed shared cache"""
+
+    def setUp(self):
+        # The migration creating the table runs while the test settings have no DatabaseCache
+        call_command('createcachetable', verbosity=0)
+        product = Product.objects.create(title='Paper Clips', title_url='PaperClips', identifier='PROD001')
+        sku = Sku.objects.create(
+            color='Silver',
+            size='Medium',
+            sku_type=Skutype.objects.create(title='product'),
+            sku_inventory=Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        )
+        Skuprice.objects.create(sku=sku, price=3.50, created_date_time=timezone.now())
+        Productsku.objects.create(product=product, sku=sku)
+        # Start from this test's shared version rather than a copy left by an earlier test
+        catalog_cache.bump_catalog_version()
+
+    def test_warm_catalog_reads_cost_one_query_per_cache_read(self):
+        """Test that a warm 200 only reads its payload, and a 304 does not query at all"""
+        for url in ['/order/products', '/order/product/PROD001']:
+            etag = self.client.get(url)['ETag']
+
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
@@ -0,0 +1,97 @@
+# Unit tests for the export_catalog_snapshot management command
+
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from order.models import Product, Productsku, Sku, Skuinventory, Skuprice, Skutype
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+
+
+class ExportCatalogSnapshotCommandTest(PostgreSQLTestCase):
+    """Test static catalog snapshot export and incremental regeneration"""
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+        skutype = Skutype.objects.create(title='product')
+        skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        self.products = []
+        for number in range(1, 4):
+            product = Product.objects.create(
+                title=f'Product {number}', title_url=f'Product{number}', identifier=f'PROD00{number}')
+            sku = Sku.objects.create(color='Silver', size='Medium', sku_type=skutype, sku_inventory=skuinventory)
+            Skuprice.objects.create(sku=sku, price=number, created_date_time=timezone.now())
+            Productsku.objects.create(product=product, sku=sku)
+            self.products.append(product)
+
+    def export(self, *args):
+        out = StringIO()
+        call_command('export_catalog_snapshot', '--output-dir', self.output_dir, *args, stdout=out)
+        with open(os.path.join(self.output_dir, 'manifest.json'), encoding='utf-8') as manifest_file:
+            return json.load(manifest_file), out.getvalue()
+
+    def read(self, path):
+        with open(os.path.join(self.output_dir, path), 'rb') as snapshot_file:
+            return snapshot_file.read()
+
+    def test_files_match_endpoint_responses(self):
+        """Test that snapshot files and their gzip variants are byte-identical to the endpoint responses"""
+        manifest, output = self.export()
+
+        self.assertEqual(manifest['snapshot_version'], 1)
+        self.assertEqual(sorted(manifest['product']), ['PROD001', 'PROD002', 'PROD003'])
+        self.assertIn('3 product(s), 4 payload file(s) written', output)
+
+        products_path = manifest['products']['path']
+        self.assertRegex(products_path, r'^products\.[0-9a-f]{16}\.json$')
+        self.assertEqual(self.read(products_path), self.client.get('/order/products').content)
+        self.assertEqual(gzip.decompress(self.read(products_path + '.gz')), self.read(products_path))
+
+        product_path = manifest['product']['PROD002']['path']
+        self.assertTrue(product_path.startswith('product/PROD002.'))
+        self.assertEqual(self.read(product_path), self.client.get('/order/product/PROD002').content)
+
+    def test_incremental_export_only_rewrites_changed_products(self):
+        """Test that a second run rewrites just the changed product and the listing"""
+        first_manifest, output = self.export()
+
+        second_manifest, output = self.export()
+        self.assertEqual(second_manifest['snapshot_version'], 2)
+        self.assertIn('0 payload file(s) written', output)
+        self.assertEqual(second_manifest['product'], first_manifest['product'])
+
+        self.products[1].title = 'Renamed Product'
+        self.products[1].save()
+        third_manifest, output = self.export()
+
+        self.assertIn('2 payload file(s) written', output)
+        self.assertNotEqual(third_manifest['products'], first_manifest['products'])
+        self.assertNotEqual(third_manifest['product']['PROD002'], first_manifest['product']['PROD002'])
+        self.assertEqual(third_manifest['product']['PROD001'], first_manifest['product']['PROD001'])
+        self.assertIn(b'Renamed Product', self.read(third_manifest['product']['PROD002']['path']))
+
+    def test_full_export_and_prune(self):
+        """Test that --full re-exports everything and --prune keeps only the last two snapshots' files"""
+        first_manifest, output = self.export()
+        self.products[0].title = 'Renamed Once'
+        self.products[0].save()
+        self.export()
+        self.products[0].title = 'Renamed Twice'
+        self.products[0].save()
+        self.products[2].delete()
+
+        manifest, output = self.export('--full', '--prune')
+
+        self.assertIn('2 product(s), 3 payload file(s) written', output)
+        self.assertEqual(sorted(manifest['product']), ['PROD001', 'PROD002'])
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, first_manifest['product']['PROD001']['path'])))
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, first_manifest['products']['path'])))
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, manifest['product']['PROD002']['path'])))
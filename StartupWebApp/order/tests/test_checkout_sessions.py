@@ -0,0 +1,65 @@
+# Unit tests for checkout session reuse against a local fake Stripe server
+
+from unittest.mock import patch
+
+import stripe
+from django.test import override_settings
+
+from order.utilities import checkout_sessions, stripe_gateway
+from order.utilities.fake_stripe_server import FakeStripeServer
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+
+
+class CheckoutSessionReuseTest(PostgreSQLTestCase):
+    """Test that one cart hash gets one Stripe checkout session per reuse window"""
+
+    def setUp(self):
+        # Cleanups run last-in first-out: settings are restored before the gateway is reconfigured
+        self.addCleanup(stripe_gateway.configure)
+        settings_override = override_settings(STRIPE_SERVER_SECRET_KEY='sk_test_fake', STRIPE_LOG_LEVEL=None)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        stripe_gateway.configure()
+
+        self.server = FakeStripeServer().start()
+        self.addCleanup(self.server.stop)
+        api_base_patch = patch.object(stripe, 'api_base', self.server.url)
+        api_base_patch.start()
+        self.addCleanup(api_base_patch.stop)
+
+        self.session_params = {
+            'mode': 'payment',
+            'success_url': 'https://example.com/checkout/success',
+            'metadata': {'cart_id': '7'},
+        }
+
+    def test_stripe_returns_same_session_when_local_store_misses(self):
+        """Test that the idempotency key makes Stripe return the first session to a request that missed the cache"""
+        first_session = checkout_sessions.get_or_create_checkout_session(self.session_params)
+        checkout_sessions.get_session_cache().clear()
+        second_session = checkout_sessions.get_or_create_checkout_session(dict(self.session_params))
+
+        self.assertEqual(first_session, second_session)
+        self.assertEqual(self.server.request_count, 2)
+        self.assertEqual(len(self.server.sessions), 1)
+
+    def test_new_window_creates_new_session(self):
+        """Test that a session is not reused past the end of its window"""
+        with patch('order.utilities.checkout_sessions.time.time', return_value=1_800_000_000):
+            first_session_id, _ = checkout_sessions.get_or_create_checkout_session(self.session_params)
+        with patch('order.utilities.checkout_sessions.time.time', return_value=1_800_000_000 + 1800):
+            second_session_id, _ = checkout_sessions.get_or_create_checkout_session(self.session_params)
+
+        self.assertNotEqual(first_session_id, second_session_id)
+        self.assertEqual(self.server.sessions[first_session_id]['expires_at'], 1_800_000_000 + 3900)
+
+    def test_session_created_at_window_end_outlives_stripe_minimum(self):
+        """Test that a session created in the last second of a window expires more than 30 minutes later"""
+        window_last_second = 1_800_000_000 + checkout_sessions.REUSE_WINDOW_SECONDS - 1
+        with patch('order.utilities.checkout_sessions.time.time', return_value=window_last_second):
+            session_id, _ = checkout_sessions.get_or_create_checkout_session(self.session_params)
+
+        self.assertGreaterEqual(
+            self.server.sessions[session_id]['expires_at'] - window_last_second,
+            checkout_sessions.MIN_PAYMENT_SECONDS + checkout_sessions.EXPIRY_MARGIN_SECONDS)
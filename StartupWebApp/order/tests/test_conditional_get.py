@@ -0,0 +1,218 @@
+# Unit tests for conditional GET (ETag / Last-Modified / 304) on catalog and order endpoints
+
+import datetime
+import json
+
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.http import http_date
+
+from order.models import (
+    Product, Productimage, Productsku,
+    Sku, Skuprice, Skutype, Skuinventory,
+    Order, Orderpayment, Ordershippingaddress, Orderbillingaddress,
+    Ordersku, Status, Orderstatus, Shippingmethod, Ordershippingmethod
+)
+from order.utilities import catalog_cache
+from user.models import Prospect
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+from StartupWebApp.utilities import unittest_utilities
+
+
+class CatalogConditionalGetTest(PostgreSQLTestCase):
+    """Test ETag / Last-Modified handling on the products and product endpoints"""
+
+    def setUp(self):
+        skutype = Skutype.objects.create(title='product')
+        skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        self.product = Product.objects.create(
+            title='Paper Clips',
+            title_url='PaperClips',
+            identifier='PROD001'
+        )
+        self.sku = Sku.objects.create(
+            color='Silver',
+            size='Medium',
+            sku_type=skutype,
+            sku_inventory=skuinventory
+        )
+        self.price_date_time = timezone.now() - datetime.timedelta(days=1)
+        Skuprice.objects.create(sku=self.sku, price=3.50, created_date_time=self.price_date_time)
+        Productsku.objects.create(product=self.product, sku=self.sku)
+        Productimage.objects.create(
+            product=self.product,
+            image_url='https://example.com/paperclip.jpg',
+            main_image=True
+        )
+        # Date the last catalog change a day back, so a change made by a test lands in a later second
+        self.modified_time = (timezone.now() - datetime.timedelta(days=1)).timestamp()
+        caches[catalog_cache.CATALOG_CACHE_ALIAS].set(catalog_cache.CATALOG_MODIFIED_KEY, self.modified_time)
+
+    def test_catalog_responses_carry_validators_and_cache_headers(self):
+        """Test that products and product responses include ETag, Last-Modified and Cache-Control"""
+        for url in ['/order/products', '/order/product/PROD001']:
+            response = self.client.get(url)
+            unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+
+            self.assertIn('ETag', response)
+            self.assertEqual(response['Last-Modified'], http_date(self.modified_time))
+            self.assertIn('public', response['Cache-Control'])
+            self.assertIn('must-revalidate', response['Cache-Control'])
+            self.assertIn('s-maxage=', response['Cache-Control'])
+            self.assertIn('Origin', response['Vary'])
+
+    def test_matching_etag_returns_304_without_queries(self):
+        """Test that a warm If-None-Match revalidation is answered from cache with no body"""
+        for url in ['/order/products', '/order/product/PROD001']:
+            etag = self.client.get(url)['ETag']
+
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.content, b'')
+            self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since_returns_304(self):
+        """Test that If-Modified-Since at or after the newest price returns 304"""
+        last_modified = self.client.get('/order/products')['Last-Modified']
+
+        response = self.client.get('/order/products', HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_new_price_changes_validators(self):
+        """Test that inserting a Skuprice produces a new ETag and Last-Modified"""
+        urls = ['/order/products', '/order/product/PROD001']
+        first_responses = {url: self.client.get(url) for url in urls}
+
+        Skuprice.objects.create(sku=self.sku, price=4.25, created_date_time=timezone.now())
+
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first_responses[url]['ETag'])
+            unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+            self.assertNotEqual(response['ETag'], first_responses[url]['ETag'])
+            self.assertNotEqual(response['Last-Modified'], first_responses[url]['Last-Modified'])
+
+    def test_non_price_change_advances_last_modified(self):
+        """Test that a title edit moves Last-Modified, so an old If-Modified-Since gets the new content"""
+        urls = ['/order/products', '/order/product/PROD001']
+        last_modified = {url: self.client.get(url)['Last-Modified'] for url in urls}
+
+        self.product.title = 'Binder Clips'
+        self.product.save()
+
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified[url])
+            unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+            self.assertIn('Binder Clips', response.content.decode('utf8'))
+            self.assertNotEqual(response['Last-Modified'], last_modified[url])
+
+    def test_product_etag_differs_per_product(self):
+        """Test that a product ETag cannot be replayed against a different product"""
+        Product.objects.create(title='Notebooks', title_url='Notebooks', identifier='PROD002')
+        etag = self.client.get('/order/product/PROD001')['ETag']
+
+        response = self.client.get('/order/product/PROD002', HTTP_IF_NONE_MATCH=etag)
+
+        unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+        data = json.loads(response.content.decode('utf8'))
+        self.assertEqual(data['product_data']['identifier'], 'PROD002')
+
+
+class OrderDetailConditionalGetTest(PostgreSQLTestCase):
+    """Test ETag / Last-Modified handling on the order detail endpoint"""
+
+    def setUp(self):
+        prospect = Prospect.objects.create(
+            email='prospect@test.com',
+            pr_cd='PROSPECT456',
+            created_date_time=timezone.now()
+        )
+        self.status = Status.objects.create(identifier='pending', title='Pending', description='Order is pending')
+        self.shipped_status = Status.objects.create(identifier='shipped', title='Shipped', description='Shipped')
+        shippingmethod = Shippingmethod.objects.create(
+            identifier='standard',
+            carrier='USPS',
+            shipping_cost=5.00,
+            tracking_code_base_url='https://tools.usps.com/go/TrackConfirmAction'
+        )
+        skutype = Skutype.objects.create(title='product')
+        skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        product = Product.objects.create(title='Test Product', title_url='TestProduct', identifier='PROD001')
+        sku = Sku.objects.create(color='Blue', size='Medium', sku_type=skutype, sku_inventory=skuinventory)
+        Productsku.objects.create(product=product, sku=sku)
+
+        address_fields = {
+            'name': 'Prospect User',
+            'address_line1': '456 Oak Ave',
+            'city': 'Other Town',
+            'state': 'NY',
+            'zip': '54321',
+            'country': 'United States',
+            'country_code': 'US',
+        }
+        self.order = Order.objects.create(
+            identifier='ORDER002',
+            prospect=prospect,
+            payment=Orderpayment.objects.create(
+                email=prospect.email,
+                payment_type='card',
+                card_brand='Mastercard',
+                card_last4='5555'
+            ),
+            shipping_address=Ordershippingaddress.objects.create(**address_fields),
+            billing_address=Orderbillingaddress.objects.create(**address_fields),
+            sales_tax_amt=0,
+            item_subtotal=20.00,
+            shipping_amt=5.00,
+            order_total=25.00,
+            agreed_with_terms_of_sale=True,
+            order_date_time=timezone.now()
+        )
+        Ordersku.objects.create(order=self.order, sku=sku, quantity=2, price_each=10.00)
+        Ordershippingmethod.objects.create(order=self.order, shippingmethod=shippingmethod)
+        Orderstatus.objects.create(
+            order=self.order,
+            status=self.status,
+            created_date_time=timezone.now() - datetime.timedelta(hours=1)
+        )
+
+    def test_order_detail_carries_private_validators(self):
+        """Test that order detail includes ETag, Last-Modified and private Cache-Control"""
+        response = self.client.get('/order/ORDER002')
+
+        unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_matching_etag_returns_304(self):
+        """Test that If-None-Match with the current ETag returns 304 without building the order payload"""
+        etag = self.client.get('/order/ORDER002')['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/order/ORDER002', HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_new_order_status_changes_etag(self):
+        """Test that recording a new Orderstatus invalidates the previous ETag"""
+        etag = self.client.get('/order/ORDER002')['ETag']
+
+        Orderstatus.objects.create(order=self.order, status=self.shipped_status, created_date_time=timezone.now())
+
+        response = self.client.get('/order/ORDER002', HTTP_IF_NONE_MATCH=etag)
+        unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unknown_order_has_no_validators(self):
+        """Test that an unknown order identifier gets a normal error response with no ETag"""
+        response = self.client.get('/order/NOSUCHORDER')
+
+        unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+        self.assertNotIn('ETag', response)
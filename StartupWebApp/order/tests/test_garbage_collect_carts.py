@@ -0,0 +1,93 @@
+# Unit tests for Cart.last_modified_date_time and the garbage_collect_carts management command
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.utils import timezone
+
+from order.models import (
+    Cart, Cartpayment, Cartshippingaddress, Cartshippingmethod, Cartsku, Shippingmethod, Sku, Skuinventory,
+    Skuprice, Skutype
+)
+from user.models import Member, Termsofuse
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+
+
+class GarbageCollectCartsCommandTest(PostgreSQLTestCase):
+    """Test that abandoned anonymous carts are deleted in batches and everything else is kept"""
+
+    def setUp(self):
+        skutype = Skutype.objects.create(title='product')
+        skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        self.sku = Sku.objects.create(color='Silver', size='Medium', sku_type=skutype, sku_inventory=skuinventory)
+        Skuprice.objects.create(sku=self.sku, price=Decimal('3.50'), created_date_time=timezone.now())
+        self.shippingmethod = Shippingmethod.objects.create(
+            identifier='USPSRetailGround', carrier='USPS', shipping_cost=Decimal('4.75'), active=True)
+
+    def create_cart(self, days_old, **fields):
+        cart = Cart.objects.create(**fields)
+        Cartsku.objects.create(cart=cart, sku=self.sku, quantity=1)
+        Cartshippingmethod.objects.create(cart=cart, shippingmethod=self.shippingmethod)
+        # auto_now cannot be overridden through save()
+        Cart.objects.filter(id=cart.id).update(last_modified_date_time=timezone.now() - timedelta(days=days_old))
+        return cart
+
+    def collect(self, *args):
+        out = StringIO()
+        call_command('garbage_collect_carts', *args, stdout=out)
+        return out.getvalue()
+
+    def test_expired_anonymous_carts_are_deleted_with_their_rows(self):
+        """Test that old anonymous carts and their lines, address and payment go; recent and member carts stay"""
+        Group.objects.create(name='Members')
+        Termsofuse.objects.create(version='1', version_note='Test', publication_date_time=timezone.now())
+        user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass123')
+        member_cart = self.create_cart(90, member=Member.objects.create(user=user, mb_cd='MEMBER123'))
+        recent_cart = self.create_cart(5, anonymous_cart_id='recent')
+        self.create_cart(
+            45,
+            anonymous_cart_id='abandoned',
+            shipping_address=Cartshippingaddress.objects.create(name='Test Buyer'),
+            payment=Cartpayment.objects.create(email='buyer@test.com'),
+        )
+
+        self.assertIn('1 anonymous cart(s)', self.collect('--dry-run'))
+        self.assertEqual(Cart.objects.count(), 3)
+
+        output = self.collect()
+
+        self.assertIn('Deleted 1 cart(s), 1 cart line(s), 1 shipping method selection(s), '
+                      '1 shipping address(es) and 1 payment(s) in 1 batch(es)', output)
+        self.assertEqual(set(Cart.objects.values_list('id', flat=True)), {member_cart.id, recent_cart.id})
+        self.assertEqual(set(Cartsku.objects.values_list('cart_id', flat=True)), {member_cart.id, recent_cart.id})
+        self.assertEqual(Cartshippingmethod.objects.count(), 2)
+        self.assertFalse(Cartshippingaddress.objects.exists())
+        self.assertFalse(Cartpayment.objects.exists())
+
+    def test_runs_are_bounded_and_resumable(self):
+        """Test that --max-batches stops early and the next run deletes the rest, oldest first"""
+        carts = [self.create_cart(31 + number, anonymous_cart_id=f'cart{number}') for number in range(5)]
+
+        output = self.collect('--batch-size', '2', '--max-batches', '2')
+
+        self.assertIn('Batch 2: 2 cart(s), 2 cart line(s) deleted', output)
+        self.assertEqual(list(Cart.objects.values_list('id', flat=True)), [carts[0].id])
+        self.assertIn('Deleted 1 cart(s)', self.collect('--batch-size', '2'))
+        self.assertFalse(Cart.objects.exists())
+
+    def test_last_modified_follows_visitor_changes_only(self):
+        """Test that cart line changes touch the cart and price or shipping cost changes do not"""
+        cart = self.create_cart(40, anonymous_cart_id='cart')
+        Skuprice.objects.create(sku=self.sku, price=Decimal('4.00'), created_date_time=timezone.now())
+        self.shippingmethod.shipping_cost = Decimal('5.00')
+        self.shippingmethod.save()
+        self.assertLess(Cart.objects.get(id=cart.id).last_modified_date_time, timezone.now() - timedelta(days=30))
+
+        Cartsku.objects.filter(cart=cart).first().delete()
+
+        self.assertGreater(Cart.objects.get(id=cart.id).last_modified_date_time, timezone.now() - timedelta(days=1))
+        self.assertIn('Deleted 0 cart(s)', self.collect())
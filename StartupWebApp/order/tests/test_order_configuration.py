@@ -0,0 +1,81 @@
+# Unit tests for the in-process Orderconfiguration registry
+
+from unittest.mock import patch
+
+from django.contrib.admin.models import CHANGE, LogEntry
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from order.models import Orderconfiguration
+from order.utilities import local_registry, order_configuration
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+
+
+@override_settings(LOCAL_REGISTRY_CHECK_INTERVAL=60)
+class OrderConfigurationRegistryTest(PostgreSQLTestCase):
+    """Test that configuration values are loaded once, typed, and reloaded after changes"""
+
+    def setUp(self):
+        order_configuration.invalidate()
+        Orderconfiguration.objects.create(key='usernames_allowed_to_checkout', string_value='alice,bob')
+        Orderconfiguration.objects.create(key='an_ct_values_allowed_to_checkout', string_value=None)
+        Orderconfiguration.objects.create(key='default_shipping_method', string_value='USPSRetailGround')
+
+    def test_values_are_typed_and_loaded_with_one_query(self):
+        """Test that allowlists are frozensets and repeated lookups run no further queries"""
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(
+                order_configuration.get_value('usernames_allowed_to_checkout'), frozenset({'alice', 'bob'}))
+            self.assertEqual(order_configuration.get_value('an_ct_values_allowed_to_checkout'), frozenset())
+            self.assertEqual(order_configuration.get_value('default_shipping_method'), 'USPSRetailGround')
+        self.assertEqual(len(context.captured_queries), 1)
+
+        with self.assertRaises(Orderconfiguration.DoesNotExist):
+            order_configuration.get_value('initial_order_status')
+
+    def test_save_and_delete_reload_values(self):
+        """Test that saving or deleting a row is seen by the next lookup"""
+        self.assertEqual(order_configuration.get_value('default_shipping_method'), 'USPSRetailGround')
+
+        configuration = Orderconfiguration.objects.get(key='default_shipping_method')
+        configuration.string_value = 'USPSPriorityMail2Day'
+        configuration.save()
+        self.assertEqual(order_configuration.get_value('default_shipping_method'), 'USPSPriorityMail2Day')
+
+        configuration.delete()
+        with self.assertRaises(Orderconfiguration.DoesNotExist):
+            order_configuration.get_value('default_shipping_method')
+
+    def test_other_workers_reload_after_check_interval(self):
+        """Test that a version bump by another process is picked up at the next version check"""
+        with patch('order.utilities.local_registry.time.monotonic', return_value=1000.0):
+            self.assertEqual(order_configuration.get_value('default_shipping_method'), 'USPSRetailGround')
+        # Another worker's write: the rows change and the shared version moves, but this
+        # process's copy is not dropped
+        Orderconfiguration.objects.filter(key='default_shipping_method').update(string_value='FedExGround')
+        local_registry.get_registry_cache().incr(order_configuration.CONFIGURATION_VERSION_KEY)
+
+        with patch('order.utilities.local_registry.time.monotonic', return_value=1059.0):
+            self.assertEqual(order_configuration.get_value('default_shipping_method'), 'USPSRetailGround')
+        with patch('order.utilities.local_registry.time.monotonic', return_value=1061.0):
+            self.assertEqual(order_configuration.get_value('default_shipping_method'), 'FedExGround')
+
+    def test_admin_update_reloads_values(self):
+        """Test that an admin log entry for a configuration change invalidates values written without signals"""
+        self.assertEqual(order_configuration.get_value('default_shipping_method'), 'USPSRetailGround')
+        Orderconfiguration.objects.filter(key='default_shipping_method').update(string_value='FedExGround')
+        user = User.objects.create_user(username='admin', password='adminpass123')
+
+        LogEntry.objects.create(
+            user=user,
+            content_type=ContentType.objects.get_for_model(Orderconfiguration),
+            object_id=str(Orderconfiguration.objects.get(key='default_shipping_method').id),
+            object_repr='default_shipping_method',
+            action_flag=CHANGE,
+        )
+
+        self.assertEqual(order_configuration.get_value('default_shipping_method'), 'FedExGround')
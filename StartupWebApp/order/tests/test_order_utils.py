@@ -1,6 +1,16 @@
 # Unit tests for order utility functions
 
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
 from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+from order.models import (
+    Cart, Cartshippingmethod, Cartsku, Product, Productimage, Productsku,
+    Shippingmethod, Sku, Skuimage, Skuinventory, Skuprice, Skutype
+)
 from order.utilities import order_utils
 
 
@@ -120,3 +130,175 @@ class LookUpAnonymousCartTest(PostgreSQLTestCase):
         result = order_utils.look_up_anonymous_cart(request)
 
         self.assertIsNone(result)
+
+
+class LookUpCartMemoizationTest(PostgreSQLTestCase):
+    """Test that cart lookups are a single query, memoized on the request"""
+
+    def anonymous_request(self, anonymous_cart_id):
+        from django.test import RequestFactory
+
+        request = RequestFactory().get('/')
+        request.user = type('AnonymousUser', (), {'is_authenticated': False})()
+        request.cookie_reads = 0
+
+        def get_signed_cookie(key, default=None, salt=None):
+            request.cookie_reads += 1
+            return anonymous_cart_id
+        request.get_signed_cookie = get_signed_cookie
+        return request
+
+    def test_repeated_lookups_reuse_one_query(self):
+        """Test that the first lookup is one query and later lookups in the request are free"""
+        cart = Cart.objects.create(anonymous_cart_id='anon_cart_123')
+        request = self.anonymous_request('anon_cart_123')
+
+        with CaptureQueriesContext(connection) as first_context:
+            first = order_utils.look_up_cart(request)
+            # The joined shipping address and payment need no further queries
+            self.assertIsNone(first.shipping_address)
+            self.assertIsNone(first.payment)
+        with CaptureQueriesContext(connection) as repeat_context:
+            self.assertIs(order_utils.look_up_cart(request), first)
+            self.assertIs(order_utils.look_up_anonymous_cart(request), first)
+
+        self.assertEqual(first.id, cart.id)
+        self.assertEqual(len(first_context.captured_queries), 1)
+        self.assertEqual(len(repeat_context.captured_queries), 0)
+        self.assertEqual(request.cookie_reads, 1)
+
+    def test_missing_cart_is_memoized_until_created(self):
+        """Test that a missing cart is remembered and replaced by the cart create_cart makes"""
+        request = self.anonymous_request('anon_cart_456')
+        self.assertIsNone(order_utils.look_up_cart(request))
+        with CaptureQueriesContext(connection) as context:
+            self.assertIsNone(order_utils.look_up_cart(request))
+        self.assertEqual(len(context.captured_queries), 0)
+
+        cart = order_utils.create_cart(request)
+        cart.anonymous_cart_id = 'anon_cart_456'
+        cart.save()
+        self.assertIs(order_utils.look_up_cart(request), cart)
+
+    def test_deleted_cart_is_looked_up_again(self):
+        """Test that a memoized cart deleted during the request is not returned"""
+        Cart.objects.create(anonymous_cart_id='anon_cart_789')
+        request = self.anonymous_request('anon_cart_789')
+
+        order_utils.look_up_cart(request).delete()
+
+        self.assertIsNone(order_utils.look_up_cart(request))
+
+
+class GetCartItemsTest(PostgreSQLTestCase):
+    """Test the get_cart_items utility function"""
+
+    def setUp(self):
+        self.cart = Cart.objects.create(anonymous_cart_id='anon_cart_123')
+        self.product_skutype = Skutype.objects.create(title='product')
+        self.skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        self.product = Product.objects.create(title='Paper Clips', title_url='PaperClips', identifier='PROD001')
+        Productimage.objects.create(product=self.product, image_url='https://example.com/product.jpg', main_image=True)
+        Productimage.objects.create(product=self.product, image_url='https://example.com/other.jpg', main_image=False)
+        self.now = timezone.now()
+
+    def add_cart_sku(self, color, quantity, skutype=None, sku_image_url=None):
+        sku = Sku.objects.create(
+            color=color,
+            size='Medium',
+            description=f'{color} clips',
+            sku_type=skutype or self.product_skutype,
+            sku_inventory=self.skuinventory
+        )
+        Skuprice.objects.create(sku=sku, price=5.00, created_date_time=self.now)
+        Skuprice.objects.create(sku=sku, price=3.50, created_date_time=self.now + timezone.timedelta(seconds=1))
+        Productsku.objects.create(product=self.product, sku=sku)
+        if sku_image_url is not None:
+            Skuimage.objects.create(sku=sku, image_url=sku_image_url, main_image=True)
+        Cartsku.objects.create(cart=self.cart, sku=sku, quantity=quantity)
+        return sku
+
+    def test_cart_items_data(self):
+        """Test item data, SKU image fallback to the product image and exclusion of non-product SKUs"""
+        silver = self.add_cart_sku('Silver', 2, sku_image_url='https://example.com/silver.jpg')
+        gold = self.add_cart_sku('Gold', 1)
+        self.add_cart_sku('Gift Wrap', 1, skutype=Skutype.objects.create(title='service'))
+
+        cart_item_dict = order_utils.get_cart_items(None, self.cart)
+
+        expected_common = {
+            'sku_type__title': 'product',
+            'sku_inventory__title': 'In Stock',
+            'sku_inventory__identifier': 'in-stock',
+            'size': 'Medium',
+            'price': Decimal('3.50'),
+            'parent_product__title': 'Paper Clips',
+            'parent_product__title_url': 'PaperClips',
+            'parent_product__identifier': 'PROD001',
+        }
+        self.assertEqual(cart_item_dict, {'product_sku_data': {
+            0: dict(expected_common, sku_id=silver.id, color='Silver', description='Silver clips', quantity=2,
+                    sku_image_url='https://example.com/silver.jpg'),
+            1: dict(expected_common, sku_id=gold.id, color='Gold', description='Gold clips', quantity=1,
+                    sku_image_url='https://example.com/product.jpg'),
+        }})
+        self.assertEqual(order_utils.get_cart_items(None, None), {})
+
+    def test_query_count_does_not_depend_on_cart_size(self):
+        """Test that get_cart_items runs a fixed number of queries however many items the cart holds"""
+        self.add_cart_sku('Silver', 1, sku_image_url='https://example.com/silver.jpg')
+        with CaptureQueriesContext(connection) as single_item_context:
+            order_utils.get_cart_items(None, self.cart)
+
+        for number in range(9):
+            sku_image_url = None if number % 2 else f'https://example.com/{number}.jpg'
+            self.add_cart_sku(f'Color {number}', 1, sku_image_url=sku_image_url)
+        with CaptureQueriesContext(connection) as ten_item_context:
+            cart_item_dict = order_utils.get_cart_items(None, self.cart)
+
+        self.assertEqual(len(cart_item_dict['product_sku_data']), 10)
+        self.assertEqual(len(single_item_context.captured_queries), 4)
+        self.assertEqual(len(ten_item_context.captured_queries), 4)
+
+
+class GetCartSummaryTest(PostgreSQLTestCase):
+    """Test the get_cart_summary aggregate and the totals built from it"""
+
+    def setUp(self):
+        self.cart = Cart.objects.create(anonymous_cart_id='anon_cart_123')
+        skutype = Skutype.objects.create(title='product')
+        skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        for price, quantity in [(Decimal('3.50'), 2), (Decimal('10.25'), 3)]:
+            sku = Sku.objects.create(color='Silver', size='Medium', sku_type=skutype, sku_inventory=skuinventory)
+            Skuprice.objects.create(sku=sku, price=price + 1, created_date_time=timezone.now())
+            Skuprice.objects.create(sku=sku, price=price, created_date_time=timezone.now() + timezone.timedelta(1))
+            Cartsku.objects.create(cart=self.cart, sku=sku, quantity=quantity)
+
+    def test_summary_uses_current_prices_and_quantities(self):
+        """Test that the subtotal multiplies each current price by its quantity, in one query"""
+        with CaptureQueriesContext(connection) as context:
+            cart_summary = order_utils.get_cart_summary(self.cart)
+
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(cart_summary, {'item_count': 2, 'item_subtotal': Decimal('37.75'), 'shipping_subtotal': 0})
+        self.assertEqual(order_utils.count_cart_items(self.cart), 2)
+
+    def test_totals_include_shipping(self):
+        """Test that the selected shipping method is added to the cart total"""
+        shippingmethod = Shippingmethod.objects.create(
+            identifier='USPSPriorityMail2Day', carrier='USPS', shipping_cost=Decimal('5.00'), active=True)
+        Cartshippingmethod.objects.create(cart=self.cart, shippingmethod=shippingmethod)
+
+        self.assertEqual(order_utils.get_cart_totals(self.cart), {
+            'item_subtotal': Decimal('37.75'),
+            'shipping_subtotal': Decimal('5.00'),
+            'cart_total': Decimal('42.75'),
+        })
+
+    def test_empty_and_missing_carts_are_zero(self):
+        """Test that an empty cart and no cart both summarize to zeros"""
+        empty_cart = Cart.objects.create(anonymous_cart_id='anon_cart_456')
+        for cart in [empty_cart, None]:
+            self.assertEqual(
+                order_utils.get_cart_summary(cart), {'item_count': 0, 'item_subtotal': 0, 'shipping_subtotal': 0})
+            self.assertEqual(order_utils.get_cart_totals(cart)['cart_total'], 0)
@@ -5,6 +5,9 @@ import json
 from StartupWebApp.utilities.test_base import PostgreSQLTestCase
 from django.utils import timezone
 from django.contrib.auth.models import User, Group
+from django.db import connection
+from django.http import JsonResponse
+from django.test.utils import CaptureQueriesContext
 
 from order.models import (
     Product, Productimage, Productvideo, Productsku,
@@ -13,6 +16,8 @@ from order.models import (
     Ordersku, Status, Orderstatus, Shippingmethod, Ordershippingmethod,
     Orderconfiguration
 )
+from order.tests.catalog_fixtures import create_catalog_product, reference_product_data
+from order.utilities import catalog_utils
 from user.models import Member, Prospect, Termsofuse
 
 from StartupWebApp.utilities import unittest_utilities
@@ -188,6 +193,95 @@ class ProductsEndpointTest(PostgreSQLTestCase):
         self.assertEqual(len(data['products_data']), 0)
 
 
+class ProductsEndpointQueryCountTest(PostgreSQLTestCase):
+    """Test that the products listing runs a fixed number of queries"""
+
+    def setUp(self):
+        self.skutype = Skutype.objects.create(title='product')
+        self.skuinventory = Skuinventory.objects.create(
+            title='In Stock',
+            identifier='in-stock',
+            description='In Stock items'
+        )
+        self.product_count = 0
+
+    def add_products(self, count, skus_per_product=3):
+        """Create products that each have several priced SKUs and a main image"""
+        for _ in range(count):
+            self.product_count += 1
+            product = Product.objects.create(
+                title=f'Product {self.product_count}',
+                title_url=f'Product{self.product_count}',
+                identifier=f'PROD{self.product_count:03d}'
+            )
+            for sku_number in range(skus_per_product):
+                sku = Sku.objects.create(
+                    color='Silver',
+                    size=str(sku_number),
+                    sku_type=self.skutype,
+                    sku_inventory=self.skuinventory
+                )
+                # Older price should be ignored in favor of the newest one
+                Skuprice.objects.create(
+                    sku=sku,
+                    price=99.00,
+                    created_date_time=timezone.now() - timezone.timedelta(days=1)
+                )
+                Skuprice.objects.create(
+                    sku=sku,
+                    price=sku_number + 1,
+                    created_date_time=timezone.now()
+                )
+                Productsku.objects.create(product=product, sku=sku)
+            Productimage.objects.create(
+                product=product,
+                image_url=f'https://example.com/{product.identifier}.jpg',
+                main_image=True
+            )
+
+    def count_products_queries(self):
+        with CaptureQueriesContext(connection) as context:
+            catalog_utils.get_products_data()
+        response = self.client.get('/order/products')
+        unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+        return len(context.captured_queries), json.loads(response.content.decode('utf8'))
+
+    def test_products_query_count_is_flat_as_catalog_grows(self):
+        """Test that query count does not depend on the number of products or SKUs"""
+        self.add_products(2)
+        small_catalog_queries, small_data = self.count_products_queries()
+        self.assertEqual(len(small_data['products_data']), 2)
+
+        self.add_products(18, skus_per_product=5)
+        large_catalog_queries, large_data = self.count_products_queries()
+        self.assertEqual(len(large_data['products_data']), 20)
+
+        self.assertEqual(small_catalog_queries, large_catalog_queries)
+        self.assertLessEqual(large_catalog_queries, 2)
+
+    def test_products_uses_latest_price_for_range(self):
+        """Test that price_low/price_high come from the newest price of each SKU"""
+        self.add_products(1)
+
+        query_count, data = self.count_products_queries()
+
+        product_data = data['products_data']['PROD001']
+        self.assertEqual(product_data['price_low'], '1.00')
+        self.assertEqual(product_data['price_high'], '3.00')
+        self.assertEqual(product_data['product_image_url'], 'https://example.com/PROD001.jpg')
+
+    def test_products_without_skus_or_main_image(self):
+        """Test that products without SKUs or a main image still render with null values"""
+        Product.objects.create(title='Empty', title_url='Empty', identifier='EMPTY01')
+
+        query_count, data = self.count_products_queries()
+
+        product_data = data['products_data']['EMPTY01']
+        self.assertIsNone(product_data['price_low'])
+        self.assertIsNone(product_data['price_high'])
+        self.assertIsNone(product_data['product_image_url'])
+
+
 class ProductEndpointTest(PostgreSQLTestCase):
     """Test the individual product detail endpoint"""
 
@@ -381,6 +475,54 @@ class ProductEndpointTest(PostgreSQLTestCase):
         self.assertEqual(data['product_identifier'], 'INVALID')
 
 
+class ProductEndpointQueryCountTest(PostgreSQLTestCase):
+    """Test that the product detail payload is built from a fixed number of queries"""
+
+    def count_product_data_queries(self, product_identifier):
+        with CaptureQueriesContext(connection) as context:
+            product_data = catalog_utils.get_product_data(product_identifier)
+        return len(context.captured_queries), product_data
+
+    def test_product_query_count_is_flat_as_skus_grow(self):
+        """Test that query count does not depend on the number of SKUs"""
+        create_catalog_product('SMALL', sku_count=2)
+        create_catalog_product('LARGE', sku_count=50)
+
+        small_product_queries, small_product_data = self.count_product_data_queries('SMALL')
+        large_product_queries, large_product_data = self.count_product_data_queries('LARGE')
+
+        self.assertEqual(len(small_product_data['skus']), 2)
+        self.assertEqual(len(large_product_data['skus']), 50)
+        self.assertEqual(small_product_queries, large_product_queries)
+        self.assertLessEqual(large_product_queries, 5)
+
+    def test_product_response_is_byte_identical_to_reference(self):
+        """Test that the endpoint returns exactly the bytes the per-SKU implementation produced"""
+        product = create_catalog_product('PROD050', sku_count=50)
+        # Extra price rows so the current price must win over both older and later-inserted history
+        sku = product.productsku_set.order_by('sku__id').first().sku
+        Skuprice.objects.create(sku=sku, price=99.99, created_date_time=timezone.now() - timezone.timedelta(days=7))
+        Productvideo.objects.create(
+            product=product,
+            video_url='https://example.com/second.mp4',
+            video_thumbnail_url='https://example.com/second.jpg',
+            caption='Second video'
+        )
+
+        response = self.client.get('/order/product/PROD050')
+
+        expected_response = JsonResponse(
+            {
+                'product': 'success',
+                'product_identifier': 'PROD050',
+                'product_data': reference_product_data('PROD050'),
+                'order-api-version': '0.0.1',
+            },
+            safe=False,
+        )
+        self.assertEqual(response.content, expected_response.content)
+
+
 class OrderDetailEndpointTest(PostgreSQLTestCase):
     """Test the order detail endpoint"""
 
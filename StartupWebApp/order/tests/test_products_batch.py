@@ -0,0 +1,100 @@
+# Unit tests for the batch product fetch endpoint
+
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from order.models import (
+    Catalogpayload, Product, Productimage, Productsku, Sku, Skuimage, Skuinventory, Skuprice, Skutype
+)
+from order.utilities import catalog_blobs
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+from StartupWebApp.utilities import unittest_utilities
+
+
+class ProductsBatchEndpointTest(PostgreSQLTestCase):
+    """Test the /order/products/batch endpoint"""
+
+    def setUp(self):
+        self.skutype = Skutype.objects.create(title='product')
+        self.skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        for number in range(1, 5):
+            self.add_product(f'PROD00{number}', sku_count=number)
+
+    def add_product(self, identifier, sku_count):
+        product = Product.objects.create(title=identifier, title_url=identifier, identifier=identifier)
+        Productimage.objects.create(product=product, image_url=f'https://example.com/{identifier}.jpg', main_image=True)
+        for sku_number in range(sku_count):
+            sku = Sku.objects.create(
+                color=f'Color {sku_number}', size='Medium', sku_type=self.skutype, sku_inventory=self.skuinventory)
+            Skuprice.objects.create(sku=sku, price=sku_number + 1, created_date_time=timezone.now())
+            Skuimage.objects.create(sku=sku, image_url=f'https://example.com/{identifier}/{sku_number}.jpg')
+            Productsku.objects.create(product=product, sku=sku)
+        return product
+
+    def get_batch(self, query_string):
+        response = self.client.get('/order/products/batch?' + query_string)
+        unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+        return json.loads(response.content.decode('utf8'))
+
+    def get_product(self, product_identifier):
+        data = json.loads(self.client.get(f'/order/product/{product_identifier}').content.decode('utf8'))
+        del data['order-api-version']
+        return data
+
+    def test_batch_matches_product_endpoint(self):
+        """Test that each entry has the product endpoint's shape, in request order without duplicates"""
+        data = self.get_batch('ids=PROD003,PROD001,PROD003')
+
+        self.assertEqual(data['products_batch'], 'success')
+        self.assertEqual(data['order-api-version'], '0.0.1')
+        self.assertEqual(list(data['products']), ['PROD003', 'PROD001'])
+        self.assertEqual(data['products']['PROD003'], self.get_product('PROD003'))
+        self.assertEqual(data['products']['PROD001'], self.get_product('PROD001'))
+
+    def test_unknown_identifiers_are_reported_per_product(self):
+        """Test that unknown, malformed and unpriced products get per-identifier not-found errors"""
+        unpriced = Product.objects.create(title='Unpriced', title_url='Unpriced', identifier='PROD009')
+        sku = Sku.objects.create(color='Gold', size='Small', sku_type=self.skutype, sku_inventory=self.skuinventory)
+        Productsku.objects.create(product=unpriced, sku=sku)
+
+        data = self.get_batch('ids=PROD002,NOPE,PROD009,bad-id')
+
+        self.assertEqual(data['products']['PROD002'], self.get_product('PROD002'))
+        for product_identifier in ['NOPE', 'PROD009', 'bad-id']:
+            self.assertEqual(data['products'][product_identifier], {
+                'product': 'error',
+                'errors': {'error': 'product-identifier-not-found'},
+                'product_identifier': product_identifier,
+            })
+
+    def test_invalid_requests_are_rejected(self):
+        """Test that missing and oversized identifier lists return errors"""
+        too_many = ','.join(f'PROD{number}' for number in range(51))
+        for query_string, error in [
+            ('', 'product-identifiers-required'),
+            ('ids=,,', 'product-identifiers-required'),
+            (f'ids={too_many}', 'too-many-product-identifiers'),
+        ]:
+            data = self.get_batch(query_string)
+            self.assertEqual(data['products_batch'], 'error')
+            self.assertEqual(data['errors']['error'], error)
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        """Test that building a batch of payloads costs the same queries as building one"""
+        Catalogpayload.objects.all().delete()
+        with CaptureQueriesContext(connection) as single_context:
+            catalog_blobs.get_product_jsons(['PROD001'])
+        with CaptureQueriesContext(connection) as batch_context:
+            product_jsons = catalog_blobs.get_product_jsons(['PROD002', 'PROD003', 'PROD004'])
+
+        self.assertEqual(len(batch_context.captured_queries), len(single_context.captured_queries))
+        self.assertEqual(sorted(product_jsons), ['PROD002', 'PROD003', 'PROD004'])
+
+        # Built payloads are stored, so the next batch is a single read
+        with CaptureQueriesContext(connection) as stored_context:
+            self.assertEqual(catalog_blobs.get_product_jsons(['PROD002', 'PROD003', 'PROD004']), product_jsons)
+        self.assertEqual(len(stored_context.captured_queries), 1)
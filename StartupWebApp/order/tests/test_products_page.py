@@ -0,0 +1,137 @@
+# Unit tests for the cursor-paginated products listing endpoint
+
+import json
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from order.models import Product, Productimage, Productsku, Sku, Skuinventory, Skuprice, Skutype
+from order.utilities import catalog_utils
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+from StartupWebApp.utilities import unittest_utilities
+
+
+class ProductsPageEndpointTest(PostgreSQLTestCase):
+    """Test keyset pagination, sorting and filtering of /order/products-page"""
+
+    def setUp(self):
+        self.skutype = Skutype.objects.create(title='product')
+        self.in_stock = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        self.back_ordered = Skuinventory.objects.create(title='Back Ordered', identifier='back-ordered')
+        # Titles and prices deliberately out of id order, with a duplicate title and price
+        self.add_product('PROD001', 'Staples', [Decimal('4.00'), Decimal('9.00')])
+        self.add_product('PROD002', 'Binder', [Decimal('12.50')], skuinventory=self.back_ordered)
+        self.add_product('PROD003', 'Pencils', [Decimal('1.25')])
+        self.add_product('PROD004', 'Binder', [Decimal('4.00')])
+        self.add_product('PROD005', 'Erasers', [Decimal('2.00')])
+        self.add_product('PROD006', 'Coming Soon', [])
+
+    def add_product(self, identifier, title, prices, skuinventory=None):
+        product = Product.objects.create(title=title, title_url=title.replace(' ', ''), identifier=identifier)
+        Productimage.objects.create(
+            product=product, image_url=f'https://example.com/{identifier}.jpg', main_image=True)
+        for price in prices:
+            sku = Sku.objects.create(
+                color='Silver',
+                size=str(price),
+                sku_type=self.skutype,
+                sku_inventory=skuinventory or self.in_stock
+            )
+            Skuprice.objects.create(sku=sku, price=price, created_date_time=timezone.now())
+            Productsku.objects.create(product=product, sku=sku)
+        return product
+
+    def get_page(self, query_string):
+        response = self.client.get('/order/products-page?' + query_string)
+        unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+        return json.loads(response.content.decode('utf8'))
+
+    def get_all_identifiers(self, query_string):
+        identifiers = []
+        data = self.get_page(query_string)
+        while True:
+            self.assertEqual(data['products_page'], 'success')
+            identifiers.extend(product['identifier'] for product in data['products_data'])
+            if data['next_cursor'] is None:
+                return identifiers
+            data = self.get_page(f'{query_string}&cursor={data["next_cursor"]}')
+
+    def test_first_page_shape(self):
+        """Test that a page returns listing entries in the products endpoint shape plus a cursor"""
+        data = self.get_page('limit=2')
+
+        self.assertEqual(data['products_page'], 'success')
+        self.assertEqual(len(data['products_data']), 2)
+        self.assertIsNotNone(data['next_cursor'])
+        first_product = data['products_data'][0]
+        self.assertEqual(first_product['identifier'], 'PROD002')
+        self.assertEqual(first_product['price_low'], '12.50')
+        self.assertEqual(first_product['product_image_url'], 'https://example.com/PROD002.jpg')
+        self.assertEqual(data['order-api-version'], '0.0.1')
+
+    def test_title_sort_walks_every_product_once(self):
+        """Test that following cursors by title returns all products in (title, id) order"""
+        self.assertEqual(
+            self.get_all_identifiers('sort=title&limit=2'),
+            ['PROD002', 'PROD004', 'PROD006', 'PROD005', 'PROD003', 'PROD001'])
+        self.assertEqual(
+            self.get_all_identifiers('sort=-title&limit=4'),
+            ['PROD001', 'PROD003', 'PROD005', 'PROD006', 'PROD004', 'PROD002'])
+
+    def test_price_sort_walks_priced_products_once(self):
+        """Test that price sorting uses the lowest SKU price and skips unpriced products"""
+        self.assertEqual(
+            self.get_all_identifiers('sort=price&limit=2'),
+            ['PROD003', 'PROD005', 'PROD001', 'PROD004', 'PROD002'])
+        self.assertEqual(
+            self.get_all_identifiers('sort=-price&limit=3'),
+            ['PROD002', 'PROD004', 'PROD001', 'PROD005', 'PROD003'])
+
+    def test_price_and_inventory_filters(self):
+        """Test filtering on lowest price range and SKU inventory status"""
+        self.assertEqual(
+            self.get_all_identifiers('sort=price&min_price=2&max_price=4.00'),
+            ['PROD005', 'PROD001', 'PROD004'])
+        self.assertEqual(self.get_all_identifiers('inventory=back-ordered'), ['PROD002'])
+
+    def test_price_change_moves_product(self):
+        """Test that a new SKU price updates the product's position in the price ordering"""
+        sku = Sku.objects.get(productsku__product__identifier='PROD002')
+        Skuprice.objects.create(sku=sku, price=Decimal('0.50'), created_date_time=timezone.now())
+
+        self.assertEqual(self.get_all_identifiers('sort=price')[0], 'PROD002')
+
+    def test_tampered_or_mismatched_cursor_is_rejected(self):
+        """Test that a cursor must be signed and issued for the requested sort"""
+        cursor = self.get_page('sort=title&limit=1')['next_cursor']
+
+        for query_string in [f'sort=price&cursor={cursor}', f'sort=title&cursor={cursor}x']:
+            data = self.get_page(query_string)
+            self.assertEqual(data['products_page'], 'error')
+            self.assertEqual(data['errors']['error'], 'invalid-cursor')
+
+    def test_invalid_parameters_are_rejected(self):
+        """Test that bad sort, price and limit values return errors"""
+        for query_string, error in [
+            ('sort=color', 'invalid-sort'),
+            ('min_price=abc', 'invalid-price'),
+            ('max_price=-1', 'invalid-price'),
+            ('limit=0', 'invalid-limit'),
+            ('limit=1000', 'invalid-limit'),
+        ]:
+            data = self.get_page(query_string)
+            self.assertEqual(data['products_page'], 'error')
+            self.assertEqual(data['errors']['error'], error)
+
+    def test_page_query_count_does_not_depend_on_depth(self):
+        """Test that a deep page costs the same queries as the first page"""
+        with CaptureQueriesContext(connection) as first_page_context:
+            first_products, position = catalog_utils.get_products_page(sort='price', limit=2)
+        with CaptureQueriesContext(connection) as deep_page_context:
+            catalog_utils.get_products_page(sort='price', after=position, limit=2)
+
+        self.assertEqual(len(first_page_context.captured_queries), 2)
+        self.assertEqual(len(deep_page_context.captured_queries), 2)
@@ -0,0 +1,137 @@
+# Unit tests for full-text product search
+
+import json
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.utils import timezone
+
+from order.models import Product, Productsearchdocument, Productsku, Sku, Skuinventory, Skuprice, Skutype
+from order.utilities import catalog_cache
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+from StartupWebApp.utilities import unittest_utilities
+
+
+class SearchEndpointTest(PostgreSQLTestCase):
+    """Test the /order/search endpoint and incremental search document maintenance"""
+
+    def setUp(self):
+        self.skutype = Skutype.objects.create(title='product')
+        self.skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        self.paper_clips = Product.objects.create(
+            title='Paper Clips',
+            title_url='PaperClips',
+            identifier='PROD001',
+            headline='Keeps your documents together',
+            description_part_1='Made from galvanized steel wire'
+        )
+        self.binder = Product.objects.create(
+            title='Binder',
+            title_url='Binder',
+            identifier='PROD002',
+            headline='Holds paper clips, notes and more',
+            description_part_1='Three ring binder'
+        )
+        self.sku = Sku.objects.create(
+            color='Silver',
+            size='Jumbo',
+            description='Box of 100',
+            sku_type=self.skutype,
+            sku_inventory=self.skuinventory
+        )
+        Skuprice.objects.create(sku=self.sku, price=3.50, created_date_time=timezone.now())
+        Productsku.objects.create(product=self.paper_clips, sku=self.sku)
+
+    def search(self, query_string):
+        response = self.client.get('/order/search?' + query_string)
+        unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+        return json.loads(response.content.decode('utf8'))
+
+    def search_identifiers(self, query_text):
+        data = self.search(f'q={query_text}')
+        self.assertEqual(data['search'], 'success')
+        return [product['identifier'] for product in data['products_data']]
+
+    def test_search_ranks_title_matches_first(self):
+        """Test that a title match outranks a headline match and results use the listing shape"""
+        data = self.search('q=paper+clips')
+
+        self.assertEqual([product['identifier'] for product in data['products_data']], ['PROD001', 'PROD002'])
+        self.assertEqual(data['query'], 'paper clips')
+        self.assertEqual(data['products_data'][0]['price_low'], '3.50')
+
+    def test_search_matches_stemmed_description_and_sku_fields(self):
+        """Test that descriptions and SKU color/size/description are searchable with stemming"""
+        self.assertEqual(self.search_identifiers('galvanize'), ['PROD001'])
+        self.assertEqual(self.search_identifiers('silver+jumbo'), ['PROD001'])
+        self.assertEqual(self.search_identifiers('rings'), ['PROD002'])
+
+    def test_search_supports_exclusions(self):
+        """Test web-style search syntax"""
+        self.assertEqual(self.search_identifiers('paper+-binder'), ['PROD001'])
+
+    def test_documents_follow_catalog_changes(self):
+        """Test that product, SKU and link changes are reflected in search results"""
+        self.binder.title = 'Ring Folder'
+        self.binder.save()
+        self.assertEqual(self.search_identifiers('folder'), ['PROD002'])
+
+        self.sku.color = 'Gold'
+        self.sku.save()
+        self.assertEqual(self.search_identifiers('gold'), ['PROD001'])
+        self.assertEqual(self.search_identifiers('silver'), [])
+
+        Productsku.objects.create(product=self.binder, sku=self.sku)
+        self.assertEqual(self.search_identifiers('gold'), ['PROD001', 'PROD002'])
+
+        self.paper_clips.delete()
+        self.assertEqual(self.search_identifiers('gold'), ['PROD002'])
+
+    def test_price_change_skips_search_document_refresh(self):
+        """Test that only changes to indexed text rebuild search documents"""
+        with patch('order.signals.search_utils.refresh_search_documents') as mock_refresh:
+            Skuprice.objects.create(sku=self.sku, price=4.25, created_date_time=timezone.now())
+            mock_refresh.assert_not_called()
+
+            self.sku.description = 'Box of 200'
+            self.sku.save()
+            mock_refresh.assert_called_once_with([self.paper_clips.id])
+
+    def test_results_are_cached_in_process_by_normalized_query(self):
+        """Test that repeat searches are served from a bounded process-local cache, not the shared cache"""
+        with patch.object(caches[catalog_cache.CATALOG_CACHE_ALIAS], 'set') as mock_shared_set:
+            self.assertEqual(self.search_identifiers('Paper  CLIPS'), ['PROD001', 'PROD002'])
+            with self.assertNumQueries(0):
+                self.assertEqual(self.search_identifiers('paper clips'), ['PROD001', 'PROD002'])
+        mock_shared_set.assert_not_called()
+
+        with patch.object(catalog_cache, 'LOCAL_RESULTS_SIZE', 1):
+            self.search_identifiers('binder')
+            # Evicted by the binder search: the search and its main images are queried again
+            with self.assertNumQueries(2):
+                self.search_identifiers('paper clips')
+
+    def test_invalid_queries_are_rejected(self):
+        """Test that blank, overlong and badly limited queries return errors"""
+        for query_string, error in [
+            ('q=+', 'search-query-required'),
+            ('q=' + 'a' * 201, 'search-query-too-long'),
+            ('q=paper&limit=0', 'invalid-limit'),
+        ]:
+            data = self.search(query_string)
+            self.assertEqual(data['search'], 'error')
+            self.assertEqual(data['errors']['error'], error)
+
+    def test_rebuild_command_restores_documents(self):
+        """Test that rebuild_search_documents recreates missing documents"""
+        Productsearchdocument.objects.all().delete()
+        self.assertEqual(self.search_identifiers('binder'), [])
+
+        out = StringIO()
+        call_command('rebuild_search_documents', stdout=out)
+
+        self.assertIn('Rebuilt 2 search document(s)', out.getvalue())
+        self.assertEqual(self.search_identifiers('binder'), ['PROD002'])
@@ -0,0 +1,91 @@
+# Unit tests for the in-process shipping method table
+
+import json
+from decimal import Decimal
+
+from django.contrib.auth.models import Group, User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from order.models import Cart, Cartshippingmethod, Orderconfiguration, Shippingmethod
+from order.utilities import shipping_method_table
+from user.models import Member, Termsofuse
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+from StartupWebApp.utilities import unittest_utilities
+
+
+class ShippingMethodTableTest(PostgreSQLTestCase):
+    """Test that shipping methods are served from the table and reloaded when they change"""
+
+    def setUp(self):
+        Group.objects.create(name='Members')
+        Termsofuse.objects.create(version='1', version_note='Test', publication_date_time=timezone.now())
+        user = User.objects.create_user(username='testuser', email='test@test.com', password='testpass123')
+        self.cart = Cart.objects.create(member=Member.objects.create(user=user, mb_cd='MEMBER123'))
+
+        Orderconfiguration.objects.create(key='usernames_allowed_to_checkout', string_value='*')
+        Orderconfiguration.objects.create(key='default_shipping_method', string_value='USPSRetailGround')
+        self.ground = Shippingmethod.objects.create(
+            identifier='USPSRetailGround', carrier='USPS', shipping_cost=Decimal('4.75'), active=True)
+        self.express = Shippingmethod.objects.create(
+            identifier='USPSPriorityMail2Day', carrier='USPS', shipping_cost=Decimal('7.50'), active=True)
+        Shippingmethod.objects.create(
+            identifier='USPSRetired', carrier='USPS', shipping_cost=Decimal('9.00'), active=False)
+        self.client.login(username='testuser', password='testpass123')
+
+    def get(self, endpoint):
+        response = self.client.get(f'/order/{endpoint}')
+        unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+        return json.loads(response.content.decode('utf8'))
+
+    def test_shipping_methods_come_from_table(self):
+        """Test that the cart and confirm endpoints read shipping methods without querying them"""
+        self.get('cart-shipping-methods')
+
+        with CaptureQueriesContext(connection) as context:
+            data = self.get('cart-shipping-methods')
+            confirm_data = self.get('confirm-shipping-method')
+
+        self.assertEqual(
+            [method['identifier'] for method in data['cart_shipping_methods'].values()],
+            ['USPSPriorityMail2Day', 'USPSRetailGround'])
+        self.assertEqual(data['shipping_method_selected'], 'USPSRetailGround')
+        self.assertEqual(confirm_data['confirm_shipping_method'], {
+            'identifier': 'USPSRetailGround', 'carrier': 'USPS', 'shipping_cost': '4.75',
+            'tracking_code_base_url': ''})
+        self.assertFalse([query for query in context.captured_queries
+                          if 'FROM "order_shipping_method"' in query['sql']])
+
+    def test_saves_reload_table(self):
+        """Test that saving or deleting a shipping method changes the next response"""
+        self.get('cart-shipping-methods')
+        Cartshippingmethod.objects.filter(cart=self.cart).update(shippingmethod=self.express)
+
+        self.express.shipping_cost = Decimal('8.25')
+        self.express.save()
+        self.assertEqual(self.get('confirm-shipping-method')['confirm_shipping_method']['shipping_cost'], '8.25')
+
+        self.express.active = False
+        self.express.save()
+        self.assertEqual(
+            [method['identifier'] for method in self.get('cart-shipping-methods')['cart_shipping_methods'].values()],
+            ['USPSRetailGround'])
+
+        Shippingmethod.objects.filter(identifier='USPSRetired').delete()
+        self.assertNotIn('USPSRetired', shipping_method_table.registry.get_values().ids)
+
+    def test_update_shipping_method(self):
+        """Test that changing the selected shipping method replaces the cart's selection"""
+        self.get('cart-shipping-methods')
+
+        response = self.client.post(
+            '/order/cart-update-shipping-method', {'shipping_method_identifier': 'USPSPriorityMail2Day'})
+        self.assertEqual(response.json()['cart_totals_data']['shipping_subtotal'], '7.50')
+        response = self.client.post('/order/cart-update-shipping-method', {'shipping_method_identifier': 'nope'})
+        self.assertEqual(response.json()['errors'], {'error': 'error-setting-cart-shipping-method'})
+
+        self.assertEqual(
+            list(Cartshippingmethod.objects.filter(cart=self.cart).values_list('shippingmethod_id', flat=True)),
+            [self.express.id])
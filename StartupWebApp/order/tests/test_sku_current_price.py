@@ -0,0 +1,168 @@
+# Unit tests for the materialized Skucurrentprice table
+
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+
+from order.models import Product, Productsku, Sku, Skucurrentprice, Skuinventory, Skuprice, Skutype
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+
+
+class SkuCurrentPriceTest(PostgreSQLTestCase):
+    """Test that Skucurrentprice follows the Skuprice history"""
+
+    def setUp(self):
+        self.skutype = Skutype.objects.create(title='product')
+        self.skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        self.sku = Sku.objects.create(
+            color='Silver',
+            size='Medium',
+            sku_type=self.skutype,
+            sku_inventory=self.skuinventory
+        )
+
+    def test_insert_sets_current_price(self):
+        """Test that the first Skuprice creates the current price row"""
+        skuprice = Skuprice.objects.create(sku=self.sku, price=3.50, created_date_time=timezone.now())
+
+        current_price = Skucurrentprice.objects.get(sku=self.sku)
+        self.assertEqual(current_price.skuprice, skuprice)
+        self.assertEqual(current_price.price, Decimal('3.50'))
+
+    def test_newer_price_replaces_current_price(self):
+        """Test that a newer Skuprice becomes current"""
+        Skuprice.objects.create(sku=self.sku, price=3.50, created_date_time=timezone.now() - timezone.timedelta(days=1))
+        Skuprice.objects.create(sku=self.sku, price=4.25, created_date_time=timezone.now())
+
+        self.assertEqual(Sku.objects.get(id=self.sku.id).current_price.price, Decimal('4.25'))
+
+    def test_backdated_price_does_not_replace_current_price(self):
+        """Test that inserting an older Skuprice leaves the newest one current"""
+        Skuprice.objects.create(sku=self.sku, price=4.25, created_date_time=timezone.now())
+        Skuprice.objects.create(sku=self.sku, price=3.50, created_date_time=timezone.now() - timezone.timedelta(days=1))
+
+        self.assertEqual(Sku.objects.get(id=self.sku.id).current_price.price, Decimal('4.25'))
+
+    def test_editing_current_skuprice_updates_current_price(self):
+        """Test that correcting the newest Skuprice is reflected in the current price"""
+        skuprice = Skuprice.objects.create(sku=self.sku, price=4.25, created_date_time=timezone.now())
+        skuprice.price = 4.00
+        skuprice.save()
+
+        self.assertEqual(Sku.objects.get(id=self.sku.id).current_price.price, Decimal('4.00'))
+
+    def test_deleting_current_skuprice_falls_back_to_previous(self):
+        """Test that deleting the newest Skuprice makes the previous one current"""
+        previous = Skuprice.objects.create(
+            sku=self.sku, price=3.50, created_date_time=timezone.now() - timezone.timedelta(days=1))
+        newest = Skuprice.objects.create(sku=self.sku, price=4.25, created_date_time=timezone.now())
+
+        newest.delete()
+
+        self.assertEqual(Sku.objects.get(id=self.sku.id).current_price.skuprice, previous)
+
+    def test_deleting_all_prices_removes_current_price(self):
+        """Test that a SKU with no prices has no current price"""
+        Skuprice.objects.create(sku=self.sku, price=3.50, created_date_time=timezone.now())
+
+        Skuprice.objects.filter(sku=self.sku).delete()
+
+        self.assertFalse(Skucurrentprice.objects.filter(sku=self.sku).exists())
+
+    def test_deleting_sku_removes_current_price(self):
+        """Test that deleting a SKU cascades to its current price"""
+        Skuprice.objects.create(sku=self.sku, price=3.50, created_date_time=timezone.now())
+
+        self.sku.delete()
+
+        self.assertEqual(Skucurrentprice.objects.count(), 0)
+
+
+class ProductPriceRangeTest(PostgreSQLTestCase):
+    """Test that Product.price_low/price_high follow the current prices of its SKUs"""
+
+    def setUp(self):
+        skutype = Skutype.objects.create(title='product')
+        skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        self.product = Product.objects.create(title='Paper Clips', title_url='PaperClips', identifier='PROD001')
+        self.cheap_sku = Sku.objects.create(color='Silver', size='Small', sku_type=skutype, sku_inventory=skuinventory)
+        self.dear_sku = Sku.objects.create(color='Gold', size='Large', sku_type=skutype, sku_inventory=skuinventory)
+        Skuprice.objects.create(sku=self.cheap_sku, price=2.00, created_date_time=timezone.now())
+        Skuprice.objects.create(sku=self.dear_sku, price=8.00, created_date_time=timezone.now())
+        Productsku.objects.create(product=self.product, sku=self.cheap_sku)
+        self.dear_productsku = Productsku.objects.create(product=self.product, sku=self.dear_sku)
+
+    def get_price_range(self):
+        product = Product.objects.get(id=self.product.id)
+        return product.price_low, product.price_high
+
+    def test_range_follows_sku_links_and_prices(self):
+        """Test that linking SKUs, repricing and unlinking all update the range"""
+        self.assertEqual(self.get_price_range(), (Decimal('2.00'), Decimal('8.00')))
+
+        Skuprice.objects.create(sku=self.cheap_sku, price=1.00, created_date_time=timezone.now())
+        self.assertEqual(self.get_price_range(), (Decimal('1.00'), Decimal('8.00')))
+
+        self.dear_productsku.delete()
+        self.assertEqual(self.get_price_range(), (Decimal('1.00'), Decimal('1.00')))
+
+    def test_sync_command_repairs_range(self):
+        """Test that sync_current_prices reports and repairs a drifted price range"""
+        Product.objects.filter(id=self.product.id).update(price_low=None, price_high=None)
+
+        with self.assertRaisesMessage(CommandError, 'product price range(s) out of sync'):
+            call_command('sync_current_prices', '--check', stdout=StringIO())
+        call_command('sync_current_prices', stdout=StringIO())
+
+        self.assertEqual(self.get_price_range(), (Decimal('2.00'), Decimal('8.00')))
+
+
+class SyncCurrentPricesCommandTest(PostgreSQLTestCase):
+    """Test the sync_current_prices management command"""
+
+    def setUp(self):
+        skutype = Skutype.objects.create(title='product')
+        skuinventory = Skuinventory.objects.create(title='In Stock', identifier='in-stock')
+        self.sku = Sku.objects.create(color='Silver', size='Medium', sku_type=skutype, sku_inventory=skuinventory)
+        self.other_sku = Sku.objects.create(color='Gold', size='Large', sku_type=skutype, sku_inventory=skuinventory)
+        Skuprice.objects.create(sku=self.sku, price=3.50, created_date_time=timezone.now())
+        Skuprice.objects.create(sku=self.other_sku, price=5.00, created_date_time=timezone.now())
+
+    def test_check_passes_when_in_sync(self):
+        """Test that --check succeeds when every SKU is in sync"""
+        out = StringIO()
+        call_command('sync_current_prices', '--check', stdout=out)
+        self.assertIn('in sync', out.getvalue())
+
+    def test_check_reports_prices_written_by_bulk_create(self):
+        """Test that --check reports SKUs whose prices bypassed Skuprice.save()"""
+        Skuprice.objects.bulk_create([Skuprice(sku=self.sku, price=9.99, created_date_time=timezone.now())])
+
+        with self.assertRaisesMessage(CommandError, f'1 SKU current price(s) out of sync: {self.sku.id}'):
+            call_command('sync_current_prices', '--check', stdout=StringIO())
+
+        self.assertEqual(Sku.objects.get(id=self.sku.id).current_price.price, Decimal('3.50'))
+
+    def test_repair_fixes_stale_and_missing_rows(self):
+        """Test that the command repairs stale, tampered and missing current prices"""
+        Skuprice.objects.bulk_create([Skuprice(sku=self.sku, price=9.99, created_date_time=timezone.now())])
+        Skucurrentprice.objects.filter(sku=self.other_sku).delete()
+
+        out = StringIO()
+        call_command('sync_current_prices', stdout=out)
+
+        self.assertIn('Repaired 2', out.getvalue())
+        self.assertEqual(Sku.objects.get(id=self.sku.id).current_price.price, Decimal('9.99'))
+        self.assertEqual(Sku.objects.get(id=self.other_sku.id).current_price.price, Decimal('5.00'))
+        call_command('sync_current_prices', '--check', stdout=StringIO())
+
+    def test_check_reports_tampered_price(self):
+        """Test that --check reports a current price that no longer matches its Skuprice"""
+        Skucurrentprice.objects.filter(sku=self.sku).update(price=1.00)
+
+        with self.assertRaises(CommandError):
+            call_command('sync_current_prices', '--check', stdout=StringIO())
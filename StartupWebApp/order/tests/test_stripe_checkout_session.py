@@ -1,6 +1,7 @@
 # Unit tests for Stripe Checkout Session endpoint
 
 import json
+import time
 from unittest.mock import patch, MagicMock
 
 from StartupWebApp.utilities.test_base import PostgreSQLTestCase
@@ -149,6 +150,24 @@ class CreateCheckoutSessionEndpointTest(PostgreSQLTestCase):
         self.assertEqual(data['create_checkout_session'], 'error')
         self.assertEqual(data['errors']['error'], 'cart-is-empty')
 
+    @patch('stripe.checkout.Session.create')
+    def test_create_checkout_session_refuses_cart_with_unpriced_sku(self, mock_stripe_session):
+        """Test that a cart line whose SKU lost its price is flagged and blocks checkout"""
+        Skuprice.objects.filter(sku=self.sku).delete()
+        self.assertEqual(Cart.objects.get(id=self.cart.id).item_count, 1)
+        self.assertEqual(Cart.objects.get(id=self.cart.id).item_subtotal, 0)
+
+        self.client.login(username='testuser', password='testpass123')
+        cart_items = self.client.get('/order/cart-items')
+        response = self.client.post('/order/create-checkout-session', {})
+
+        unittest_utilities.validate_response_is_OK_and_JSON(self, cart_items)
+        self.assertIsNone(json.loads(cart_items.content.decode('utf8'))['item_data']['product_sku_data']['0']['price'])
+        data = json.loads(response.content.decode('utf8'))
+        self.assertEqual(data['create_checkout_session'], 'error')
+        self.assertEqual(data['errors']['error'], 'cart-sku-not-priced')
+        mock_stripe_session.assert_not_called()
+
     @patch('stripe.checkout.Session.create')
     def test_create_checkout_session_success_for_member(self, mock_stripe_session):
         """Test successful checkout session creation for authenticated member"""
@@ -398,3 +417,44 @@ class CreateCheckoutSessionEndpointTest(PostgreSQLTestCase):
         self.assertEqual(shipping_item['quantity'], 1)
         self.assertGreater(shipping_item['price_data']['unit_amount'], 0, "Shipping cost should be positive")
         self.assertEqual(shipping_item['price_data']['currency'], 'usd')
+
+    @patch('stripe.checkout.Session.create')
+    def test_create_checkout_session_reuses_session_for_unchanged_cart(self, mock_stripe_session):
+        """Test that repeat clicks on an unchanged cart return the first session without calling Stripe"""
+        mock_session = MagicMock()
+        mock_session.id = 'cs_test_reused'
+        mock_session.url = 'https://checkout.stripe.com/c/pay/cs_test_reused'
+        mock_stripe_session.return_value = mock_session
+
+        self.client.login(username='testuser', password='testpass123')
+
+        for _ in range(3):
+            response = self.client.post('/order/create-checkout-session', {})
+            data = json.loads(response.content.decode('utf8'))
+            self.assertEqual(data['session_id'], 'cs_test_reused')
+            self.assertEqual(data['checkout_url'], 'https://checkout.stripe.com/c/pay/cs_test_reused')
+
+        mock_stripe_session.assert_called_once()
+        call_args = mock_stripe_session.call_args
+        self.assertRegex(call_args.kwargs['idempotency_key'], r'^[0-9a-f]{64}:\d+$')
+        # Reused sessions leave the customer at least 30 minutes to pay
+        self.assertGreaterEqual(call_args.kwargs['expires_at'], time.time() + 30 * 60)
+
+    @patch('stripe.checkout.Session.create')
+    def test_create_checkout_session_creates_new_session_after_cart_change(self, mock_stripe_session):
+        """Test that changing the cart creates a new session under a new idempotency key"""
+        mock_stripe_session.side_effect = [
+            MagicMock(id='cs_test_first', url='https://checkout.stripe.com/c/pay/cs_test_first'),
+            MagicMock(id='cs_test_second', url='https://checkout.stripe.com/c/pay/cs_test_second'),
+        ]
+
+        self.client.login(username='testuser', password='testpass123')
+
+        response = self.client.post('/order/create-checkout-session', {})
+        self.assertEqual(json.loads(response.content.decode('utf8'))['session_id'], 'cs_test_first')
+        Cartsku.objects.filter(cart=self.cart).update(quantity=3)
+        response = self.client.post('/order/create-checkout-session', {})
+        self.assertEqual(json.loads(response.content.decode('utf8'))['session_id'], 'cs_test_second')
+
+        first_call, second_call = mock_stripe_session.call_args_list
+        self.assertNotEqual(first_call.kwargs['idempotency_key'], second_call.kwargs['idempotency_key'])
@@ -0,0 +1,122 @@
+# Unit tests for the Stripe gateway: pooled connections, timeouts, retries and the circuit breaker
+
+import json
+from unittest.mock import patch
+
+import stripe
+from django.test import override_settings
+
+from order.utilities import stripe_gateway
+from order.utilities.fake_stripe_server import FakeStripeServer
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+from StartupWebApp.utilities import unittest_utilities
+
+
+class StripeGatewayTest(PostgreSQLTestCase):
+    """Test Stripe calls against a local fake Stripe server"""
+
+    def setUp(self):
+        # Cleanups run last-in first-out: settings are restored before the gateway is reconfigured
+        self.addCleanup(stripe_gateway.circuit_breaker.reset)
+        self.addCleanup(stripe_gateway.configure)
+        settings_override = override_settings(
+            STRIPE_SERVER_SECRET_KEY='sk_test_fake', STRIPE_LOG_LEVEL=None, STRIPE_READ_TIMEOUT=0.2,
+            STRIPE_MAX_NETWORK_RETRIES=1, STRIPE_CIRCUIT_BREAKER_FAILURES=2,
+            STRIPE_CIRCUIT_BREAKER_RESET_SECONDS=30)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        stripe_gateway.configure()
+        stripe_gateway.circuit_breaker.reset()
+
+        self.server = FakeStripeServer().start()
+        self.addCleanup(self.server.stop)
+        api_base_patch = patch.object(stripe, 'api_base', self.server.url)
+        api_base_patch.start()
+        self.addCleanup(api_base_patch.stop)
+
+        self.session_id = stripe_gateway.create_checkout_session(
+            mode='payment', success_url='https://example.com/success', metadata={'cart_id': '7'}).id
+
+    def expire_open_circuit(self):
+        stripe_gateway.circuit_breaker.opened_at -= 31
+
+    def test_calls_reuse_one_connection(self):
+        """Test that repeated calls travel over the one kept-alive connection"""
+        for _ in range(3):
+            session = stripe_gateway.retrieve_checkout_session(self.session_id)
+            self.assertEqual(session.id, self.session_id)
+            self.assertEqual(session.metadata['cart_id'], '7')
+
+        self.assertEqual(self.server.request_count, 4)
+        self.assertEqual(self.server.connection_count, 1)
+
+    def test_server_errors_are_retried(self):
+        """Test that a 500 is retried and the retry's success is returned without counting a failure"""
+        self.server.fail_next()
+
+        session = stripe_gateway.retrieve_checkout_session(self.session_id)
+
+        self.assertEqual(session.id, self.session_id)
+        self.assertEqual(self.server.request_count, 3)
+        self.assertEqual(stripe_gateway.circuit_breaker.failure_count, 0)
+
+    def test_client_errors_do_not_open_circuit(self):
+        """Test that Stripe answering with a client error does not count as Stripe failing"""
+        for _ in range(3):
+            with self.assertRaises(stripe.error.InvalidRequestError):
+                stripe_gateway.retrieve_checkout_session('cs_test_missing')
+
+        self.assertFalse(stripe_gateway.circuit_breaker.is_open())
+        self.assertEqual(self.server.request_count, 4)
+
+    def test_timeouts_open_circuit_and_trial_call_closes_it(self):
+        """Test that consecutive timeouts open the circuit, open calls fail fast, and a good trial closes it"""
+        self.server.latency = 0.5
+        for _ in range(2):
+            with self.assertRaises(stripe.error.APIConnectionError):
+                stripe_gateway.retrieve_checkout_session(self.session_id)
+        self.assertTrue(stripe_gateway.circuit_breaker.is_open())
+        request_count = self.server.request_count
+        self.assertEqual(request_count, 5)
+
+        with self.assertRaises(stripe_gateway.CircuitOpenError):
+            stripe_gateway.create_checkout_session(mode='payment')
+        self.assertEqual(self.server.request_count, request_count)
+
+        self.server.latency = 0
+        self.expire_open_circuit()
+        self.assertEqual(stripe_gateway.retrieve_checkout_session(self.session_id).id, self.session_id)
+        self.assertFalse(stripe_gateway.circuit_breaker.is_open())
+
+    def test_failed_trial_call_reopens_circuit(self):
+        """Test that a failing trial call opens the circuit again for another reset period"""
+        self.server.fail_next(4)
+        for _ in range(2):
+            with self.assertRaises(stripe.error.APIError):
+                stripe_gateway.retrieve_checkout_session(self.session_id)
+
+        self.expire_open_circuit()
+        self.server.fail_next(2)
+        with self.assertRaises(stripe.error.APIError):
+            stripe_gateway.retrieve_checkout_session(self.session_id)
+
+        self.assertTrue(stripe_gateway.circuit_breaker.is_open())
+        with self.assertRaises(stripe_gateway.CircuitOpenError):
+            stripe_gateway.retrieve_checkout_session(self.session_id)
+
+    def test_checkout_session_success_reports_open_circuit(self):
+        """Test that the success endpoint answers stripe-error without calling Stripe while the circuit is open"""
+        self.server.fail_next(4)
+        for _ in range(2):
+            with self.assertRaises(stripe.error.APIError):
+                stripe_gateway.retrieve_checkout_session(self.session_id)
+        request_count = self.server.request_count
+
+        response = self.client.get(f'/order/checkout-session-success?session_id={self.session_id}')
+
+        unittest_utilities.validate_response_is_OK_and_JSON(self, response)
+        data = json.loads(response.content.decode('utf8'))
+        self.assertEqual(data['checkout_session_success'], 'error')
+        self.assertEqual(data['errors']['error'], 'stripe-error')
+        self.assertEqual(self.server.request_count, request_count)
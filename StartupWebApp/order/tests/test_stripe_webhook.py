@@ -1,10 +1,12 @@
 # Unit tests for Stripe Webhook Handler endpoint
 
 import json
+from io import StringIO
 from unittest.mock import patch, MagicMock
 from decimal import Decimal
 
 from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+from django.core.management import call_command
 from django.utils import timezone
 from django.contrib.auth.models import User, Group
 
@@ -14,7 +16,7 @@ from order.models import (
     Sku, Skuprice, Skutype, Skuinventory,
     Shippingmethod,
     Order, Status,
-    Orderconfiguration, Orderpayment
+    Orderconfiguration, Orderpayment, Webhookevent
 )
 from user.models import Member, Termsofuse, Emailtype, Email, Emailstatus
 
@@ -261,12 +263,15 @@ class StripeWebhookHandlerTest(PostgreSQLTestCase):
             HTTP_STRIPE_SIGNATURE='valid_sig'
         )
 
-        # Should return 200 - order already exists, nothing to do
+        # Should return 200 - the event is stored for the worker
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.content.decode('utf8'))
         self.assertEqual(data['received'], True)
-        self.assertIn('order_identifier', data)
-        self.assertEqual(data['order_identifier'], 'TEST-ORDER-001')
+
+        # Order already exists, so processing creates nothing
+        call_command('process_webhook_events', '--once', stdout=StringIO())
+        self.assertEqual(Webhookevent.objects.get(stripe_event_id='evt_test_123').status, 'processed')
+        self.assertEqual(list(Order.objects.values_list('identifier', flat=True)), ['TEST-ORDER-001'])
 
     @patch('stripe.Webhook.construct_event')
     def test_webhook_handles_checkout_session_expired(self, mock_construct_event):
@@ -416,11 +421,14 @@ class StripeWebhookHandlerTest(PostgreSQLTestCase):
             HTTP_STRIPE_SIGNATURE='valid_sig'
         )
 
-        # Should return 200 and create order
+        # Should return 200 and leave the order to the worker
         self.assertEqual(response.status_code, 200)
         data = json.loads(response.content.decode('utf8'))
         self.assertEqual(data['received'], True)
-        self.assertIn('order_identifier', data)
+        self.assertEqual(Order.objects.count(), 0)
+
+        call_command('process_webhook_events', '--once', stdout=StringIO())
+        self.assertEqual(Webhookevent.objects.get(stripe_event_id='evt_test_create_order').status, 'processed')
 
         # Verify order was created
         self.assertEqual(Order.objects.count(), 1)
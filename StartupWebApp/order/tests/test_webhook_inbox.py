@@ -0,0 +1,161 @@
+# Unit tests for the Stripe webhook inbox and the process_webhook_events worker
+
+import json
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.http import JsonResponse
+from django.utils import timezone
+
+from order.models import Webhookevent
+from order.utilities import webhook_inbox
+
+from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+
+
+def expired_event(event_id):
+    return {'id': event_id, 'type': 'checkout.session.expired', 'data': {'object': {'id': f'cs_{event_id}'}}}
+
+
+class WebhookInboxTest(PostgreSQLTestCase):
+    """Test storing, claiming, retrying and dead-lettering webhook events"""
+
+    def make_due(self, stripe_event_id):
+        Webhookevent.objects.filter(stripe_event_id=stripe_event_id).update(
+            next_attempt_date_time=timezone.now() - timedelta(seconds=1))
+
+    def process_due(self, handler):
+        return [webhook_inbox.process_event(webhook_event, handler)
+                for webhook_event in webhook_inbox.claim_due_events(10)]
+
+    @patch('stripe.Webhook.construct_event')
+    def test_webhook_stores_redelivered_event_once(self, mock_construct_event):
+        """Test that the endpoint acknowledges each delivery but stores a redelivered event once"""
+        payload = json.dumps(expired_event('evt_redelivered'))
+
+        for _ in range(2):
+            response = self.client.post(
+                '/order/stripe-webhook', data=payload, content_type='application/json',
+                HTTP_STRIPE_SIGNATURE='valid_sig')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(json.loads(response.content.decode('utf8')), {'received': True})
+
+        webhook_event = Webhookevent.objects.get()
+        self.assertEqual(webhook_event.stripe_event_id, 'evt_redelivered')
+        self.assertEqual(webhook_event.event_type, 'checkout.session.expired')
+        self.assertEqual(webhook_event.status, 'pending')
+        self.assertEqual(webhook_event.payload, expired_event('evt_redelivered'))
+
+    def test_server_errors_are_retried_with_backoff(self):
+        """Test that a 5xx result schedules a retry, and the retry can succeed"""
+        webhook_inbox.enqueue(expired_event('evt_retry'))
+
+        self.assertEqual(self.process_due(lambda event: JsonResponse({'error': 'processing-error'}, status=500)),
+                         ['pending'])
+        webhook_event = Webhookevent.objects.get()
+        self.assertEqual(webhook_event.attempts, 1)
+        self.assertIn('processing-error', webhook_event.last_error)
+        self.assertGreater(webhook_event.next_attempt_date_time,
+                           timezone.now() + timedelta(seconds=webhook_inbox.RETRY_BASE_SECONDS / 2 - 1))
+        self.assertEqual(webhook_inbox.claim_due_events(10), [])
+
+        self.make_due('evt_retry')
+        self.assertEqual(self.process_due(lambda event: JsonResponse({'received': True})), ['processed'])
+        webhook_event.refresh_from_db()
+        self.assertEqual(webhook_event.attempts, 2)
+        self.assertIsNone(webhook_event.last_error)
+        self.assertIsNotNone(webhook_event.processed_date_time)
+
+    def test_failed_events_are_dead_lettered(self):
+        """Test that 4xx and 5xx results are retried, and dead after their last attempt"""
+        def client_error_handler(event):
+            return JsonResponse({'error': 'no-cart-id'}, status=400)
+
+        webhook_inbox.enqueue(expired_event('evt_client_error'))
+        self.assertEqual(self.process_due(client_error_handler), ['pending'])
+        Webhookevent.objects.filter(stripe_event_id='evt_client_error').update(
+            attempts=webhook_inbox.MAX_CLIENT_ERROR_ATTEMPTS - 1)
+        self.make_due('evt_client_error')
+        self.assertEqual(self.process_due(client_error_handler), ['dead'])
+
+        webhook_inbox.enqueue(expired_event('evt_exception'))
+        Webhookevent.objects.filter(stripe_event_id='evt_exception').update(
+            attempts=webhook_inbox.MAX_ATTEMPTS - 1)
+
+        def failing_handler(event):
+            raise RuntimeError('SMTP connection refused')
+
+        self.assertEqual(self.process_due(failing_handler), ['dead'])
+        webhook_event = Webhookevent.objects.get(stripe_event_id='evt_exception')
+        self.assertEqual(webhook_event.attempts, webhook_inbox.MAX_ATTEMPTS)
+        self.assertEqual(webhook_event.last_error, 'SMTP connection refused')
+
+    def test_lapsed_claim_is_reclaimed_and_stale_result_ignored(self):
+        """Test that a claim is exclusive until its lease lapses, and the original worker's late result is dropped"""
+        webhook_inbox.enqueue(expired_event('evt_lease'))
+        [stale_claim] = webhook_inbox.claim_due_events(10)
+        self.assertEqual(webhook_inbox.claim_due_events(10), [])
+
+        self.make_due('evt_lease')
+        [new_claim] = webhook_inbox.claim_due_events(10)
+        self.assertEqual(new_claim.attempts, 2)
+        webhook_inbox.process_event(stale_claim, lambda event: JsonResponse({'error': 'bad'}, status=400))
+        self.assertEqual(Webhookevent.objects.get().status, 'processing')
+
+        webhook_inbox.process_event(new_claim, lambda event: JsonResponse({'received': True}))
+        self.assertEqual(Webhookevent.objects.get().status, 'processed')
+
+    def test_claim_skips_events_locked_by_another_worker(self):
+        """Test that an event row locked by another worker's transaction is skipped, not waited for"""
+        webhook_inbox.enqueue(expired_event('evt_locked'))
+        webhook_inbox.enqueue(expired_event('evt_free'))
+        locked = threading.Event()
+        release = threading.Event()
+
+        def other_worker():
+            try:
+                with transaction.atomic():
+                    Webhookevent.objects.select_for_update().get(stripe_event_id='evt_locked')
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            claimed = webhook_inbox.claim_due_events(10)
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual([webhook_event.stripe_event_id for webhook_event in claimed], ['evt_free'])
+
+    def test_command_processes_events_and_reports_stats(self):
+        """Test that the worker processes due events and reports queue depth and latency"""
+        webhook_inbox.enqueue(expired_event('evt_processed'))
+        webhook_inbox.enqueue(expired_event('evt_waiting'))
+        Webhookevent.objects.filter(stripe_event_id='evt_waiting').update(
+            next_attempt_date_time=timezone.now() + timedelta(minutes=5))
+
+        output = StringIO()
+        with patch('order.management.commands.process_webhook_events.close_old_connections') as mock_close:
+            call_command('process_webhook_events', '--once', stdout=output)
+        self.assertIn('Done: 1 processed, 0 pending, 0 dead', output.getvalue())
+        # Once before the batch and once before the poll that found nothing due
+        self.assertEqual(mock_close.call_count, 2)
+
+        stats = webhook_inbox.get_queue_stats()
+        self.assertEqual(stats['queue_depth'], 1)
+        self.assertEqual(stats['processed_count'], 1)
+        self.assertGreaterEqual(stats['max_latency_seconds'], 0)
+
+        output = StringIO()
+        call_command('process_webhook_events', '--stats', stdout=output)
+        self.assertIn('depth=1 ', output.getvalue())
+        self.assertIn('processed_last_hour=1 ', output.getvalue())
@@ -5,12 +5,16 @@ urlpatterns = [
     path('', views.index, name='index'),
 
     path('products', views.products, name='products'),
+    path('products/batch', views.products_batch, name='products_batch'),
+    path('products-page', views.products_page, name='products_page'),
+    path('search', views.search, name='search'),
     # matches for all character and digit product identifiers
     re_path(r'^product/(?P<product_identifier>[a-zA-Z\d]+$)', views.product, name='product'),
 
     path('cart-items', views.cart_items, name='cart_items'),
     path('cart-shipping-methods', views.cart_shipping_methods, name='cart_shipping_methods'),
     path('cart-totals', views.cart_totals, name='cart_totals'),
+    path('cart-snapshot', views.cart_snapshot, name='cart_snapshot'),
 
     path('cart-update-sku-quantity',
          views.cart_update_sku_quantity,
@@ -22,12 +26,14 @@ urlpatterns = [
     path('cart-delete-cart', views.cart_delete_cart, name='cart_delete_cart'),
 
     path('cart-add-product-sku', views.cart_add_product_sku, name='cart_add_product_sku'),
+    path('cart-apply', views.cart_apply, name='cart_apply'),
 
     path('checkout-allowed', views.checkout_allowed, name='checkout_allowed'),
 
     path('confirm-items', views.confirm_items, name='confirm_items'),
     path('confirm-shipping-method', views.confirm_shipping_method, name='confirm_shipping_method'),
     path('confirm-totals', views.confirm_totals, name='confirm_totals'),
+    path('confirm-snapshot', views.confirm_snapshot, name='confirm_snapshot'),
 
     path('create-checkout-session', views.create_checkout_session, name='create_checkout_session'),
     path('checkout-session-success', views.checkout_session_success, name='checkout_session_success'),
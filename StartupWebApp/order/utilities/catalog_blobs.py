@@ -0,0 +1,227 @@
+"""
+Database store of pre-encoded catalog JSON.
+
+The products listing and every product detail payload are stored already
+encoded, byte for byte as JsonResponse would encode them (Catalogpayload.body),
+so a request can copy them straight into an HttpResponse without building dicts
+or running the JSON encoder. catalog_cache keeps the hot copies in the shared cache; this store is
+what the cache falls back to instead of rebuilding from the catalog tables.
+
+Blobs are maintained incrementally: order/signals.py deletes the listing blob
+and the blobs of the affected products after a catalog write commits, and the
+next read rebuilds just those. Rebuilding everything is
+`python manage.py rebuild_catalog_payloads`.
+
+A read that races a catalog write must not store a payload built from the old
+rows. Builders therefore claim their row before reading the catalog and only
+fill it in if the row still exists afterwards - an invalidation committed in
+between deletes the claimed row, so the stale payload is served once and
+discarded.
+"""
+
+import json
+import logging
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+
+from order.models import Catalogpayload, Product
+from order.utilities import catalog_utils
+
+logger = logging.getLogger(__name__)
+
+PRODUCTS_KEY = 'products'
+PRODUCT_BATCH_SIZE = 500
+
+
+def product_key(product_id):
+    return f'product:{product_id}'
+
+
+def encode_json(data):
+    """Encode data exactly as JsonResponse does."""
+    return json.dumps(data, cls=DjangoJSONEncoder).encode('utf-8')
+
+
+def encode_json_object(items):
+    """
+    Encode (key, value) pairs as a JSON object, splicing in pre-encoded values.
+
+    Values of type bytes are treated as already-encoded JSON and copied as-is;
+    everything else goes through encode_json(). The result matches what
+    JsonResponse produces for the equivalent dict.
+
+    Args:
+        items (list): (key, value) pairs in output order
+
+    Returns:
+        bytes: Encoded JSON object
+    """
+    members = []
+    for key, value in items:
+        encoded_value = value if isinstance(value, bytes) else encode_json(value)
+        members.append(encode_json(key) + b': ' + encoded_value)
+    return b'{' + b', '.join(members) + b'}'
+
+
+def _build_and_store(key, product_id, builder):
+    payload, created = Catalogpayload.objects.get_or_create(
+        key=key,
+        defaults={'product_id': product_id, 'updated_date_time': timezone.now()},
+    )
+    body = encode_json(builder())
+    # Only fill the claimed row - if an invalidation deleted it meanwhile, this body may be stale
+    Catalogpayload.objects.filter(id=payload.id).update(body=body, updated_date_time=timezone.now())
+    return body
+
+
+def get_products_json():
+    """
+    Encoded products listing (catalog_utils.get_products_data()).
+
+    Returns:
+        bytes: JSON object keyed by product identifier
+    """
+    body = Catalogpayload.objects.filter(key=PRODUCTS_KEY).values_list('body', flat=True).first()
+    if body is not None:
+        return bytes(body)
+    return _build_and_store(PRODUCTS_KEY, None, catalog_utils.get_products_data)
+
+
+def get_product_json(product_identifier):
+    """
+    Encoded product detail payload (catalog_utils.get_product_data()).
+
+    Args:
+        product_identifier (str): Product.identifier
+
+    Returns:
+        bytes: JSON object for product_data
+
+    Raises:
+        ObjectDoesNotExist: If the product (or a SKU price) does not exist
+    """
+    body = Catalogpayload.objects.filter(
+        product__identifier=product_identifier).values_list('body', flat=True).first()
+    if body is not None:
+        return bytes(body)
+    product_id = Product.objects.values_list('id', flat=True).get(identifier=product_identifier)
+    return _build_and_store(
+        product_key(product_id),
+        product_id,
+        lambda: catalog_utils.get_product_data(product_identifier),
+    )
+
+
+def get_product_jsons(product_identifiers):
+    """
+    Encoded product detail payloads of several products.
+
+    Stored blobs are read in one query; the missing ones are built together with
+    catalog_utils.get_products_detail_data() and stored the same way
+    get_product_json() stores a single blob.
+
+    Args:
+        product_identifiers (iterable): Product.identifier values
+
+    Returns:
+        dict: bytes by identifier; products without a payload (see get_product_json()) are left out
+    """
+    product_identifiers = set(product_identifiers)
+    product_jsons = {
+        product_identifier: bytes(body)
+        for product_identifier, body in Catalogpayload.objects.filter(
+            product__identifier__in=product_identifiers, body__isnull=False,
+        ).values_list('product__identifier', 'body')
+    }
+    missing_identifiers = product_identifiers - set(product_jsons)
+    if not missing_identifiers:
+        return product_jsons
+    missing_product_ids = dict(
+        Product.objects.filter(identifier__in=missing_identifiers).values_list('identifier', 'id'))
+    if not missing_product_ids:
+        return product_jsons
+
+    now = timezone.now()
+    Catalogpayload.objects.bulk_create(
+        [
+            Catalogpayload(key=product_key(product_id), product_id=product_id, updated_date_time=now)
+            for product_id in missing_product_ids.values()
+        ],
+        ignore_conflicts=True,
+    )
+    claimed_payload_ids = dict(Catalogpayload.objects.filter(
+        product_id__in=missing_product_ids.values()).values_list('product_id', 'id'))
+    claimed_payloads = []
+    for product_identifier, product_data in catalog_utils.get_products_detail_data(missing_product_ids).items():
+        body = encode_json(product_data)
+        product_jsons[product_identifier] = body
+        payload_id = claimed_payload_ids.get(missing_product_ids[product_identifier])
+        if payload_id is not None:
+            claimed_payloads.append(Catalogpayload(id=payload_id, body=body, updated_date_time=timezone.now()))
+    # As in _build_and_store, rows deleted by an invalidation meanwhile are not recreated
+    Catalogpayload.objects.bulk_update(claimed_payloads, ['body', 'updated_date_time'])
+    return product_jsons
+
+
+def iter_product_jsons():
+    """
+    Encoded product detail payloads of every product, in id order.
+
+    Stored blobs are read a batch at a time; only missing blobs are rebuilt.
+    Products without a payload (see get_product_json()) are skipped.
+
+    Yields:
+        tuple: (product identifier, bytes)
+    """
+    product_ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+    for start in range(0, len(product_ids), PRODUCT_BATCH_SIZE):
+        batch = Product.objects.filter(id__in=product_ids[start:start + PRODUCT_BATCH_SIZE]).order_by('id')
+        stored_bodies = dict(Catalogpayload.objects.filter(
+            product__in=batch, body__isnull=False).values_list('product_id', 'body'))
+        for product_id, product_identifier in batch.values_list('id', 'identifier'):
+            if product_id in stored_bodies:
+                body = bytes(stored_bodies[product_id])
+            else:
+                try:
+                    body = get_product_json(product_identifier)
+                except ObjectDoesNotExist as e:
+                    logger.warning(f'Skipping catalog payload for product {product_identifier}: {e}')
+                    continue
+            yield product_identifier, body
+
+
+def invalidate(product_ids=None):
+    """
+    Delete the listing blob and the blobs of the given products.
+
+    Args:
+        product_ids (iterable): Product ids whose payloads changed, or None for every product
+    """
+    if product_ids is None:
+        Catalogpayload.objects.all().delete()
+    else:
+        Catalogpayload.objects.filter(Q(key=PRODUCTS_KEY) | Q(product_id__in=list(product_ids))).delete()
+
+
+def rebuild_all():
+    """
+    Rebuild the listing blob and every product blob.
+
+    Returns:
+        int: Number of product blobs written
+    """
+    invalidate()
+    get_products_json()
+    product_count = 0
+    for product_identifier in Product.objects.order_by('id').values_list('identifier', flat=True):
+        try:
+            get_product_json(product_identifier)
+        except ObjectDoesNotExist as e:
+            # Deleted while rebuilding, or a SKU without a price - the view reports these as not found
+            logger.warning(f'Skipping catalog payload for product {product_identifier}: {e}')
+            continue
+        product_count += 1
+    return product_count
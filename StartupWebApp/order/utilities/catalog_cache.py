@@ -0,0 +1,280 @@
+"""
+Versioned catalog cache shared by every gunicorn worker.
+
+The products listing and product detail payloads are identical for every
+visitor, so their encoded JSON (see catalog_blobs) is cached in the 'shared' cache (see settings.CACHES) under
+keys that embed a global catalog version number:
+
+    catalog:<version>:products
+    catalog:<version>:product:<identifier>
+
+Any write to a catalog model bumps the version (see order/signals.py), which
+makes every previously cached payload unreachable at once. Stale entries are
+never deleted explicitly - they simply age out of the cache.
+
+The catalog version doubles as the ETag for the catalog endpoints, and the
+time of the last bump (stored beside it) is their Last-Modified, so any catalog
+change - a title, an image, inventory, not only a price - moves both. A
+revalidation request is answered with a 304 without touching the database.
+
+The version and bump time live in the shared cache rather than in process
+memory so a bump made by one worker (or an admin edit on another ECS task) is
+seen by all. Each process keeps a copy of them, as a LocalRegistry does, and
+trusts the copy for settings.LOCAL_REGISTRY_CHECK_INTERVAL seconds; a bump made
+in this process is seen at once, one made elsewhere within that interval.
+
+In production the shared cache is a database table, so every cache read is a
+query. Between version checks a warm request costs:
+
+    products or product, 200 response       1 query (the payload)
+    revalidation answered with a 304        none
+    version check, once per interval        1 query more
+
+Payloads are kept for CATALOG_PAYLOAD_TIMEOUT only, so the entries left behind
+by old versions expire (and are culled first) instead of filling the table.
+
+Products page and search results are keyed by whatever a visitor typed, so they
+are not written to the shared cache, where every new query would be an INSERT
+on a GET. Each process keeps the LOCAL_RESULTS_SIZE most recently used instead
+(see get_or_build_local()), keyed by the catalog version and the normalized
+query, and drops them all when the version moves.
+"""
+
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import caches
+
+from order.utilities import catalog_blobs, catalog_utils, search_utils
+
+CATALOG_CACHE_ALIAS = 'shared'
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_MODIFIED_KEY = 'catalog:modified'
+CATALOG_PAYLOAD_TIMEOUT = 60 * 60  # 1 hour, in seconds
+LOCAL_RESULTS_SIZE = 256
+
+# modified is the time.time() of the last bump, checked_at the time.monotonic() of the last check
+CatalogState = namedtuple('CatalogState', ['version', 'modified', 'checked_at'])
+
+# This process's copy of the shared catalog state
+_local_state = None
+
+# This process's most recently used query results at _local_results_version: name -> payload, oldest first
+_local_results = OrderedDict()
+_local_results_version = None
+_local_results_lock = threading.Lock()
+
+
+def get_catalog_cache():
+    return caches[CATALOG_CACHE_ALIAS]
+
+
+def _initial_catalog_version():
+    # Seed from the clock so a flushed or restarted cache never hands out a
+    # version number that older payloads may still be stored under
+    return int(time.time() * 1000)
+
+
+def get_catalog_state():
+    """
+    Return the current catalog version and bump time, initializing them if the cache is empty.
+
+    The shared state is read, in one round trip, at most once per
+    settings.LOCAL_REGISTRY_CHECK_INTERVAL seconds; in between, this process's
+    copy is returned.
+
+    Returns:
+        CatalogState: Current version and bump time
+    """
+    global _local_state
+    local_state = _local_state
+    now = time.monotonic()
+    if local_state is not None and now - local_state.checked_at < settings.LOCAL_REGISTRY_CHECK_INTERVAL:
+        return local_state
+
+    cache = get_catalog_cache()
+    shared_state = cache.get_many([CATALOG_VERSION_KEY, CATALOG_MODIFIED_KEY])
+    version = shared_state.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, _initial_catalog_version(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    modified = shared_state.get(CATALOG_MODIFIED_KEY)
+    if modified is None:
+        # Unknown after a flush - assume a change just now, so clients revalidate fully
+        cache.add(CATALOG_MODIFIED_KEY, time.time(), timeout=None)
+        modified = cache.get(CATALOG_MODIFIED_KEY)
+    _local_state = CatalogState(version, modified, now)
+    return _local_state
+
+
+def get_catalog_version():
+    """
+    Return the current catalog version, initializing it if the cache is empty.
+
+    Returns:
+        int: Current catalog version number
+    """
+    return get_catalog_state().version
+
+
+def bump_catalog_version():
+    """
+    Invalidate every cached catalog payload by moving to a new catalog version.
+
+    Returns:
+        int: New catalog version number
+    """
+    global _local_state
+    cache = get_catalog_cache()
+    try:
+        version = cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        # Version key missing (cache flushed or evicted) - start a fresh sequence
+        version = _initial_catalog_version()
+        cache.set(CATALOG_VERSION_KEY, version, timeout=None)
+    # Recorded after the version moves, so a reader never pairs the new time with old payloads
+    modified = time.time()
+    cache.set(CATALOG_MODIFIED_KEY, modified, timeout=None)
+    _local_state = CatalogState(version, modified, time.monotonic())
+    return version
+
+
+def get_or_build(name, builder):
+    """
+    Return the cached payload for name at the current catalog version, building it on a miss.
+
+    Exceptions raised by builder (e.g. ObjectDoesNotExist) propagate and nothing is cached.
+
+    Args:
+        name (str): Payload name, unique within a catalog version
+        builder (callable): Zero-argument function returning the payload
+
+    Returns:
+        The cached or freshly built payload
+    """
+    cache = get_catalog_cache()
+    key = f'catalog:{get_catalog_version()}:{name}'
+    payload = cache.get(key)
+    if payload is None:
+        payload = builder()
+        cache.set(key, payload, CATALOG_PAYLOAD_TIMEOUT)
+    return payload
+
+
+def get_or_build_local(name, builder):
+    """
+    Like get_or_build(), but cached in this process only, in a LOCAL_RESULTS_SIZE-entry LRU.
+
+    For payloads keyed by visitor input, which would otherwise grow the shared cache without bound.
+
+    Args:
+        name (hashable): Payload name, unique within a catalog version
+        builder (callable): Zero-argument function returning the payload
+
+    Returns:
+        The cached or freshly built payload
+    """
+    global _local_results_version
+    version = get_catalog_version()
+    with _local_results_lock:
+        if version == _local_results_version and name in _local_results:
+            _local_results.move_to_end(name)
+            return _local_results[name]
+
+    payload = builder()
+    with _local_results_lock:
+        if version != _local_results_version:
+            # Every result kept so far was built from another catalog version
+            _local_results.clear()
+            _local_results_version = version
+        _local_results[name] = payload
+        while len(_local_results) > LOCAL_RESULTS_SIZE:
+            _local_results.popitem(last=False)
+    return payload
+
+
+def get_products_json():
+    """Cached equivalent of catalog_blobs.get_products_json()."""
+    return get_or_build('products', catalog_blobs.get_products_json)
+
+
+def get_product_json(product_identifier):
+    """Cached equivalent of catalog_blobs.get_product_json()."""
+    return get_or_build(
+        f'product:{product_identifier}',
+        lambda: catalog_blobs.get_product_json(product_identifier),
+    )
+
+
+def get_product_jsons(product_identifiers):
+    """
+    Cached equivalent of catalog_blobs.get_product_jsons().
+
+    Shares cache entries with get_product_json(), and reads and fills them with
+    one get_many()/set_many() round trip each.
+    """
+    cache = get_catalog_cache()
+    key_prefix = f'catalog:{get_catalog_version()}:product:'
+    product_jsons = {
+        key[len(key_prefix):]: payload
+        for key, payload in cache.get_many([key_prefix + identifier for identifier in product_identifiers]).items()
+    }
+    missing_identifiers = [identifier for identifier in product_identifiers if identifier not in product_jsons]
+    if missing_identifiers:
+        built_product_jsons = catalog_blobs.get_product_jsons(missing_identifiers)
+        cache.set_many(
+            {key_prefix + identifier: payload for identifier, payload in built_product_jsons.items()},
+            CATALOG_PAYLOAD_TIMEOUT,
+        )
+        product_jsons.update(built_product_jsons)
+    return product_jsons
+
+
+def get_products_page(sort, min_price, max_price, inventory_identifier, after, limit):
+    """Equivalent of catalog_utils.get_products_page(), cached in this process."""
+    return get_or_build_local(
+        ('products_page', sort, min_price, max_price, inventory_identifier, after, limit),
+        lambda: catalog_utils.get_products_page(sort, min_price, max_price, inventory_identifier, after, limit),
+    )
+
+
+def normalize_search_query(query_text):
+    """Lowercase and collapse whitespace - neither changes what websearch_to_tsquery matches."""
+    return ' '.join(query_text.lower().split())
+
+
+def search_products(query_text, limit):
+    """Equivalent of search_utils.search_products(), cached in this process by normalized query."""
+    query_text = normalize_search_query(query_text)
+    return get_or_build_local(
+        ('search', query_text, limit),
+        lambda: search_utils.search_products(query_text, limit),
+    )
+
+
+def get_catalog_etag():
+    """ETag for the products listing - changes whenever the catalog version does."""
+    return f'catalog-{get_catalog_version()}'
+
+
+def get_product_etag(product_identifier):
+    """ETag for a product detail response."""
+    return f'catalog-{get_catalog_version()}-{product_identifier}'
+
+
+def get_catalog_last_modified():
+    """Last-Modified for the products listing - the time of the last catalog version bump."""
+    return datetime.fromtimestamp(get_catalog_state().modified, tz=timezone.utc)
+
+
+def get_product_last_modified(product_identifier):
+    """
+    Last-Modified for a product detail response.
+
+    Versions are catalog-wide, so this is the catalog's Last-Modified: a change
+    to another product makes clients refetch this one, never the reverse.
+    """
+    return get_catalog_last_modified()
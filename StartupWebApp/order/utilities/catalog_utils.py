@@ -0,0 +1,251 @@
+"""
+Catalog read helpers for the product browsing endpoints.
+
+These functions build the payloads returned by order.views.products and
+order.views.product straight from the database. Callers that can tolerate
+cached data should go through order.utilities.catalog_cache instead.
+
+The products listing used to run several latest-price lookups per SKU plus an
+exists()/get() pair per product for the main image. get_products_data() builds
+the same payload from a fixed number of queries regardless of catalog size:
+
+1. Products, with their denormalized price_low/price_high columns
+2. Main product images (one prefetch query)
+
+Prices come from Skucurrentprice (Sku.current_price) and the Product price
+range columns derived from it, which are kept in step with the Skuprice
+history, so no query sorts the price history.
+"""
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Exists, OuterRef, Prefetch, Q
+
+from order.models import Product, Productimage, Productsku, Productvideo, Skuimage
+
+
+def get_products_data():
+    """
+    Build the products listing payload keyed by product identifier.
+
+    Returns:
+        dict: {identifier: product_data} in the shape returned by order.views.products
+    """
+    products = Product.objects.prefetch_related(main_images_prefetch()).order_by('id')
+
+    products_dict = {}
+    for product in products:
+        products_dict[product.identifier] = get_product_summary_data(product)
+    return products_dict
+
+
+def main_images_prefetch():
+    """Prefetch of each product's main image(s) into product.main_images."""
+    return Prefetch(
+        'productimage_set',
+        queryset=Productimage.objects.filter(main_image=True).order_by('id'),
+        to_attr='main_images',
+    )
+
+
+def get_product_summary_data(product):
+    """Listing entry for a product fetched with main_images_prefetch()."""
+    product_data = {}
+    product_data['title'] = product.title
+    product_data['title_url'] = product.title_url
+    product_data['identifier'] = product.identifier
+    product_data['headline'] = product.headline
+    product_data['description_part_1'] = product.description_part_1
+    product_data['description_part_2'] = product.description_part_2
+    product_data['price_low'] = product.price_low
+    product_data['price_high'] = product.price_high
+    product_data['product_image_url'] = product.main_images[0].image_url if product.main_images else None
+    return product_data
+
+
+# Sort parameter -> (Product field, descending). 'price' sorts on the lowest SKU price.
+PRODUCTS_PAGE_SORTS = {
+    'title': ('title', False),
+    '-title': ('title', True),
+    'price': ('price_low', False),
+    '-price': ('price_low', True),
+}
+
+
+def get_products_page(sort='title', min_price=None, max_price=None, inventory_identifier=None, after=None,
+                      limit=20):
+    """
+    Build one page of the products listing using keyset (cursor) pagination.
+
+    Pages are read in (sort field, id) order starting after the given position, so
+    the cost of a page does not depend on how deep into the listing it is. Backed by
+    the idx_product_title_id and idx_product_price_low_id indexes.
+
+    Args:
+        sort (str): Key of PRODUCTS_PAGE_SORTS
+        min_price (Decimal): Only products whose lowest SKU price is at least this
+        max_price (Decimal): Only products whose lowest SKU price is at most this
+        inventory_identifier (str): Only products with a SKU in this Skuinventory
+        after (tuple): (sort field value, product id) of the last product on the previous page
+        limit (int): Maximum number of products to return
+
+    Returns:
+        tuple: (list of product_data, position to pass as after for the next page or None)
+    """
+    field, descending = PRODUCTS_PAGE_SORTS[sort]
+    products = Product.objects.all()
+    if field == 'price_low' or min_price is not None or max_price is not None:
+        # Products without a priced SKU can't be placed in a price ordering
+        products = products.exclude(price_low=None)
+    if min_price is not None:
+        products = products.filter(price_low__gte=min_price)
+    if max_price is not None:
+        products = products.filter(price_low__lte=max_price)
+    if inventory_identifier is not None:
+        products = products.filter(Exists(Productsku.objects.filter(
+            product=OuterRef('pk'), sku__sku_inventory__identifier=inventory_identifier)))
+    if after is not None:
+        after_value, after_id = after
+        comparison = 'lt' if descending else 'gt'
+        products = products.filter(
+            Q(**{f'{field}__{comparison}': after_value}) | Q(**{field: after_value, f'id__{comparison}': after_id}))
+    ordering = (f'-{field}', '-id') if descending else (field, 'id')
+
+    products = list(products.prefetch_related(main_images_prefetch()).order_by(*ordering)[:limit + 1])
+    next_position = None
+    if len(products) > limit:
+        products = products[:limit]
+        next_position = (getattr(products[-1], field), products[-1].id)
+    return [get_product_summary_data(product) for product in products], next_position
+
+
+def product_detail_prefetches():
+    """
+    Prefetches that load everything build_product_data() reads.
+
+    Four queries however many products and SKUs are fetched: images, videos,
+    SKUs (joined to inventory status and current price) and SKU images.
+    """
+    return [
+        Prefetch(
+            'productimage_set',
+            queryset=Productimage.objects.order_by('-main_image', 'id'),
+            to_attr='ordered_images',
+        ),
+        Prefetch(
+            'productvideo_set',
+            queryset=Productvideo.objects.order_by('-id'),
+            to_attr='ordered_videos',
+        ),
+        Prefetch(
+            'productsku_set',
+            queryset=Productsku.objects.select_related('sku__sku_inventory', 'sku__current_price').order_by('sku__id'),
+            to_attr='ordered_product_skus',
+        ),
+        Prefetch(
+            'ordered_product_skus__sku__skuimage_set',
+            queryset=Skuimage.objects.order_by('-main_image', 'id'),
+            to_attr='ordered_images',
+        ),
+    ]
+
+
+def get_product_data(product_identifier):
+    """
+    Build the product detail payload for a single product.
+
+    Runs five queries however many SKUs the product has: the product, its
+    images, its videos, its SKUs (joined to inventory status and current
+    price) and the images of those SKUs.
+
+    Args:
+        product_identifier (str): Product.identifier
+
+    Returns:
+        dict: product_data in the shape returned by order.views.product
+
+    Raises:
+        ObjectDoesNotExist: If the product (or a SKU price) does not exist
+    """
+    product = Product.objects.prefetch_related(*product_detail_prefetches()).get(identifier=product_identifier)
+    return build_product_data(product)
+
+
+def get_products_detail_data(product_identifiers):
+    """
+    Build the product detail payloads of several products in the same five queries as one.
+
+    Args:
+        product_identifiers (iterable): Product.identifier values
+
+    Returns:
+        dict: product_data by identifier; products that do not exist, or have a
+        SKU without a price, are left out
+    """
+    products = Product.objects.filter(identifier__in=list(product_identifiers)).prefetch_related(
+        *product_detail_prefetches())
+    products_detail_data = {}
+    for product in products:
+        try:
+            products_detail_data[product.identifier] = build_product_data(product)
+        except ObjectDoesNotExist:
+            continue
+    return products_detail_data
+
+
+def build_product_data(product):
+    """
+    Product detail payload of a product fetched with product_detail_prefetches().
+
+    Raises:
+        ObjectDoesNotExist: If a SKU of the product has no price
+    """
+    product_data = {}
+    product_data['title'] = product.title
+    product_data['title_url'] = product.title_url
+    product_data['identifier'] = product.identifier
+    product_data['headline'] = product.headline
+    product_data['description_part_1'] = product.description_part_1
+    product_data['description_part_2'] = product.description_part_2
+
+    product_images = {}
+    for product_image in product.ordered_images:
+        product_image_data = {}
+        product_image_data['image_url'] = product_image.image_url
+        product_image_data['main'] = product_image.main_image
+        product_image_data['caption'] = product_image.caption
+        product_images[product_image.id] = product_image_data
+    product_data['product_images'] = product_images
+
+    product_videos = {}
+    for product_video in product.ordered_videos:
+        product_video_data = {}
+        product_video_data['video_url'] = product_video.video_url
+        product_video_data['video_thumbnail_url'] = product_video.video_thumbnail_url
+        product_video_data['caption'] = product_video.caption
+        product_videos[product_video.id] = product_video_data
+    product_data['product_videos'] = product_videos
+
+    product_skus = {}
+    for product_sku in product.ordered_product_skus:
+        sku = product_sku.sku
+        product_sku_data = {}
+        product_sku_data['color'] = sku.color
+        product_sku_data['size'] = sku.size
+        product_sku_data['description'] = sku.description
+        product_sku_data['price'] = sku.current_price.price
+        product_sku_data['inventory_status_identifier'] = sku.sku_inventory.identifier
+        product_sku_data['inventory_status_title'] = sku.sku_inventory.title
+        product_sku_data['inventory_status_description'] = sku.sku_inventory.description
+
+        sku_images = {}
+        for sku_image in sku.ordered_images:
+            sku_image_data = {}
+            sku_image_data['image_url'] = sku_image.image_url
+            sku_image_data['main'] = sku_image.main_image
+            sku_image_data['caption'] = sku_image.caption
+            sku_images[sku_image.id] = sku_image_data
+        product_sku_data['sku_images'] = sku_images
+
+        product_skus[sku.id] = product_sku_data
+    product_data['skus'] = product_skus
+    return product_data
@@ -0,0 +1,79 @@
+"""
+Reuse of Stripe checkout sessions for an unchanged cart.
+
+A checkout session is identified by a hash of everything sent to Stripe to
+create it: the cart id, its line items and prices, the shipping line and the
+customer email. Time is divided into REUSE_WINDOW_SECONDS windows, and within
+a window one cart hash gets one checkout session:
+
+- the session's id and URL are kept in the 'shared' cache under
+
+      checkout_session:<hash>:<window>
+
+  until the window ends, so a repeat checkout click returns them without
+  calling Stripe
+- the session is created with the idempotency key <hash>:<window>, so
+  simultaneous clicks that both miss the cache, and stripe_gateway's retries,
+  get the same session back from Stripe instead of creating another
+
+Every session is created with expires_at MIN_PAYMENT_SECONDS plus
+EXPIRY_MARGIN_SECONDS after its window ends. That keeps the parameters
+identical for every request in the window, as Stripe requires for a reused
+idempotency key, and leaves a customer given a reused session at least
+MIN_PAYMENT_SECONDS to pay. The margin keeps a session created in the last
+seconds of a window above Stripe's 30-minute minimum despite request latency
+and clock skew. Any change to the cart or shipping method changes the hash and
+so creates a new session.
+"""
+
+import hashlib
+import json
+import time
+
+from django.core.cache import caches
+
+from order.utilities import stripe_gateway
+
+CHECKOUT_SESSION_CACHE_ALIAS = 'shared'
+REUSE_WINDOW_SECONDS = 30 * 60
+MIN_PAYMENT_SECONDS = 30 * 60  # Also Stripe's minimum checkout session lifetime
+EXPIRY_MARGIN_SECONDS = 5 * 60
+
+
+def get_session_cache():
+    return caches[CHECKOUT_SESSION_CACHE_ALIAS]
+
+
+def get_params_hash(session_params):
+    """SHA-256 of the checkout session parameters, independent of dict ordering."""
+    encoded_params = json.dumps(session_params, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded_params.encode('utf8')).hexdigest()
+
+
+def get_or_create_checkout_session(session_params):
+    """
+    The checkout session for these parameters in the current window, created if there is none.
+
+    Returns:
+        tuple: (session id, checkout URL)
+
+    Raises:
+        stripe.error.StripeError: If Stripe could not create the session
+    """
+    window = int(time.time() // REUSE_WINDOW_SECONDS)
+    window_end = (window + 1) * REUSE_WINDOW_SECONDS
+    session_key = f'{get_params_hash(session_params)}:{window}'
+    cache_key = f'checkout_session:{session_key}'
+
+    stored_session = get_session_cache().get(cache_key)
+    if stored_session is not None:
+        return stored_session['id'], stored_session['url']
+
+    session = stripe_gateway.create_checkout_session(
+        idempotency_key=session_key,
+        expires_at=window_end + MIN_PAYMENT_SECONDS + EXPIRY_MARGIN_SECONDS,
+        **session_params,
+    )
+    get_session_cache().set(
+        cache_key, {'id': session.id, 'url': session.url}, timeout=max(1, int(window_end - time.time())))
+    return session.id, session.url
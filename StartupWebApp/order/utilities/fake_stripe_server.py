@@ -0,0 +1,162 @@
+"""
+Local stand-in for the Stripe checkout session API.
+
+Serves just enough of Stripe's REST API for the stripe library to create and
+retrieve checkout sessions:
+
+    POST /v1/checkout/sessions
+    GET  /v1/checkout/sessions/<id>
+
+over HTTP/1.1 keep-alive, so tests and the benchmark command can exercise
+stripe_gateway's real HTTP client (connection reuse, timeouts, retries, the
+circuit breaker) without the network. Point the library at it with
+
+    with FakeStripeServer() as server:
+        stripe.api_base = server.url
+
+A create with an Idempotency-Key header already seen returns the session
+created for that key, as Stripe does. Latency and failures can be injected:
+`latency` seconds are slept before every response, and fail_next() answers
+the next requests with an error status. The server counts requests and TCP
+connections it has accepted.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+SESSIONS_PATH = '/v1/checkout/sessions'
+
+
+class FakeStripeRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        self.server.record('connection_count')
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, body):
+        content = json.dumps(body).encode('utf8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(content)))
+        self.send_header('Request-Id', f'req_fake_{self.server.request_count}')
+        self.end_headers()
+        self.wfile.write(content)
+
+    def send_error_json(self, status, error_type, message):
+        self.send_json(status, {'error': {'type': error_type, 'message': message}})
+
+    def respond(self, handler):
+        self.server.record('request_count')
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        failure_status = self.server.take_failure()
+        if failure_status is not None:
+            self.send_error_json(failure_status, 'api_error', 'Injected failure')
+        else:
+            handler()
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf8')
+        self.respond(lambda: self.create_session(body))
+
+    def do_GET(self):
+        self.respond(self.retrieve_session)
+
+    def create_session(self, body):
+        if self.path != SESSIONS_PATH:
+            self.send_error_json(404, 'invalid_request_error', f'Unrecognized request URL (POST: {self.path})')
+            return
+        params = dict(parse_qsl(body))
+        session = self.server.add_session(self.headers.get('Idempotency-Key'), {
+            'object': 'checkout.session',
+            'mode': params.get('mode'),
+            'customer_email': params.get('customer_email'),
+            'success_url': params.get('success_url'),
+            'cancel_url': params.get('cancel_url'),
+            'payment_status': 'unpaid',
+            'expires_at': int(params['expires_at']) if 'expires_at' in params else None,
+            'metadata': {key[len('metadata['):-1]: value
+                         for key, value in params.items() if key.startswith('metadata[')},
+        })
+        self.send_json(200, session)
+
+    def retrieve_session(self):
+        session_id = self.path[len(SESSIONS_PATH) + 1:] if self.path.startswith(SESSIONS_PATH + '/') else None
+        session = self.server.sessions.get(session_id)
+        if session is None:
+            self.send_error_json(404, 'invalid_request_error', f"No such checkout.session: '{session_id}'")
+        else:
+            self.send_json(200, session)
+
+
+class FakeStripeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0):
+        super().__init__(('127.0.0.1', 0), FakeStripeRequestHandler)
+        self.latency = latency
+        self.sessions = {}
+        self.idempotency_keys = {}
+        self.request_count = 0
+        self.connection_count = 0
+        self._failures = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # A client that timed out has closed its end before the delayed response
+        pass
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def record(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def fail_next(self, count=1, status=500):
+        """Answer the next count requests with an error of this status."""
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def take_failure(self):
+        with self._lock:
+            return self._failures.pop(0) if self._failures else None
+
+    def add_session(self, idempotency_key, session):
+        """Store a new session, or return the one already created for idempotency_key."""
+        with self._lock:
+            if idempotency_key in self.idempotency_keys:
+                return self.sessions[self.idempotency_keys[idempotency_key]]
+            session['id'] = f'cs_test_fake_{len(self.sessions) + 1}'
+            if idempotency_key is not None:
+                self.idempotency_keys[idempotency_key] = session['id']
+            session['url'] = f'{self.url}/pay/{session["id"]}'
+            self.sessions[session['id']] = session
+        return session
+
+    def start(self):
+        """Serve from a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
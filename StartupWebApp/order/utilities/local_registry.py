@@ -0,0 +1,87 @@
+"""
+Process-local copies of small, rarely changed tables, kept in step across workers.
+
+A LocalRegistry holds what its loader built from the database, tagged with a
+version number held in the 'shared' cache (see settings.CACHES) under the
+registry's version key. Reads are attribute lookups with no query and no
+cache round trip.
+
+invalidate() (called from the model signals in order/signals.py after a write
+commits) drops this process's copy and bumps the version. Other processes
+compare their copy's version with the shared one at most every
+settings.LOCAL_REGISTRY_CHECK_INTERVAL seconds and reload when it has moved,
+so a change reaches every worker within that interval.
+"""
+
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+REGISTRY_CACHE_ALIAS = 'shared'
+
+Snapshot = namedtuple('Snapshot', ['version', 'checked_at', 'values'])
+
+
+def get_registry_cache():
+    return caches[REGISTRY_CACHE_ALIAS]
+
+
+def _initial_version():
+    # Seeded from the clock, as the catalog version is, so a flushed cache
+    # never repeats a version a process may still hold
+    return int(time.time() * 1000)
+
+
+class LocalRegistry:
+    """
+    Values built by loader(), reloaded when the shared version at version_key moves.
+
+    The snapshot is replaced as a whole, never mutated, so concurrent readers
+    always see a consistent copy. Callers must not mutate the values either.
+    """
+
+    def __init__(self, version_key, loader):
+        self.version_key = version_key
+        self.loader = loader
+        self._snapshot = None
+
+    def get_version(self):
+        """
+        Return the current shared version, initializing it if the cache is empty.
+
+        Returns:
+            int: Current version number
+        """
+        cache = get_registry_cache()
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, _initial_version(), timeout=None)
+            version = cache.get(self.version_key)
+        return version
+
+    def invalidate(self):
+        """Drop this process's copy and make every other process reload at its next check."""
+        self._snapshot = None
+        cache = get_registry_cache()
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            # Version key missing (cache flushed or evicted) - start a fresh sequence
+            cache.set(self.version_key, _initial_version(), timeout=None)
+
+    def get_values(self):
+        """The loader's values, reloaded first if the shared version has moved since the last check."""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - snapshot.checked_at < settings.LOCAL_REGISTRY_CHECK_INTERVAL:
+            return snapshot.values
+        # Read before loading, so a change made during the load is picked up at the next check
+        version = self.get_version()
+        if snapshot is None or snapshot.version != version:
+            values = self.loader()
+        else:
+            values = snapshot.values
+        self._snapshot = Snapshot(version, now, values)
+        return values
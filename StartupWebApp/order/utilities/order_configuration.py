@@ -0,0 +1,71 @@
+"""
+Typed, in-process registry of Orderconfiguration values.
+
+Every Orderconfiguration row is loaded with one query and its string_value
+parsed once: the checkout allowlists become frozensets, other keys keep their
+string. Lookups are then dictionary reads with no query.
+
+The values are a LocalRegistry (see local_registry), versioned under
+
+    orderconfiguration:version
+
+Saving or deleting an Orderconfiguration row (including through the admin,
+see order/signals.py) reloads them in this process at once and in the others
+within settings.LOCAL_REGISTRY_CHECK_INTERVAL seconds. Writes through
+queryset.update() or raw SQL fire no signals; call invalidate() after them.
+"""
+
+from order.models import Orderconfiguration
+from order.utilities.local_registry import LocalRegistry
+
+CONFIGURATION_VERSION_KEY = 'orderconfiguration:version'
+
+
+def parse_list(string_value):
+    """Comma-separated string_value as a frozenset; an empty value allows nothing."""
+    if string_value is None:
+        return frozenset()
+    return frozenset(string_value.split(','))
+
+
+# Keys whose string_value is parsed into another type; the rest are kept as strings
+PARSERS = {
+    'usernames_allowed_to_checkout': parse_list,
+    'an_ct_values_allowed_to_checkout': parse_list,
+}
+
+
+def load_values():
+    """Parsed value of every configuration key, in one query. The first row of a duplicated key wins."""
+    values = {}
+    for key, string_value in Orderconfiguration.objects.order_by('id').values_list('key', 'string_value'):
+        if key not in values:
+            parser = PARSERS.get(key)
+            values[key] = parser(string_value) if parser is not None else string_value
+    return values
+
+
+registry = LocalRegistry(CONFIGURATION_VERSION_KEY, load_values)
+
+
+def invalidate():
+    """Reload the configuration here now and in every other process at its next check."""
+    registry.invalidate()
+
+
+def get_values():
+    """Parsed configuration values, keyed by Orderconfiguration.key."""
+    return registry.get_values()
+
+
+def get_value(key):
+    """
+    Parsed value of an Orderconfiguration key.
+
+    Raises:
+        Orderconfiguration.DoesNotExist: If there is no row with that key
+    """
+    try:
+        return get_values()[key]
+    except KeyError:
+        raise Orderconfiguration.DoesNotExist(f'Orderconfiguration {key} does not exist') from None
@@ -2,93 +2,101 @@ from order.models import (
     Ordersku, Orderstatus, Ordershippingmethod
 )
 from order.models import (
-    Orderconfiguration, Skuprice, Skuimage, Cart, Cartsku,
-    Productsku, Productimage, Cartshippingmethod
+    Skuimage, Cart, Cartsku, Cartshippingmethod,
+    Productsku, Productimage, Sku
 )
+from order.utilities import order_configuration, shipping_method_table
 from StartupWebApp.utilities import random
-from django.conf import settings
-import stripe
+from django.db import transaction
+from django.db.models import Count, F, Max, Prefetch
+import hashlib
 import logging
-stripe.api_key = settings.STRIPE_SERVER_SECRET_KEY
-stripe.log = settings.STRIPE_LOG_LEVEL
 
 logger = logging.getLogger(__name__)
 
 
 def checkout_allowed(request):
-    an_ct_values_allowed_to_checkout = Orderconfiguration.objects.get(
-        key='an_ct_values_allowed_to_checkout').string_value
-    if an_ct_values_allowed_to_checkout is not None:
-        an_ct_values_allowed_to_checkout_arr = an_ct_values_allowed_to_checkout.split(',')
-    else:
-        an_ct_values_allowed_to_checkout_arr = []
-    usernames_allowed_to_checkout = Orderconfiguration.objects.get(
-        key='usernames_allowed_to_checkout').string_value
-    if usernames_allowed_to_checkout is not None:
-        usernames_allowed_to_checkout_arr = usernames_allowed_to_checkout.split(',')
-    else:
-        usernames_allowed_to_checkout_arr = []
-
-    checkout_allowed = False
     if request.user.is_authenticated:
-        for username in usernames_allowed_to_checkout_arr:
-            if username == "*":
-                checkout_allowed = True
-                break
-            elif str(username) == str(request.user.username):
-                checkout_allowed = True
-                break
+        allowed_values = order_configuration.get_value('usernames_allowed_to_checkout')
+        value = str(request.user.username)
     else:
-        signed_cookie = request.get_signed_cookie(
-            key='an_ct', default=False, salt='anonymouscartcookieisthis')
-        for an_ct in an_ct_values_allowed_to_checkout_arr:
-            if str(an_ct) == "*":
-                checkout_allowed = True
-                break
-            elif str(an_ct) == str(signed_cookie):
-                checkout_allowed = True
-                break
-
-    return checkout_allowed
+        allowed_values = order_configuration.get_value('an_ct_values_allowed_to_checkout')
+        value = str(get_anonymous_cart_id(request))
+    return '*' in allowed_values or value in allowed_values
+
+
+def get_cart_item_prefetches(prefix=''):
+    """Prefetches of the parent products and main images get_cart_items() reads for each SKU at prefix."""
+    return [
+        Prefetch(
+            f'{prefix}productsku_set',
+            queryset=Productsku.objects.select_related('product').order_by('id'),
+            to_attr='ordered_product_skus',
+        ),
+        Prefetch(
+            f'{prefix}ordered_product_skus__product__productimage_set',
+            queryset=Productimage.objects.filter(main_image=True).order_by('id'),
+            to_attr='main_images',
+        ),
+        Prefetch(
+            f'{prefix}skuimage_set',
+            queryset=Skuimage.objects.filter(main_image=True).order_by('id'),
+            to_attr='main_images',
+        ),
+    ]
+
+
+def get_cart_sku_quantities(cart):
+    """(Sku, quantity) pairs of a cart's product SKUs, in the order they were added."""
+    cartskus = Cartsku.objects.filter(cart=cart, sku__sku_type__title='product').select_related(
+        'sku__sku_type', 'sku__sku_inventory', 'sku__current_price'
+    ).prefetch_related(*get_cart_item_prefetches('sku__')).order_by('id')
+    return [(cartsku.sku, cartsku.quantity) for cartsku in cartskus]
 
 
 def get_cart_items(request, cart):
+    """
+    Build the product_sku_data dict for a cart's product SKUs.
+
+    Runs four queries however many items the cart holds: the cart SKUs (joined
+    to SKU, type, inventory status and current price), their parent products,
+    the main images of those products and the main images of the SKUs. A SKU
+    without a main image shows its parent product's main image.
+    """
     cart_item_dict = {}
 
     if cart is not None:
         product_sku_dict = {}
         counter = 0
-        for cartsku in Cartsku.objects.filter(cart=cart):
-            if cartsku.sku.sku_type.title == 'product':
-                sku_data = {}
-                sku_data['sku_id'] = cartsku.sku.id
-                sku_data['sku_type__title'] = cartsku.sku.sku_type.title
-                sku_data['sku_inventory__title'] = cartsku.sku.sku_inventory.title
-                sku_data['sku_inventory__identifier'] = cartsku.sku.sku_inventory.identifier
-                sku_data['color'] = cartsku.sku.color
-                sku_data['size'] = cartsku.sku.size
-                sku_data['description'] = cartsku.sku.description
-                sku_data['price'] = Skuprice.objects.filter(
-                    sku=cartsku.sku).latest('created_date_time').price
-                sku_data['quantity'] = cartsku.quantity
-                sku_data['parent_product__title'] = Productsku.objects.get(
-                    sku=cartsku.sku).product.title
-                sku_data['parent_product__title_url'] = Productsku.objects.get(
-                    sku=cartsku.sku).product.title_url
-                sku_data['parent_product__identifier'] = Productsku.objects.get(
-                    sku=cartsku.sku).product.identifier
-                sku_image_main_exists = Skuimage.objects.filter(
-                    sku=cartsku.sku, main_image=True).exists()
-                sku_image_url = None
-                if sku_image_main_exists is True:
-                    sku_image_url = Skuimage.objects.get(sku=cartsku.sku, main_image=True).image_url
-                else:
-                    sku_image_url = Productimage.objects.get(
-                        product=Productsku.objects.get(
-                            sku=cartsku.sku).product, main_image=True).image_url
-                sku_data['sku_image_url'] = sku_image_url
-                product_sku_dict[counter] = sku_data
-                counter += 1
+        for sku, quantity in get_cart_sku_quantities(cart):
+            if not sku.ordered_product_skus:
+                raise Productsku.DoesNotExist(f'SKU {sku.id} is not linked to a product')
+            parent_product = sku.ordered_product_skus[0].product
+            sku_data = {}
+            sku_data['sku_id'] = sku.id
+            sku_data['sku_type__title'] = sku.sku_type.title
+            sku_data['sku_inventory__title'] = sku.sku_inventory.title
+            sku_data['sku_inventory__identifier'] = sku.sku_inventory.identifier
+            sku_data['color'] = sku.color
+            sku_data['size'] = sku.size
+            sku_data['description'] = sku.description
+            # Flag a line whose SKU lost its prices after it was added: it adds nothing to the
+            # cart's item_subtotal, and create_checkout_session refuses the cart
+            current_price = getattr(sku, 'current_price', None)
+            sku_data['price'] = current_price.price if current_price is not None else None
+            sku_data['quantity'] = quantity
+            sku_data['parent_product__title'] = parent_product.title
+            sku_data['parent_product__title_url'] = parent_product.title_url
+            sku_data['parent_product__identifier'] = parent_product.identifier
+            if sku.main_images:
+                sku_image_url = sku.main_images[0].image_url
+            elif parent_product.main_images:
+                sku_image_url = parent_product.main_images[0].image_url
+            else:
+                raise Productimage.DoesNotExist(f'Product {parent_product.identifier} has no main image')
+            sku_data['sku_image_url'] = sku_image_url
+            product_sku_dict[counter] = sku_data
+            counter += 1
         cart_item_dict['product_sku_data'] = product_sku_dict
     return cart_item_dict
 
@@ -98,6 +106,8 @@ def create_cart(request):
         cart = Cart.objects.create(member=request.user.member)
     else:
         cart = Cart.objects.create()
+    # Later lookups in this request find the new cart without querying
+    get_memoized_carts(request)[get_cart_lookup_key(request)] = cart
     return cart
 
 
@@ -121,51 +131,105 @@ def set_anonymous_cart_cookie(request, response, cart):
             httponly=False)
 
 
+def get_anonymous_cart_id(request):
+    """
+    Verified value of the signed an_ct cookie, or False if it is missing or tampered with.
+
+    Memoized on the request so the signature is checked once per request.
+    """
+    if not hasattr(request, '_anonymous_cart_id'):
+        request._anonymous_cart_id = request.get_signed_cookie(
+            key='an_ct', default=False, salt='anonymouscartcookieisthis')
+    return request._anonymous_cart_id
+
+
+def get_memoized_carts(request):
+    memoized_carts = getattr(request, '_carts', None)
+    if memoized_carts is None:
+        memoized_carts = {}
+        request._carts = memoized_carts
+    return memoized_carts
+
+
+def get_cart_lookup_key(request):
+    if request.user.is_authenticated:
+        return ('member', request.user.id)
+    return ('anonymous', get_anonymous_cart_id(request))
+
+
+def get_memoized_cart(request, lookup_key, **lookup):
+    """
+    Cart matching lookup, fetched in one query and memoized on the request under lookup_key.
+
+    The shipping address and payment are joined in, since the views read them
+    next. A memoized cart deleted since it was looked up is fetched again.
+    """
+    memoized_carts = get_memoized_carts(request)
+    cart = memoized_carts.get(lookup_key)
+    if lookup_key not in memoized_carts or (cart is not None and cart.pk is None):
+        cart = Cart.objects.select_related('shipping_address', 'payment').filter(**lookup).order_by('id').first()
+        memoized_carts[lookup_key] = cart
+    return cart
+
+
 def look_up_cart(request):
-    cart = None
     logger.debug(f'User authenticated status: {request.user.is_authenticated}')
     if request.user.is_authenticated:
-        member_cart_exists = Cart.objects.filter(member=request.user.member).exists()
-        if member_cart_exists is True:
-            cart = Cart.objects.get(member=request.user.member)
-    else:
-        signed_cookie = request.get_signed_cookie(
-            key='an_ct', default=False, salt='anonymouscartcookieisthis')
-        anonymous_cart_exists = Cart.objects.filter(anonymous_cart_id=signed_cookie).exists()
-        if anonymous_cart_exists is True:
-            cart = Cart.objects.get(anonymous_cart_id=signed_cookie)
-    return cart
+        return look_up_member_cart(request)
+    return look_up_anonymous_cart(request)
 
 
 def look_up_member_cart(request):
-    cart = None
-    member_cart_exists = Cart.objects.filter(member=request.user.member).exists()
-    if member_cart_exists is True:
-        cart = Cart.objects.get(member=request.user.member)
-    return cart
+    return get_memoized_cart(request, ('member', request.user.id), member__user_id=request.user.id)
 
 
 def look_up_anonymous_cart(request):
-    cart = None
-    signed_cookie = request.get_signed_cookie(
-        key='an_ct', default=False, salt='anonymouscartcookieisthis')
-    anonymous_cart_exists = Cart.objects.filter(anonymous_cart_id=signed_cookie).exists()
-    if anonymous_cart_exists is True:
-        cart = Cart.objects.get(anonymous_cart_id=signed_cookie)
-    return cart
+    anonymous_cart_id = get_anonymous_cart_id(request)
+    if anonymous_cart_id is False:
+        return None
+    return get_memoized_cart(request, ('anonymous', anonymous_cart_id), anonymous_cart_id=anonymous_cart_id)
+
+
+def get_cart_summary(cart):
+    """
+    Item count, item subtotal and shipping subtotal of a cart.
+
+    Reads the running totals kept on the Cart row by Cart.refresh_totals(), so
+    this is a single-row fetch. The row is re-read rather than taken from cart,
+    which may have been loaded before this request changed the cart. item_count
+    is the number of cart lines (distinct SKUs). Empty values are reported as 0.
 
+    Args:
+        cart (Cart): Cart to summarize, or None
 
-def get_cart_totals(cart):
+    Returns:
+        dict: item_count, item_subtotal and shipping_subtotal
+    """
+    cart_summary = None
+    if cart is not None:
+        cart_summary = Cart.objects.filter(id=cart.id).values(
+            'item_count', 'item_subtotal', 'shipping_subtotal').first()
+    if cart_summary is None:
+        cart_summary = {'item_count': 0}
+    # Empty totals stay the integer 0 the API has always returned
+    return {
+        'item_count': cart_summary['item_count'],
+        'item_subtotal': cart_summary.get('item_subtotal') or 0,
+        'shipping_subtotal': cart_summary.get('shipping_subtotal') or 0,
+    }
+
+
+def get_cart_totals(cart, cart_summary=None):
     """
     Calculate cart totals (items + shipping, no discounts).
+
+    Pass the result of get_cart_summary() as cart_summary to avoid querying again.
     """
+    if cart_summary is None:
+        cart_summary = get_cart_summary(cart)
     cart_totals_dict = {}
-    item_subtotal = calculate_item_subtotal(cart)
-    shipping_subtotal = 0
-
-    if Cartshippingmethod.objects.filter(cart=cart).exists():
-        cart_shipping_method = Cartshippingmethod.objects.get(cart=cart)
-        shipping_subtotal = cart_shipping_method.shippingmethod.shipping_cost
+    item_subtotal = cart_summary['item_subtotal']
+    shipping_subtotal = cart_summary['shipping_subtotal']
 
     cart_totals_dict['item_subtotal'] = item_subtotal
     cart_totals_dict['shipping_subtotal'] = shipping_subtotal
@@ -174,6 +238,253 @@ def get_cart_totals(cart):
     return cart_totals_dict
 
 
+def bulk_delete(queryset):
+    """
+    Delete the rows of queryset with a single DELETE and return how many there were.
+
+    Skips the per-object collection and post_delete signals of queryset.delete(),
+    so use it only where those signals have nothing left to do (the cart line and
+    shipping method receivers refresh the totals of carts being deleted or
+    refreshed anyway).
+    """
+    # Returns None rather than 0 when the filter matches nothing by construction (id__in=[])
+    return queryset._raw_delete(queryset.db) or 0
+
+
+def merge_anonymous_cart(request):
+    """
+    Give a shopper who has just logged in the cart they built anonymously.
+
+    Without a member cart, the anonymous cart (found through the an_ct cookie)
+    becomes the member cart. Otherwise its lines are merged into the member cart
+    with one upsert, summing the quantities of SKUs in both carts, its shipping
+    method is kept if the member cart has none, and it is deleted. The number of
+    queries does not depend on how many lines either cart holds.
+
+    Returns:
+        Cart: The member cart, or None if the shopper has neither cart
+    """
+    anonymous_cart = look_up_anonymous_cart(request)
+    member_cart = look_up_member_cart(request)
+    if anonymous_cart is None:
+        return member_cart
+    if member_cart is None:
+        anonymous_cart.member = request.user.member
+        anonymous_cart.anonymous_cart_id = None
+        anonymous_cart.save()
+        get_memoized_carts(request)[('member', request.user.id)] = anonymous_cart
+        return anonymous_cart
+
+    with transaction.atomic():
+        # Locked in id order, as other cart writes lock one cart at a time
+        list(Cart.objects.select_for_update().filter(
+            id__in=[member_cart.id, anonymous_cart.id]).order_by('id').values_list('id', flat=True))
+        anonymous_quantities = dict(Cartsku.objects.filter(cart=anonymous_cart).values_list('sku_id', 'quantity'))
+        if anonymous_quantities:
+            member_quantities = dict(Cartsku.objects.filter(
+                cart=member_cart, sku_id__in=anonymous_quantities).values_list('sku_id', 'quantity'))
+            # bulk_create skips Cartsku.save(), so the totals are refreshed below
+            Cartsku.objects.bulk_create(
+                [
+                    Cartsku(cart=member_cart, sku_id=sku_id, quantity=member_quantities.get(sku_id, 0) + quantity)
+                    for sku_id, quantity in anonymous_quantities.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['cart', 'sku'],
+                update_fields=['quantity'],
+            )
+            bulk_delete(Cartsku.objects.filter(cart=anonymous_cart))
+        if not Cartshippingmethod.objects.filter(cart=member_cart).exists():
+            Cartshippingmethod.objects.filter(cart=anonymous_cart).update(cart=member_cart)
+        bulk_delete(Cartshippingmethod.objects.filter(cart=anonymous_cart))
+        anonymous_cart.delete()
+        Cart.refresh_totals([member_cart.id])
+    return member_cart
+
+
+def get_sellable_product_skus():
+    """Productskus whose SKU has a current price - the only SKUs that can be added to a cart."""
+    return Productsku.objects.filter(sku__current_price__isnull=False)
+
+
+def add_cart_sku(cart, sku_id, quantity):
+    """
+    Add quantity of a product SKU to a cart, creating the cart line if needed.
+
+    Safe under concurrent adds to the same cart: the line is created with
+    INSERT ... ON CONFLICT DO NOTHING and the quantity incremented in the
+    database, so parallel requests neither lose an increment nor hit the
+    (cart, sku) unique constraint. The cart row is locked first, as in
+    apply_cart_operations(), so an add cannot interleave with a batch.
+
+    Raises:
+        Productsku.DoesNotExist: If sku_id is not a product SKU or has no current price
+        ValueError: If sku_id is not a number
+    """
+    if not get_sellable_product_skus().filter(sku_id=sku_id).exists():
+        raise Productsku.DoesNotExist(f'SKU {sku_id} is not a product SKU with a current price')
+    with transaction.atomic():
+        list(Cart.objects.select_for_update().filter(id=cart.id).values_list('id', flat=True))
+        # bulk_create/update skip Cartsku.save(), so the totals are refreshed below
+        Cartsku.objects.bulk_create([Cartsku(cart=cart, sku_id=sku_id, quantity=0)], ignore_conflicts=True)
+        Cartsku.objects.filter(cart=cart, sku_id=sku_id).update(quantity=F('quantity') + quantity)
+        Cart.refresh_totals([cart.id])
+
+
+def apply_cart_operations(cart, operations):
+    """
+    Apply add/update/remove operations to a cart's SKUs in one transaction.
+
+    Operations are applied in order, with the same rules as cart-add-product-sku,
+    cart-update-sku-quantity and cart-remove-sku: add needs a priced product SKU and
+    adds to any quantity already in the cart, update and remove need the SKU to
+    be in the cart, and removing a line clears the selected shipping method.
+    The cart lines are read once, changed lines are written with one upsert,
+    removed lines with one delete, and the totals are refreshed once. If any
+    operation cannot be applied nothing is written.
+
+    Args:
+        cart (Cart): Cart to change
+        operations (list): (action, sku_id, quantity) tuples; quantity is None for remove
+
+    Returns:
+        tuple: (error_dict, operation_index) for the first operation that cannot
+        be applied, or (None, None) when all were applied
+    """
+    sku_ids = {sku_id for action, sku_id, quantity in operations}
+    add_sku_ids = {sku_id for action, sku_id, quantity in operations if action == 'add'}
+    with transaction.atomic():
+        # Lock the cart row so concurrent batches on the same cart apply one after another
+        list(Cart.objects.select_for_update().filter(id=cart.id).values_list('id', flat=True))
+        original_quantities = dict(
+            Cartsku.objects.filter(cart=cart, sku_id__in=sku_ids).values_list('sku_id', 'quantity'))
+        product_sku_ids = set()
+        if add_sku_ids:
+            product_sku_ids = set(get_sellable_product_skus().filter(
+                sku_id__in=add_sku_ids).values_list('sku_id', flat=True))
+
+        quantities, error_dict, operation_index = apply_quantity_operations(
+            original_quantities, operations, product_sku_ids)
+        if error_dict is not None:
+            return error_dict, operation_index
+
+        removed_sku_ids = set(original_quantities) - set(quantities)
+        if removed_sku_ids:
+            # bulk_delete skips the per-row post_delete totals refresh; the totals are refreshed below
+            bulk_delete(Cartsku.objects.filter(cart=cart, sku_id__in=removed_sku_ids))
+            bulk_delete(Cartshippingmethod.objects.filter(cart=cart))
+        changed_cart_skus = [
+            Cartsku(cart=cart, sku_id=sku_id, quantity=quantity)
+            for sku_id, quantity in quantities.items()
+            if original_quantities.get(sku_id) != quantity
+        ]
+        if changed_cart_skus:
+            # bulk_create skips Cartsku.save(), so the totals are refreshed below
+            Cartsku.objects.bulk_create(
+                changed_cart_skus, update_conflicts=True, unique_fields=['cart', 'sku'], update_fields=['quantity'])
+        Cart.refresh_totals([cart.id])
+    return None, None
+
+
+def apply_quantity_operations(original_quantities, operations, product_sku_ids):
+    """
+    Quantities per SKU id after applying operations to original_quantities, which is not changed.
+
+    Returns:
+        tuple: (quantities, error_dict, operation_index); error_dict and
+        operation_index are None unless an operation cannot be applied
+    """
+    quantities = dict(original_quantities)
+    for operation_index, (action, sku_id, quantity) in enumerate(operations):
+        if action == 'add':
+            if sku_id not in product_sku_ids:
+                return None, {'error': 'sku-not-found'}, operation_index
+            quantities[sku_id] = quantities.get(sku_id, 0) + quantity
+        elif sku_id not in quantities:
+            return None, {'error': 'cart-sku-not-found'}, operation_index
+        elif action == 'update':
+            quantities[sku_id] = quantity
+        else:
+            del quantities[sku_id]
+    return quantities, None, None
+
+
+def update_cart_sku_quantity(cart, sku_id, quantity):
+    """
+    Set the quantity of a SKU already in a cart.
+
+    Returns:
+        Decimal: The SKU's line subtotal at its current price
+
+    Raises:
+        Cartsku.DoesNotExist: If the SKU is not in the cart
+        Sku.DoesNotExist: If there is no such SKU
+        ValueError: If sku_id is not a number
+    """
+    cart_sku = Cartsku.objects.get(cart=cart, sku=Sku.objects.get(id=sku_id))
+    cart_sku.quantity = quantity
+    cart_sku.save()
+    return cart_sku.sku.current_price.price * int(cart_sku.quantity)
+
+
+def remove_cart_sku(cart, sku_id):
+    """
+    Remove a SKU from a cart, clearing the selected shipping method.
+
+    Raises:
+        Cartsku.DoesNotExist: If the SKU is not in the cart
+        Sku.DoesNotExist: If there is no such SKU
+        ValueError: If sku_id is not a number
+    """
+    cart_sku = Cartsku.objects.get(cart=cart, sku=Sku.objects.get(id=sku_id))
+    cart_sku.delete()
+    Cartshippingmethod.objects.filter(cart=cart).delete()
+
+
+def set_cart_shipping_method(cart, shipping_method_identifier):
+    """
+    Select a shipping method for a cart.
+
+    Raises:
+        Shippingmethod.DoesNotExist: If there is no shipping method with that identifier
+    """
+    shippingmethod_id = shipping_method_table.get_shipping_method_id(shipping_method_identifier)
+    Cartshippingmethod.objects.update_or_create(cart=cart, defaults={'shippingmethod_id': shippingmethod_id})
+
+
+def get_active_shipping_methods():
+    """Active shipping methods, most expensive first, keyed by position (see shipping_method_table)."""
+    return shipping_method_table.get_active_shipping_methods()
+
+
+def get_cart_shipping_method(cart):
+    """
+    Data dict of the shipping method selected for a cart, or None.
+
+    One query for the selected id; the method itself comes from shipping_method_table.
+    """
+    shippingmethod_id = Cartshippingmethod.objects.filter(cart=cart).order_by('id').values_list(
+        'shippingmethod_id', flat=True).first()
+    return shipping_method_table.get_by_id(shippingmethod_id) if shippingmethod_id is not None else None
+
+
+def select_cart_shipping_method(cart):
+    """
+    Identifier of the shipping method selected for a cart.
+
+    A cart without one is given the configured default_shipping_method first.
+    """
+    shipping_method_data = get_cart_shipping_method(cart)
+    if shipping_method_data is not None:
+        return shipping_method_data['identifier']
+    default_shipping_method = order_configuration.get_value('default_shipping_method')
+    Cartshippingmethod.objects.create(
+        cart=cart,
+        shippingmethod_id=shipping_method_table.get_shipping_method_id(default_shipping_method),
+    )
+    return default_shipping_method
+
+
 def load_address_dict(address):
     address_dict = {}
     address_dict['name'] = address.name
@@ -187,22 +498,11 @@ def load_address_dict(address):
 
 
 def calculate_item_subtotal(cart):
-    item_subtotal = 0
-    for cartsku in Cartsku.objects.filter(cart=cart):
-        item_subtotal += (
-            Skuprice.objects.filter(
-                sku=cartsku.sku).latest('created_date_time').price *
-            Cartsku.objects.get(
-                cart=cart,
-                sku=cartsku.sku).quantity)
-    return item_subtotal
+    return get_cart_summary(cart)['item_subtotal']
 
 
 def count_cart_items(cart):
-    item_count = 0
-    for cartsku in Cartsku.objects.filter(cart=cart):
-        item_count += 1
-    return item_count
+    return get_cart_summary(cart)['item_count']
 
 
 def get_order_data(order):
@@ -218,6 +518,45 @@ def get_order_data(order):
     return order_data
 
 
+def get_order_detail_etag(request, order_identifier):
+    """
+    ETag for the order_detail response, derived from the order's newest Orderstatus.
+
+    The requesting user is part of the tag because order_detail answers differently
+    per viewer (owner vs other member vs anonymous). The status lookup is memoized on
+    the request so the matching Last-Modified lookup doesn't repeat the query.
+
+    Returns:
+        str: ETag value, or None when the order has no statuses (or doesn't exist)
+    """
+    order_status_marker = get_order_status_marker(request, order_identifier)
+    if order_status_marker['latest_status_date_time'] is None:
+        return None
+    viewer = str(request.user.id) if request.user.is_authenticated else 'anonymous'
+    etag_source = (
+        f"{order_identifier}:{order_status_marker['status_count']}:"
+        f"{order_status_marker['latest_status_date_time'].isoformat()}:{viewer}"
+    )
+    return 'order-' + hashlib.sha256(etag_source.encode('utf8')).hexdigest()[:32]
+
+
+def get_order_detail_last_modified(request, order_identifier):
+    """Last-Modified for the order_detail response: the newest Orderstatus.created_date_time."""
+    return get_order_status_marker(request, order_identifier)['latest_status_date_time']
+
+
+def get_order_status_marker(request, order_identifier):
+    order_status_markers = getattr(request, '_order_status_markers', None)
+    if order_status_markers is None:
+        order_status_markers = {}
+        request._order_status_markers = order_status_markers
+    if order_identifier not in order_status_markers:
+        order_status_markers[order_identifier] = Orderstatus.objects.filter(
+            order__identifier=order_identifier).aggregate(
+                latest_status_date_time=Max('created_date_time'), status_count=Count('id'))
+    return order_status_markers[order_identifier]
+
+
 def get_order_attributes(order):
     order_attributes = {}
     order_attributes['identifier'] = order.identifier
@@ -0,0 +1,112 @@
+"""
+Full-text product search backed by PostgreSQL tsvector columns.
+
+Each Product has one Productsearchdocument holding the searchable text of the
+product and all of its SKUs, plus a weighted tsvector (title > headline >
+descriptions > SKU color/size/description) covered by a GIN index. Searching
+is a single indexed query ranked with ts_rank.
+
+Documents are refreshed for just the affected products after each catalog
+write commits (see order/signals.py). `python manage.py rebuild_search_documents`
+rebuilds them all in batches.
+"""
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db.models import F, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+from order.models import Product, Productsearchdocument
+from order.utilities import catalog_utils
+
+SEARCH_CONFIG = 'english'
+SEARCH_DOCUMENT_BATCH_SIZE = 1000
+
+
+def weighted_search_vector():
+    """tsvector expression stored in Productsearchdocument.search_vector."""
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG)
+        + SearchVector('headline', weight='B', config=SEARCH_CONFIG)
+        + SearchVector('description', weight='C', config=SEARCH_CONFIG)
+        + SearchVector('sku_text', weight='D', config=SEARCH_CONFIG)
+    )
+
+
+def _refresh_batch(product_ids):
+    products = Product.objects.filter(id__in=product_ids).annotate(
+        sku_text=StringAgg(
+            Concat(
+                'productsku__sku__color', Value(' '),
+                'productsku__sku__size', Value(' '),
+                'productsku__sku__description',
+            ),
+            delimiter=' ',
+            default=Value(''),
+        )
+    ).values('id', 'title', 'headline', 'description_part_1', 'description_part_2', 'sku_text')
+
+    now = timezone.now()
+    search_documents = [
+        Productsearchdocument(
+            product_id=product['id'],
+            title=product['title'],
+            headline=product['headline'] or '',
+            description=' '.join(filter(None, [product['description_part_1'], product['description_part_2']])),
+            sku_text=product['sku_text'],
+            updated_date_time=now,
+        )
+        for product in products
+    ]
+    Productsearchdocument.objects.bulk_create(
+        search_documents,
+        update_conflicts=True,
+        unique_fields=['product'],
+        update_fields=['title', 'headline', 'description', 'sku_text', 'updated_date_time'],
+    )
+    Productsearchdocument.objects.filter(product_id__in=product_ids).update(search_vector=weighted_search_vector())
+    return len(search_documents)
+
+
+def refresh_search_documents(product_ids=None):
+    """
+    Rebuild the search documents of the given products.
+
+    Documents of deleted products are removed by the Product foreign key cascade.
+
+    Args:
+        product_ids (iterable): Product ids to refresh, or None for every product
+
+    Returns:
+        int: Number of documents written
+    """
+    if product_ids is None:
+        product_ids = Product.objects.order_by('id').values_list('id', flat=True)
+    product_ids = list(product_ids)
+
+    document_count = 0
+    for start in range(0, len(product_ids), SEARCH_DOCUMENT_BATCH_SIZE):
+        document_count += _refresh_batch(product_ids[start:start + SEARCH_DOCUMENT_BATCH_SIZE])
+    return document_count
+
+
+def search_products(query_text, limit=20):
+    """
+    Find products matching a web-style search query, best match first.
+
+    Args:
+        query_text (str): Search terms; supports "quoted phrases", OR and -exclusions
+        limit (int): Maximum number of products to return
+
+    Returns:
+        list: Listing entries in the shape of catalog_utils.get_product_summary_data()
+    """
+    query = SearchQuery(query_text, search_type='websearch', config=SEARCH_CONFIG)
+    products = (
+        Product.objects.filter(search_document__search_vector=query)
+        .annotate(rank=SearchRank(F('search_document__search_vector'), query))
+        .prefetch_related(catalog_utils.main_images_prefetch())
+        .order_by('-rank', 'id')[:limit]
+    )
+    return [catalog_utils.get_product_summary_data(product) for product in products]
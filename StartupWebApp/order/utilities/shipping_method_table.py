@@ -0,0 +1,87 @@
+"""
+In-process, pre-serialized table of shipping methods.
+
+Shipping methods change a few times a year but are read by every cart and
+confirm page. The whole table is loaded with one query into the dicts the
+cart endpoints return, so looking up the active methods or a cart's selected
+method costs no query.
+
+The table is a LocalRegistry (see local_registry), versioned under
+
+    shippingmethod:version
+
+Saving or deleting a Shippingmethod (including through the admin, see
+order/signals.py) reloads it in this process at once and in the others within
+settings.LOCAL_REGISTRY_CHECK_INTERVAL seconds.
+"""
+
+from collections import namedtuple
+
+from order.models import Shippingmethod
+from order.utilities.local_registry import LocalRegistry
+
+SHIPPING_METHOD_VERSION_KEY = 'shippingmethod:version'
+
+# active: the cart-shipping-methods payload, most expensive first, keyed by position
+# by_id: data dict of every shipping method, active or not, by Shippingmethod id
+# ids: Shippingmethod id by identifier; the first of a duplicated identifier wins
+ShippingMethodTable = namedtuple('ShippingMethodTable', ['active', 'by_id', 'ids'])
+
+
+def get_shipping_method_data(shippingmethod):
+    shipping_method_data = {}
+    shipping_method_data['identifier'] = shippingmethod.identifier
+    shipping_method_data['carrier'] = shippingmethod.carrier
+    shipping_method_data['shipping_cost'] = shippingmethod.shipping_cost
+    shipping_method_data['tracking_code_base_url'] = shippingmethod.tracking_code_base_url
+    return shipping_method_data
+
+
+def load_table():
+    active = {}
+    by_id = {}
+    ids = {}
+    for shippingmethod in Shippingmethod.objects.order_by('-shipping_cost', 'id'):
+        shipping_method_data = get_shipping_method_data(shippingmethod)
+        by_id[shippingmethod.id] = shipping_method_data
+        ids.setdefault(shippingmethod.identifier, shippingmethod.id)
+        if shippingmethod.active:
+            active[len(active)] = shipping_method_data
+    return ShippingMethodTable(active, by_id, ids)
+
+
+registry = LocalRegistry(SHIPPING_METHOD_VERSION_KEY, load_table)
+
+
+def invalidate():
+    """Reload the table here now and in every other process at its next check."""
+    registry.invalidate()
+
+
+def get_active_shipping_methods():
+    """Active shipping methods, most expensive first, keyed by position."""
+    return registry.get_values().active
+
+
+def get_shipping_method_id(identifier):
+    """
+    Id of the Shippingmethod with this identifier.
+
+    Raises:
+        Shippingmethod.DoesNotExist: If there is none
+    """
+    try:
+        return registry.get_values().ids[identifier]
+    except KeyError:
+        raise Shippingmethod.DoesNotExist(f'Shippingmethod {identifier} does not exist') from None
+
+
+def get_by_id(shippingmethod_id):
+    """Data dict of a shipping method, or None if there is no such id."""
+    return registry.get_values().by_id.get(shippingmethod_id)
+
+
+def get_by_identifier(identifier):
+    """Data dict of a shipping method, or None if there is no such identifier."""
+    shippingmethod_id = registry.get_values().ids.get(identifier)
+    return get_by_id(shippingmethod_id) if shippingmethod_id is not None else None
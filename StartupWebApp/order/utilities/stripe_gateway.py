@@ -0,0 +1,165 @@
+"""
+The one place order code calls the Stripe API.
+
+configure() (run on import) sets up the stripe library for gunicorn's sync
+workers, where a request blocked on Stripe holds a whole worker:
+
+- one persistent HTTP client per worker thread, so calls reuse a kept-alive
+  connection (and its TLS session) instead of dialing Stripe every time
+- tight timeouts, settings.STRIPE_CONNECT_TIMEOUT and STRIPE_READ_TIMEOUT,
+  instead of the library's 80 seconds
+- settings.STRIPE_MAX_NETWORK_RETRIES retries of connection errors, 409s and
+  5xx responses, with the library's capped exponential backoff and jitter;
+  retried POSTs carry an idempotency key, so a retry never creates twice
+
+Every API call also goes through a per-process circuit breaker. After
+settings.STRIPE_CIRCUIT_BREAKER_FAILURES consecutive calls fail with a
+connection error, rate limit or server error, calls raise CircuitOpenError
+without contacting Stripe for STRIPE_CIRCUIT_BREAKER_RESET_SECONDS. Then a
+single trial call is let through: success closes the circuit, failure opens
+it again. Client errors (invalid requests, authentication) mean Stripe is up
+and do not count.
+
+CircuitOpenError is an APIConnectionError, so callers that handle Stripe
+errors handle it already. See fake_stripe_server for a local Stripe
+stand-in for tests and latency benchmarks.
+"""
+
+import logging
+import threading
+import time
+
+import stripe
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(stripe.error.APIConnectionError):
+    """Raised instead of calling Stripe while the circuit breaker is open."""
+
+
+# Failures that suggest Stripe (or the network to it) is degraded
+BREAKER_ERRORS = (stripe.error.APIConnectionError, stripe.error.APIError, stripe.error.RateLimitError)
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker shared by the threads of one process.
+
+    Thresholds are read from settings on every call, so they can be changed
+    without rebuilding the breaker.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.failure_count = 0
+            self.opened_at = None
+            self.trial_in_progress = False
+
+    def is_open(self):
+        return self.opened_at is not None
+
+    def before_call(self):
+        """
+        Raises:
+            CircuitOpenError: If the circuit is open and no trial call is due
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return
+            open_seconds = time.monotonic() - self.opened_at
+            if open_seconds < settings.STRIPE_CIRCUIT_BREAKER_RESET_SECONDS or self.trial_in_progress:
+                raise CircuitOpenError('Stripe circuit breaker is open; not calling Stripe')
+            # Half-open: this call is the trial, the others keep failing fast until it returns
+            self.trial_in_progress = True
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info('Stripe circuit breaker closed')
+            self.failure_count = 0
+            self.opened_at = None
+            self.trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failure_count += 1
+            self.trial_in_progress = False
+            if self.opened_at is not None or self.failure_count >= settings.STRIPE_CIRCUIT_BREAKER_FAILURES:
+                if self.opened_at is None:
+                    logger.warning(f'Stripe circuit breaker opened after {self.failure_count} consecutive failures')
+                self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """End a trial call that ended without a Stripe response either way."""
+        with self._lock:
+            self.trial_in_progress = False
+
+
+circuit_breaker = CircuitBreaker()
+
+
+def configure():
+    """Apply the Stripe settings to the stripe library; run again after changing them."""
+    stripe.api_key = settings.STRIPE_SERVER_SECRET_KEY
+    stripe.log = settings.STRIPE_LOG_LEVEL
+    stripe.max_network_retries = settings.STRIPE_MAX_NETWORK_RETRIES
+    # RequestsClient keeps one requests.Session (and so one connection pool) per thread
+    stripe.default_http_client = stripe.RequestsClient(
+        timeout=(settings.STRIPE_CONNECT_TIMEOUT, settings.STRIPE_READ_TIMEOUT))
+
+
+def call(function, *args, **kwargs):
+    """
+    Call a stripe library function through the circuit breaker.
+
+    Raises:
+        CircuitOpenError: If the circuit is open
+        stripe.error.StripeError: As raised by function
+    """
+    circuit_breaker.before_call()
+    try:
+        result = function(*args, **kwargs)
+    except BREAKER_ERRORS:
+        circuit_breaker.record_failure()
+        raise
+    except stripe.error.StripeError:
+        # Stripe answered, so it is up
+        circuit_breaker.record_success()
+        raise
+    except BaseException:
+        circuit_breaker.release_trial()
+        raise
+    circuit_breaker.record_success()
+    return result
+
+
+def create_checkout_session(**params):
+    """stripe.checkout.Session.create() through the circuit breaker."""
+    return call(stripe.checkout.Session.create, **params)
+
+
+def retrieve_checkout_session(session_id):
+    """stripe.checkout.Session.retrieve() through the circuit breaker."""
+    return call(stripe.checkout.Session.retrieve, session_id)
+
+
+def construct_webhook_event(payload, sig_header, webhook_secret):
+    """
+    Verify a webhook signature and parse the event.
+
+    Local computation only, so it does not go through the circuit breaker.
+
+    Raises:
+        ValueError: If the payload is not valid JSON
+        stripe.error.SignatureVerificationError: If the signature does not match
+    """
+    return stripe.Webhook.construct_event(payload, sig_header, webhook_secret)
+
+
+configure()
@@ -0,0 +1,159 @@
+"""
+Durable inbox for Stripe webhook events.
+
+stripe_webhook only verifies an event's signature and stores it here as a
+Webhookevent, then answers Stripe straight away; creating the order, sending
+the confirmation email over SMTP and deleting the cart happen later in the
+process_webhook_events command. A slow mail server can then no longer make
+Stripe time out and redeliver.
+
+Events are stored with INSERT ... ON CONFLICT DO NOTHING on the Stripe event
+id, so a redelivered event is stored once. Workers claim due events with
+SELECT ... FOR UPDATE SKIP LOCKED in a short transaction, marking them
+'processing' for LEASE_SECONDS, and process them outside it, so any number of
+workers can run without processing an event twice at once. A worker that dies
+mid-event leaves the claim to lapse, and the event is claimed again.
+
+The handler returns the response the webhook used to send:
+
+    2xx or 3xx  processed
+    5xx, or an exception
+                retried after RETRY_BASE_SECONDS, doubling per attempt up to
+                RETRY_MAX_SECONDS, with jitter; dead after MAX_ATTEMPTS
+    4xx         retried the same way, but dead after MAX_CLIENT_ERROR_ATTEMPTS:
+                usually the event itself is unusable, but it can also refer to
+                data (a cart, a checkout session) not yet visible to the worker
+
+Dead events stay in the table (status 'dead', with last_error) for the admin
+to inspect; get_queue_stats() reports queue depth and processing latency.
+"""
+
+import logging
+import random
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Min
+from django.utils import timezone
+
+from order.models import Webhookevent
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 5 * 60
+MAX_ATTEMPTS = 8
+MAX_CLIENT_ERROR_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 60 * 60
+
+
+def enqueue(event_data):
+    """Store a verified event unless an event with its id is already stored."""
+    Webhookevent.objects.bulk_create(
+        [Webhookevent(stripe_event_id=event_data['id'], event_type=event_data['type'], payload=event_data)],
+        ignore_conflicts=True,
+    )
+
+
+def due_events(now):
+    """Pending events whose time has come, and processing events whose claim has lapsed."""
+    return Webhookevent.objects.filter(status__in=['pending', 'processing'], next_attempt_date_time__lte=now)
+
+
+def claim_due_events(batch_size):
+    """
+    Claim up to batch_size due events, oldest first, for LEASE_SECONDS.
+
+    Returns:
+        list: The claimed Webhookevents, with attempts already counting this attempt
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        event_ids = list(
+            due_events(now)
+            .order_by('next_attempt_date_time', 'id')
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)[:batch_size]
+        )
+        Webhookevent.objects.filter(id__in=event_ids).update(
+            status='processing',
+            attempts=F('attempts') + 1,
+            next_attempt_date_time=now + timedelta(seconds=LEASE_SECONDS),
+        )
+    return list(Webhookevent.objects.filter(id__in=event_ids).order_by('next_attempt_date_time', 'id'))
+
+
+def get_retry_delay(attempts):
+    """Seconds before retrying an event that has failed attempts times: exponential, capped, jittered."""
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    return random.uniform(delay / 2, delay)
+
+
+def process_event(webhook_event, handler):
+    """
+    Run handler on a claimed event's payload and record the outcome.
+
+    Returns:
+        str: The event's new status
+    """
+    try:
+        response = handler(webhook_event.payload)
+        status_code = response.status_code
+        error = None if status_code < 400 else response.content.decode('utf8')
+    except Exception as e:
+        logger.exception(f'Error processing webhook event {webhook_event.stripe_event_id}: {str(e)}')
+        status_code = 500
+        error = str(e)
+
+    now = timezone.now()
+    if status_code < 400:
+        changes = {'status': 'processed', 'processed_date_time': now, 'last_error': None}
+    elif webhook_event.attempts >= (MAX_ATTEMPTS if status_code >= 500 else MAX_CLIENT_ERROR_ATTEMPTS):
+        changes = {'status': 'dead', 'last_error': error}
+        # Log for CloudWatch alarm
+        logger.error(
+            f'[WEBHOOK_DEAD_LETTER] event={webhook_event.stripe_event_id} type={webhook_event.event_type} '
+            f'attempts={webhook_event.attempts} error={error}')
+    else:
+        retry_at = now + timedelta(seconds=get_retry_delay(webhook_event.attempts))
+        changes = {'status': 'pending', 'next_attempt_date_time': retry_at, 'last_error': error}
+        logger.warning(
+            f'Webhook event {webhook_event.stripe_event_id} failed (attempt {webhook_event.attempts}), '
+            f'retrying at {retry_at.isoformat()}: {error}')
+
+    # Only while the claim is ours: if it lapsed, another worker has claimed the event again
+    Webhookevent.objects.filter(
+        id=webhook_event.id, status='processing', attempts=webhook_event.attempts).update(**changes)
+    return changes['status']
+
+
+def get_queue_stats(since=None):
+    """
+    Queue depth and processing latency.
+
+    Returns:
+        dict: queue_depth (events pending or claimed), oldest_waiting_seconds (age of the
+            oldest of those, or None), dead_count, and processed_count plus average and
+            maximum latency_seconds from receipt to processing for events processed since
+            since (default: the last hour)
+    """
+    now = timezone.now()
+    since = since or now - timedelta(hours=1)
+    waiting = Webhookevent.objects.filter(status__in=['pending', 'processing']).aggregate(
+        queue_depth=Count('id'), oldest_received=Min('received_date_time'))
+    processed = Webhookevent.objects.filter(status='processed', processed_date_time__gte=since).aggregate(
+        processed_count=Count('id'),
+        average_latency=Avg(F('processed_date_time') - F('received_date_time')),
+        max_latency=Max(F('processed_date_time') - F('received_date_time')),
+    )
+    return {
+        'queue_depth': waiting['queue_depth'],
+        'oldest_waiting_seconds': (
+            (now - waiting['oldest_received']).total_seconds() if waiting['oldest_received'] is not None else None),
+        'dead_count': Webhookevent.objects.filter(status='dead').count(),
+        'processed_count': processed['processed_count'],
+        'average_latency_seconds': (
+            processed['average_latency'].total_seconds() if processed['average_latency'] is not None else None),
+        'max_latency_seconds': (
+            processed['max_latency'].total_seconds() if processed['max_latency'] is not None else None),
+    }
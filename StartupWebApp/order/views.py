@@ -1,16 +1,25 @@
 from django.http import JsonResponse
 from django.http import HttpResponse
-from django.views.decorators.cache import never_cache
+from django.views.decorators.cache import cache_control, never_cache
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.mail import EmailMultiAlternatives
 from smtplib import SMTPDataError
-from django.core.signing import Signer
+from django.core.signing import BadSignature, Signer
 from django.db import transaction
 from user.models import Prospect, Email, Emailsent
 from order.utilities import order_utils
+from order.utilities import catalog_blobs
+from order.utilities import catalog_cache
+from order.utilities import catalog_utils
+from order.utilities import order_configuration
+from order.utilities import checkout_sessions
+from order.utilities import stripe_gateway
+from order.utilities import webhook_inbox
 from order.models import (
     Orderpayment,
     Ordershippingaddress,
@@ -23,29 +32,23 @@ from order.models import (
     Ordershippingmethod,
 )
 from order.models import (
-    Orderconfiguration,
     Sku,
-    Skuprice,
-    Skuimage,
     Cart,
     Cartsku,
-    Productsku,
-    Product,
-    Productimage,
-    Productvideo,
-    Shippingmethod,
     Cartshippingmethod,
 )
 from StartupWebApp.form import validator
 from StartupWebApp.utilities import identifier
 from django.utils import timezone
+from decimal import Decimal, InvalidOperation
+import hashlib
+import json
 import logging
+import re
 import stripe
 
-stripe.api_key = settings.STRIPE_SERVER_SECRET_KEY
-stripe.log = settings.STRIPE_LOG_LEVEL
-
 email_unsubscribe_signer = Signer(salt='email_unsubscribe')
+products_page_cursor_signer = Signer(salt='products_page_cursor')
 
 # from user.models import
 
@@ -53,6 +56,19 @@ logger = logging.getLogger(__name__)
 
 order_api_version = '0.0.1'
 
+# Seconds CloudFront may serve an anonymous catalog response before revalidating.
+# Browsers always revalidate (max-age=0) and get a cheap 304 while the ETag matches.
+catalog_cdn_max_age = 60
+
+products_page_default_limit = 20
+products_page_max_limit = 100
+
+search_query_max_length = 200
+
+products_batch_max_identifiers = 50
+
+cart_apply_max_operations = 50
+
 # @cache_control(max_age=10) #set cache control to 10 seconds
 
 
@@ -63,6 +79,12 @@ def index(request):
     )
 
 
+@cache_control(private=True, no_cache=True)
+@vary_on_headers('Cookie')
+@condition(
+    etag_func=order_utils.get_order_detail_etag,
+    last_modified_func=order_utils.get_order_detail_last_modified,
+)
 def order_detail(request, order_identifier):
     # raise ValueError('A very specific bad thing happened.')
     try:
@@ -119,107 +141,236 @@ def order_detail(request, order_identifier):
     return response
 
 
+def products_response_body(products_json):
+    """Encoded /order/products response around the pre-encoded products listing."""
+    return catalog_blobs.encode_json_object([
+        ('products_data', products_json),
+        ('order-api-version', order_api_version),
+    ])
+
+
+def products_etag(request):
+    return catalog_cache.get_catalog_etag()
+
+
+def products_last_modified(request):
+    return catalog_cache.get_catalog_last_modified()
+
+
+@cache_control(public=True, max_age=0, s_maxage=catalog_cdn_max_age, must_revalidate=True)
+@vary_on_headers('Origin')
+@condition(etag_func=products_etag, last_modified_func=products_last_modified)
 def products(request):
     # raise ValueError('A very specific bad thing happened.')
-    products_dict = {}
-    for product in Product.objects.all():
-        product_data = {}
-        product_data['title'] = product.title
-        product_data['title_url'] = product.title_url
-        product_data['identifier'] = product.identifier
-        product_data['headline'] = product.headline
-        product_data['description_part_1'] = product.description_part_1
-        product_data['description_part_2'] = product.description_part_2
-        price_low = None
-        price_high = None
-        for product_sku in Productsku.objects.filter(product=product):
-            if (
-                price_low is None
-                or Skuprice.objects.filter(sku=product_sku.sku).latest('created_date_time').price < price_low
-            ):
-                price_low = Skuprice.objects.filter(sku=product_sku.sku).latest('created_date_time').price
-            if (
-                price_high is None
-                or Skuprice.objects.filter(sku=product_sku.sku).latest('created_date_time').price > price_high
-            ):
-                price_high = Skuprice.objects.filter(sku=product_sku.sku).latest('created_date_time').price
-        product_data['price_low'] = price_low
-        product_data['price_high'] = price_high
-
-        product_image_main_exists = Productimage.objects.filter(product=product, main_image=True).exists()
-        product_image_url = None
-        if product_image_main_exists is True:
-            product_image_url = Productimage.objects.get(product=product, main_image=True).image_url
-        product_data['product_image_url'] = product_image_url
-        products_dict[product.identifier] = product_data
-
-    response = JsonResponse({'products_data': products_dict, 'order-api-version': order_api_version}, safe=False)
+    response_body = products_response_body(catalog_cache.get_products_json())
+    response = HttpResponse(response_body, content_type='application/json')
     return response
 
 
-def product(request, product_identifier):
+def products_page_etag(request):
+    query_string_hash = hashlib.sha256(request.META.get('QUERY_STRING', '').encode('utf-8')).hexdigest()[:16]
+    return f'{catalog_cache.get_catalog_etag()}-page-{query_string_hash}'
+
+
+def parse_products_page_price(request, parameter):
+    if parameter not in request.GET:
+        return None
+    price = Decimal(request.GET[parameter])
+    if not price.is_finite() or price < 0:
+        raise InvalidOperation(parameter)
+    return price
+
+
+@cache_control(public=True, max_age=0, s_maxage=catalog_cdn_max_age, must_revalidate=True)
+@vary_on_headers('Origin')
+@condition(etag_func=products_page_etag)
+def products_page(request):
     # raise ValueError('A very specific bad thing happened.')
+    error_dict = {}
+
+    sort = request.GET.get('sort', 'title')
+    if sort not in catalog_utils.PRODUCTS_PAGE_SORTS:
+        error_dict['error'] = 'invalid-sort'
+
     try:
-        product = Product.objects.get(identifier=product_identifier)
-
-        product_data = {}
-        product_data['title'] = product.title
-        product_data['title_url'] = product.title_url
-        product_data['identifier'] = product.identifier
-        product_data['headline'] = product.headline
-        product_data['description_part_1'] = product.description_part_1
-        product_data['description_part_2'] = product.description_part_2
-
-        product_images = {}
-        for product_image in Productimage.objects.filter(product=product).order_by('-main_image'):
-            product_image_data = {}
-            product_image_data['image_url'] = product_image.image_url
-            product_image_data['main'] = product_image.main_image
-            product_image_data['caption'] = product_image.caption
-            product_images[product_image.id] = product_image_data
-        product_data['product_images'] = product_images
-
-        product_videos = {}
-        for product_video in Productvideo.objects.filter(product=product).order_by('-id'):
-            product_video_data = {}
-            product_video_data['video_url'] = product_video.video_url
-            product_video_data['video_thumbnail_url'] = product_video.video_thumbnail_url
-            product_video_data['caption'] = product_video.caption
-            product_videos[product_video.id] = product_video_data
-        product_data['product_videos'] = product_videos
-
-        product_skus = {}
-        for product_sku in Productsku.objects.filter(product=product).order_by('sku__id'):
-            product_sku_data = {}
-            product_sku_data['color'] = product_sku.sku.color
-            product_sku_data['size'] = product_sku.sku.size
-            product_sku_data['description'] = product_sku.sku.description
-            product_sku_data['price'] = Skuprice.objects.filter(sku=product_sku.sku).latest('created_date_time').price
-            product_sku_data['inventory_status_identifier'] = product_sku.sku.sku_inventory.identifier
-            product_sku_data['inventory_status_title'] = product_sku.sku.sku_inventory.title
-            product_sku_data['inventory_status_description'] = product_sku.sku.sku_inventory.description
-
-            sku_images = {}
-            for sku_image in Skuimage.objects.filter(sku=product_sku.sku).order_by('-main_image'):
-                sku_image_data = {}
-                sku_image_data['image_url'] = sku_image.image_url
-                sku_image_data['main'] = sku_image.main_image
-                sku_image_data['caption'] = sku_image.caption
-                sku_images[sku_image.id] = sku_image_data
-            product_sku_data['sku_images'] = sku_images
-
-            product_skus[product_sku.sku.id] = product_sku_data
-        product_data['skus'] = product_skus
+        min_price = parse_products_page_price(request, 'min_price')
+        max_price = parse_products_page_price(request, 'max_price')
+    except InvalidOperation:
+        error_dict['error'] = 'invalid-price'
 
-        response = JsonResponse(
-            {
-                'product': 'success',
-                'product_identifier': product_identifier,
-                'product_data': product_data,
-                'order-api-version': order_api_version,
-            },
+    try:
+        limit = int(request.GET.get('limit', products_page_default_limit))
+        if limit < 1 or limit > products_page_max_limit:
+            raise ValueError(limit)
+    except ValueError:
+        error_dict['error'] = 'invalid-limit'
+
+    after = None
+    if 'cursor' in request.GET and not error_dict:
+        try:
+            cursor = products_page_cursor_signer.unsign_object(request.GET['cursor'])
+            if cursor['sort'] != sort:
+                raise BadSignature('cursor was issued for a different sort')
+            after_value, after_id = cursor['after']
+            field, descending = catalog_utils.PRODUCTS_PAGE_SORTS[sort]
+            after = (Decimal(after_value) if field == 'price_low' else after_value, int(after_id))
+        except (BadSignature, KeyError, TypeError, ValueError, InvalidOperation) as e:
+            logger.warning(f'Invalid products page cursor: {e}')
+            error_dict['error'] = 'invalid-cursor'
+
+    if error_dict:
+        return JsonResponse(
+            {'products_page': 'error', 'errors': error_dict, 'order-api-version': order_api_version},
+            safe=False,
+        )
+
+    products_list, next_position = catalog_cache.get_products_page(
+        sort, min_price, max_price, request.GET.get('inventory'), after, limit)
+    next_cursor = None
+    if next_position is not None:
+        next_cursor = products_page_cursor_signer.sign_object(
+            {'sort': sort, 'after': [str(next_position[0]), next_position[1]]})
+    response = JsonResponse(
+        {
+            'products_page': 'success',
+            'products_data': products_list,
+            'next_cursor': next_cursor,
+            'order-api-version': order_api_version,
+        },
+        safe=False,
+    )
+    return response
+
+
+def search_etag(request):
+    query_string_hash = hashlib.sha256(request.META.get('QUERY_STRING', '').encode('utf-8')).hexdigest()[:16]
+    return f'{catalog_cache.get_catalog_etag()}-search-{query_string_hash}'
+
+
+@cache_control(public=True, max_age=0, s_maxage=catalog_cdn_max_age, must_revalidate=True)
+@vary_on_headers('Origin')
+@condition(etag_func=search_etag)
+def search(request):
+    # raise ValueError('A very specific bad thing happened.')
+    error_dict = {}
+
+    query_text = request.GET.get('q', '').strip()
+    if not query_text:
+        error_dict['error'] = 'search-query-required'
+    elif len(query_text) > search_query_max_length:
+        error_dict['error'] = 'search-query-too-long'
+
+    try:
+        limit = int(request.GET.get('limit', products_page_default_limit))
+        if limit < 1 or limit > products_page_max_limit:
+            raise ValueError(limit)
+    except ValueError:
+        error_dict['error'] = 'invalid-limit'
+
+    if error_dict:
+        return JsonResponse(
+            {'search': 'error', 'errors': error_dict, 'order-api-version': order_api_version},
             safe=False,
         )
+
+    response = JsonResponse(
+        {
+            'search': 'success',
+            'query': query_text,
+            'products_data': catalog_cache.search_products(query_text, limit),
+            'order-api-version': order_api_version,
+        },
+        safe=False,
+    )
+    return response
+
+
+def product_response_body(product_identifier, product_json):
+    """Encoded /order/product/<identifier> response around a pre-encoded product payload."""
+    return catalog_blobs.encode_json_object([
+        ('product', 'success'),
+        ('product_identifier', product_identifier),
+        ('product_data', product_json),
+        ('order-api-version', order_api_version),
+    ])
+
+
+def product_etag(request, product_identifier):
+    return catalog_cache.get_product_etag(product_identifier)
+
+
+def product_last_modified(request, product_identifier):
+    return catalog_cache.get_product_last_modified(product_identifier)
+
+
+def products_batch_etag(request):
+    query_string_hash = hashlib.sha256(request.META.get('QUERY_STRING', '').encode('utf-8')).hexdigest()[:16]
+    return f'{catalog_cache.get_catalog_etag()}-batch-{query_string_hash}'
+
+
+@cache_control(public=True, max_age=0, s_maxage=catalog_cdn_max_age, must_revalidate=True)
+@vary_on_headers('Origin')
+@condition(etag_func=products_batch_etag)
+def products_batch(request):
+    # raise ValueError('A very specific bad thing happened.')
+    error_dict = {}
+
+    product_identifiers = list(dict.fromkeys(
+        product_identifier.strip()
+        for product_identifier in request.GET.get('ids', '').split(',')
+        if product_identifier.strip()
+    ))
+    if not product_identifiers:
+        error_dict['error'] = 'product-identifiers-required'
+    elif len(product_identifiers) > products_batch_max_identifiers:
+        error_dict['error'] = 'too-many-product-identifiers'
+
+    if error_dict:
+        return JsonResponse(
+            {'products_batch': 'error', 'errors': error_dict, 'order-api-version': order_api_version},
+            safe=False,
+        )
+
+    # Same identifier pattern as the product/<identifier> URL
+    valid_identifiers = [
+        product_identifier for product_identifier in product_identifiers
+        if re.fullmatch(r'[a-zA-Z\d]+', product_identifier)
+    ]
+    product_jsons = catalog_cache.get_product_jsons(valid_identifiers) if valid_identifiers else {}
+
+    products = []
+    for product_identifier in product_identifiers:
+        if product_identifier in product_jsons:
+            product_body = catalog_blobs.encode_json_object([
+                ('product', 'success'),
+                ('product_identifier', product_identifier),
+                ('product_data', product_jsons[product_identifier]),
+            ])
+        else:
+            product_body = catalog_blobs.encode_json_object([
+                ('product', 'error'),
+                ('errors', {'error': 'product-identifier-not-found'}),
+                ('product_identifier', product_identifier),
+            ])
+        products.append((product_identifier, product_body))
+
+    response_body = catalog_blobs.encode_json_object([
+        ('products_batch', 'success'),
+        ('products', catalog_blobs.encode_json_object(products)),
+        ('order-api-version', order_api_version),
+    ])
+    response = HttpResponse(response_body, content_type='application/json')
+    return response
+
+
+@cache_control(public=True, max_age=0, s_maxage=catalog_cdn_max_age, must_revalidate=True)
+@vary_on_headers('Origin')
+@condition(etag_func=product_etag, last_modified_func=product_last_modified)
+def product(request, product_identifier):
+    # raise ValueError('A very specific bad thing happened.')
+    try:
+        response_body = product_response_body(product_identifier, catalog_cache.get_product_json(product_identifier))
+        response = HttpResponse(response_body, content_type='application/json')
     except (ObjectDoesNotExist, ValueError) as e:
         logger.warning(f'Product not found for identifier {product_identifier}: {e}')
         error_dict = {"error": 'product-identifier-not-found'}
@@ -285,30 +436,8 @@ def cart_shipping_methods(request):
     shipping_method_selected = None
     cart = order_utils.look_up_cart(request)
     if cart is not None:
-        if Cartshippingmethod.objects.filter(cart=cart).exists():
-            shipping_method_selected = Cartshippingmethod.objects.get(cart=cart).shippingmethod.identifier
-        else:
-            Cartshippingmethod.objects.create(
-                cart=cart,
-                shippingmethod=Shippingmethod.objects.get(
-                    identifier=Orderconfiguration.objects.get(key='default_shipping_method').string_value
-                ),
-            )
-            shipping_method_selected = Orderconfiguration.objects.get(key='default_shipping_method').string_value
-
-        shipping_method_arr = Shippingmethod.objects.filter(
-            active=True,
-        ).order_by('-shipping_cost')
-
-        counter = 0
-        for shippingmethod in shipping_method_arr:
-            shipping_method_data = {}
-            shipping_method_data['identifier'] = shippingmethod.identifier
-            shipping_method_data['carrier'] = shippingmethod.carrier
-            shipping_method_data['shipping_cost'] = shippingmethod.shipping_cost
-            shipping_method_data['tracking_code_base_url'] = shippingmethod.tracking_code_base_url
-            shipping_methods[counter] = shipping_method_data
-            counter += 1
+        shipping_method_selected = order_utils.select_cart_shipping_method(cart)
+        shipping_methods = order_utils.get_active_shipping_methods()
 
     response = JsonResponse(
         {
@@ -329,12 +458,7 @@ def confirm_shipping_method(request):
         cart = order_utils.look_up_cart(request)
         shipping_method = {}
         if cart is not None:
-            if Cartshippingmethod.objects.filter(cart=cart).exists():
-                shipping_method_selected = Cartshippingmethod.objects.get(cart=cart).shippingmethod
-                shipping_method['identifier'] = shipping_method_selected.identifier
-                shipping_method['carrier'] = shipping_method_selected.carrier
-                shipping_method['shipping_cost'] = shipping_method_selected.shipping_cost
-                shipping_method['tracking_code_base_url'] = shipping_method_selected.tracking_code_base_url
+            shipping_method = order_utils.get_cart_shipping_method(cart) or {}
         response = JsonResponse(
             {
                 'checkout_allowed': checkout_allowed,
@@ -389,6 +513,74 @@ def confirm_totals(request):
     return response
 
 
+def get_cart_snapshot(request, cart):
+    """Response fields shared by cart-snapshot and cart-apply."""
+    shipping_methods = {}
+    shipping_method_selected = None
+    if cart is not None:
+        shipping_method_selected = order_utils.select_cart_shipping_method(cart)
+        shipping_methods = order_utils.get_active_shipping_methods()
+    return {
+        'checkout_allowed': order_utils.checkout_allowed(request),
+        'cart_found': (True if cart is not None else False),
+        'item_data': order_utils.get_cart_items(request, cart),
+        'cart_shipping_methods': shipping_methods,
+        'shipping_method_selected': shipping_method_selected,
+        'cart_totals_data': order_utils.get_cart_totals(cart),
+    }
+
+
+def cart_snapshot(request):
+    """
+    Everything the cart page shows, in one response.
+
+    Combines cart-items, cart-shipping-methods, cart-totals and checkout-allowed,
+    resolving the cart and the an_ct cookie once. Selecting the default shipping
+    method (as cart-shipping-methods does) happens before the totals are read,
+    so they include its cost.
+    """
+    # raise ValueError('A very specific bad thing happened.')
+    cart = order_utils.look_up_cart(request)
+    response = JsonResponse(
+        {**get_cart_snapshot(request, cart), 'order-api-version': order_api_version},
+        safe=False,
+    )
+    return response
+
+
+def confirm_snapshot(request):
+    """
+    Everything the checkout confirm page shows, in one response.
+
+    Combines confirm-items, confirm-shipping-method and confirm-totals. As with
+    those endpoints, only checkout_allowed is returned when checkout is not
+    allowed.
+    """
+    # raise ValueError('A very specific bad thing happened.')
+    checkout_allowed = order_utils.checkout_allowed(request)
+    if checkout_allowed:
+        cart = order_utils.look_up_cart(request)
+        shipping_method = {}
+        if cart is not None:
+            shipping_method = order_utils.get_cart_shipping_method(cart) or {}
+        response = JsonResponse(
+            {
+                'checkout_allowed': checkout_allowed,
+                'cart_found': (True if cart is not None else False),
+                'item_data': order_utils.get_cart_items(request, cart),
+                'confirm_shipping_method': shipping_method,
+                'confirm_totals_data': order_utils.get_cart_totals(cart),
+                'order-api-version': order_api_version,
+            },
+            safe=False,
+        )
+    else:
+        response = JsonResponse(
+            {'checkout_allowed': checkout_allowed, 'order-api-version': order_api_version}, safe=False
+        )
+    return response
+
+
 def cart_add_product_sku(request):
     # raise ValueError('A very specific bad thing happened.')
     cart = order_utils.look_up_cart(request)
@@ -405,15 +597,7 @@ def cart_add_product_sku(request):
             quantity_valid = validator.validateSkuQuantity(quantity)
             # Validators return True or error array - must use == True
             if quantity_valid == True:  # noqa: E712
-                sku = Sku.objects.get(id=sku_id)
-                product_sku = Productsku.objects.get(sku=sku)
-                cart_sku_exists = Cartsku.objects.filter(cart=cart, sku=product_sku.sku).exists()
-                if cart_sku_exists:
-                    cart_sku = Cartsku.objects.get(cart=cart, sku=product_sku.sku)
-                    cart_sku.quantity = cart_sku.quantity + int(quantity)
-                    cart_sku.save()
-                else:
-                    Cartsku.objects.create(cart=cart, sku=product_sku.sku, quantity=int(quantity))
+                order_utils.add_cart_sku(cart, sku_id, int(quantity))
                 cart_item_count = order_utils.count_cart_items(cart)
                 response = JsonResponse(
                     {
@@ -462,6 +646,99 @@ def cart_add_product_sku(request):
     return response
 
 
+def parse_cart_operations(operations_json):
+    """
+    Parse the operations field of a cart-apply request.
+
+    Returns:
+        tuple: (operations, error_dict, operation_index); operations is a list of
+        (action, sku_id, quantity) tuples for order_utils.apply_cart_operations
+    """
+    try:
+        raw_operations = json.loads(operations_json)
+    except ValueError:
+        return None, {'error': 'operations-invalid'}, None
+    if not isinstance(raw_operations, list):
+        return None, {'error': 'operations-invalid'}, None
+    if not raw_operations:
+        return None, {'error': 'operations-required'}, None
+    if len(raw_operations) > cart_apply_max_operations:
+        return None, {'error': 'too-many-operations'}, None
+
+    operations = []
+    for operation_index, raw_operation in enumerate(raw_operations):
+        if not isinstance(raw_operation, dict) or raw_operation.get('action') not in ('add', 'update', 'remove'):
+            return None, {'error': 'operation-invalid'}, operation_index
+        sku_id = raw_operation.get('sku_id')
+        if sku_id is None:
+            return None, {'error': 'sku-id-required'}, operation_index
+        if not re.fullmatch(r'\d+', str(sku_id)):
+            return None, {'error': 'sku-not-found'}, operation_index
+        quantity = None
+        if raw_operation['action'] != 'remove':
+            quantity = raw_operation.get('quantity')
+            if isinstance(quantity, (int, str)) and not isinstance(quantity, bool):
+                quantity_valid = validator.validateSkuQuantity(quantity)
+            else:
+                quantity_valid = [validator.not_an_int]
+            # Validators return True or error array - must use == True
+            if quantity_valid != True:  # noqa: E712
+                return None, {'quantity': quantity_valid}, operation_index
+            quantity = int(quantity)
+        operations.append((raw_operation['action'], int(sku_id), quantity))
+    return operations, None, None
+
+
+def cart_apply(request):
+    """
+    Apply several add/update/remove operations to the cart in one request.
+
+    POST field operations is a JSON list such as
+    [{"action": "update", "sku_id": 1, "quantity": 3}, {"action": "remove", "sku_id": 2}].
+    The operations are applied atomically (see order_utils.apply_cart_operations)
+    and the response carries the same fields as cart-snapshot for the result.
+    On an error nothing is changed and operation_index names the failing
+    operation, when there is one.
+    """
+    # raise ValueError('A very specific bad thing happened.')
+    operations = None
+    error_dict = None
+    operation_index = None
+    if request.method == 'POST' and 'operations' in request.POST:
+        operations, error_dict, operation_index = parse_cart_operations(request.POST['operations'])
+    else:
+        error_dict = {'error': 'operations-required'}
+
+    cart = None
+    cart_created = False
+    if error_dict is None:
+        cart = order_utils.look_up_cart(request)
+        if cart is None and any(action == 'add' for action, sku_id, quantity in operations):
+            cart = order_utils.create_cart(request)
+            cart_created = True
+        if cart is None:
+            error_dict = {'error': 'cart-not-found'}
+        else:
+            error_dict, operation_index = order_utils.apply_cart_operations(cart, operations)
+            if error_dict is not None and cart_created:
+                cart.delete()
+
+    if error_dict is not None:
+        response_dict = {'cart_apply': 'error', 'errors': error_dict}
+        if operation_index is not None:
+            response_dict['operation_index'] = operation_index
+        response_dict['order-api-version'] = order_api_version
+        return JsonResponse(response_dict, safe=False)
+
+    response = JsonResponse(
+        {'cart_apply': 'success', **get_cart_snapshot(request, cart), 'order-api-version': order_api_version},
+        safe=False,
+    )
+    if cart_created:
+        order_utils.set_anonymous_cart_cookie(request, response, cart)
+    return response
+
+
 def cart_update_sku_quantity(request):
     # raise ValueError('A very specific bad thing happened.')
     cart = order_utils.look_up_cart(request)
@@ -474,13 +751,7 @@ def cart_update_sku_quantity(request):
             quantity_new = request.POST['quantity']
         if sku_id is not None:
             try:
-                cart_sku = Cartsku.objects.get(cart=cart, sku=Sku.objects.get(id=sku_id))
-                cart_sku.quantity = quantity_new
-                cart_sku.save()
-                sku_subtotal = (
-                    Skuprice.objects.filter(sku=cart_sku.sku).latest('created_date_time').price
-                    * Cartsku.objects.get(cart=cart, sku=cart_sku.sku).quantity
-                )
+                sku_subtotal = order_utils.update_cart_sku_quantity(cart, sku_id, quantity_new)
                 cart_totals_dict = order_utils.get_cart_totals(cart)
                 response = JsonResponse(
                     {
@@ -529,29 +800,15 @@ def cart_remove_sku(request):
             sku_id = request.POST['sku_id']
         if sku_id is not None:
             try:
-                cart_sku = Cartsku.objects.get(cart=cart, sku=Sku.objects.get(id=sku_id))
-                cart_sku.delete()
+                order_utils.remove_cart_sku(cart, sku_id)
 
-                shipping_methods = {}
                 shipping_method_selected = None
 
-                if Cartshippingmethod.objects.filter(cart=cart).exists():
-                    Cartshippingmethod.objects.get(cart=cart).delete()
+                shipping_methods = order_utils.get_active_shipping_methods()
 
-                shipping_method_arr = Shippingmethod.objects.filter(active=True).order_by('-shipping_cost')
-
-                counter = 0
-                for shippingmethod in shipping_method_arr:
-                    shipping_method_data = {}
-                    shipping_method_data['identifier'] = shippingmethod.identifier
-                    shipping_method_data['carrier'] = shippingmethod.carrier
-                    shipping_method_data['shipping_cost'] = shippingmethod.shipping_cost
-                    shipping_method_data['tracking_code_base_url'] = shippingmethod.tracking_code_base_url
-                    shipping_methods[counter] = shipping_method_data
-                    counter += 1
-
-                cart_totals_dict = order_utils.get_cart_totals(cart)
-                cart_item_count = order_utils.count_cart_items(cart)
+                cart_summary = order_utils.get_cart_summary(cart)
+                cart_totals_dict = order_utils.get_cart_totals(cart, cart_summary)
+                cart_item_count = cart_summary['item_count']
                 response = JsonResponse(
                     {
                         'cart_remove_sku': 'success',
@@ -600,17 +857,7 @@ def cart_update_shipping_method(request):
         if shipping_method_identifier is not None:
             try:
                 # raise ValueError('A very specific bad thing happened.')
-                cart_shipping_method_exists = Cartshippingmethod.objects.filter(cart=cart).exists()
-                if cart_shipping_method_exists:
-                    cart_shipping_method = Cartshippingmethod.objects.get(cart=cart)
-                    cart_shipping_method.shippingmethod = Shippingmethod.objects.get(
-                        identifier=shipping_method_identifier
-                    )
-                    cart_shipping_method.save()
-                else:
-                    Cartshippingmethod.objects.create(
-                        cart=cart, shippingmethod=Shippingmethod.objects.get(identifier=shipping_method_identifier)
-                    )
+                order_utils.set_cart_shipping_method(cart, shipping_method_identifier)
                 cart_totals_dict = order_utils.get_cart_totals(cart)
                 response = JsonResponse(
                     {
@@ -711,6 +958,22 @@ def create_checkout_session(request):
         )
         return response
 
+    # A SKU whose prices were deleted after it was added cannot be charged for
+    unpriced_sku_ids = [
+        item_data['sku_id'] for item_data in cart_items['product_sku_data'].values() if item_data['price'] is None]
+    if unpriced_sku_ids:
+        logger.error(f'Checkout refused: cart has SKUs without a current price: {unpriced_sku_ids}')
+        error_dict = {"error": 'cart-sku-not-priced'}
+        response = JsonResponse(
+            {
+                'create_checkout_session': 'error',
+                'errors': error_dict,
+                'order-api-version': order_api_version,
+            },
+            safe=False,
+        )
+        return response
+
     try:
         # Get frontend domain for building absolute URLs
         # Use settings to get the frontend domain
@@ -804,13 +1067,14 @@ def create_checkout_session(request):
         if customer_email:
             session_params['customer_email'] = customer_email
 
-        session = stripe.checkout.Session.create(**session_params)
+        # Reuses the session of an earlier click on the same cart
+        session_id, checkout_url = checkout_sessions.get_or_create_checkout_session(session_params)
 
         response = JsonResponse(
             {
                 'create_checkout_session': 'success',
-                'session_id': session.id,
-                'checkout_url': session.url,
+                'session_id': session_id,
+                'checkout_url': checkout_url,
                 'order-api-version': order_api_version,
             },
             safe=False,
@@ -870,7 +1134,7 @@ def checkout_session_success(request):
 
     try:
         # Retrieve the Stripe Checkout Session
-        session = stripe.checkout.Session.retrieve(session_id)
+        session = stripe_gateway.retrieve_checkout_session(session_id)
 
         # Verify payment is completed
         if session.payment_status != 'paid':
@@ -1021,16 +1285,14 @@ def checkout_session_success(request):
         # Create Orderstatus record
         Orderstatus.objects.create(
             order=order,
-            status=Status.objects.get(
-                identifier=Orderconfiguration.objects.get(key='initial_order_status').string_value
-            ),
+            status=Status.objects.get(identifier=order_configuration.get_value('initial_order_status')),
             created_date_time=now,
         )
 
         # Create Ordershippingmethod record
         order_shipping_method = Ordershippingmethod.objects.create(
             order=order,
-            shippingmethod=Cartshippingmethod.objects.get(cart=cart).shippingmethod
+            shippingmethod=Cartshippingmethod.objects.select_related('shippingmethod').get(cart=cart).shippingmethod
         )
 
         #################################
@@ -1049,9 +1311,7 @@ def checkout_session_success(request):
         to_address = customer_email
 
         if request.user.is_authenticated:
-            order_confirmation_em_cd_member = Orderconfiguration.objects.get(
-                key='order_confirmation_em_cd_member'
-            ).string_value
+            order_confirmation_em_cd_member = order_configuration.get_value('order_confirmation_em_cd_member')
             email = Email.objects.get(em_cd=order_confirmation_em_cd_member)
             order_confirmation_email_body_text = email.body_text
 
@@ -1075,9 +1335,7 @@ def checkout_session_success(request):
                 **order_confirmation_email_namespace
             )
         else:
-            order_confirmation_em_cd_prospect = Orderconfiguration.objects.get(
-                key='order_confirmation_em_cd_prospect'
-            ).string_value
+            order_confirmation_em_cd_prospect = order_configuration.get_value('order_confirmation_em_cd_prospect')
             email = Email.objects.get(em_cd=order_confirmation_em_cd_prospect)
             order_confirmation_email_body_text = email.body_text
 
@@ -1164,6 +1422,21 @@ def checkout_session_success(request):
             },
             safe=False,
         )
+    except stripe.error.StripeError as e:
+        # Includes stripe_gateway.CircuitOpenError while Stripe is failing
+        logger.error(f'Stripe error retrieving checkout session: {str(e)}')
+        error_dict = {
+            "error": 'stripe-error',
+            "description": str(e)
+        }
+        response = JsonResponse(
+            {
+                'checkout_session_success': 'error',
+                'errors': error_dict,
+                'order-api-version': order_api_version,
+            },
+            safe=False,
+        )
     except Exception as e:
         logger.error(f'Unexpected error processing checkout session: {str(e)}')
         error_dict = {
@@ -1185,9 +1458,9 @@ def checkout_session_success(request):
 @csrf_exempt
 def stripe_webhook(request):
     """
-    Handle incoming Stripe webhook events.
-    Supports checkout.session.completed and checkout.session.expired events.
-    Uses signature verification for security.
+    Receive Stripe webhook events.
+    Verifies the signature, stores the event in the webhook inbox and acknowledges it;
+    the process_webhook_events command processes it (see order/utilities/webhook_inbox.py).
     """
     if request.method != 'POST':
         return JsonResponse({'error': 'method-not-allowed'}, status=405)
@@ -1203,9 +1476,9 @@ def stripe_webhook(request):
         logger.error('STRIPE_WEBHOOK_SECRET not configured')
         return JsonResponse({'error': 'webhook-not-configured'}, status=500)
 
-    # Verify webhook signature and construct event
+    # Verify webhook signature
     try:
-        event = stripe.Webhook.construct_event(
+        stripe_gateway.construct_webhook_event(
             payload, sig_header, webhook_secret
         )
     except ValueError as e:
@@ -1217,7 +1490,17 @@ def stripe_webhook(request):
         logger.error(f'Invalid webhook signature: {str(e)}')
         return JsonResponse({'error': 'invalid-signature'}, status=400)
 
-    # Handle the event
+    # Store the verified event as Stripe sent it; a redelivered event is stored once
+    webhook_inbox.enqueue(json.loads(payload))
+
+    return JsonResponse({'received': True}, status=200)
+
+
+def process_stripe_event(event):
+    """
+    Process a Stripe webhook event from the webhook inbox.
+    Supports checkout.session.completed and checkout.session.expired events.
+    """
     event_type = event['type']
 
     if event_type == 'checkout.session.completed':
@@ -1275,7 +1558,7 @@ def handle_checkout_session_completed(event):
 
     try:
         # Retrieve full session details from Stripe
-        full_session = stripe.checkout.Session.retrieve(session_id)
+        full_session = stripe_gateway.retrieve_checkout_session(session_id)
 
         # Extract address information
         customer_details = full_session.customer_details
@@ -1369,20 +1652,18 @@ def handle_checkout_session_completed(event):
                     order=order,
                     sku=cart_sku.sku,
                     quantity=cart_sku.quantity,
-                    price_each=cart_sku.sku.skuprice_set.latest('created_date_time').price,
+                    price_each=cart_sku.sku.current_price.price,
                 )
 
             # Create Orderstatus record
             Orderstatus.objects.create(
                 order=order,
-                status=Status.objects.get(
-                    identifier=Orderconfiguration.objects.get(key='initial_order_status').string_value
-                ),
+                status=Status.objects.get(identifier=order_configuration.get_value('initial_order_status')),
                 created_date_time=now,
             )
 
             # Create Ordershippingmethod record
-            cart_shipping_method = Cartshippingmethod.objects.get(cart=cart)
+            cart_shipping_method = Cartshippingmethod.objects.select_related('shippingmethod').get(cart=cart)
             Ordershippingmethod.objects.create(
                 order=order,
                 shippingmethod=cart_shipping_method.shippingmethod
@@ -1488,9 +1769,7 @@ def send_order_confirmation_email(order, customer_name, customer_email, cart):
 
         # Determine member vs prospect
         if order.member:
-            order_confirmation_em_cd = Orderconfiguration.objects.get(
-                key='order_confirmation_em_cd_member'
-            ).string_value
+            order_confirmation_em_cd = order_configuration.get_value('order_confirmation_em_cd_member')
             email = Email.objects.get(em_cd=order_confirmation_em_cd)
 
             email_namespace = {
@@ -1510,9 +1789,7 @@ def send_order_confirmation_email(order, customer_name, customer_email, cart):
                 'mb_cd': order.member.mb_cd,
             }
         else:
-            order_confirmation_em_cd = Orderconfiguration.objects.get(
-                key='order_confirmation_em_cd_prospect'
-            ).string_value
+            order_confirmation_em_cd = order_configuration.get_value('order_confirmation_em_cd_prospect')
             email = Email.objects.get(em_cd=order_confirmation_em_cd)
 
             prospect = order.prospect
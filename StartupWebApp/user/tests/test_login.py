@@ -3,6 +3,8 @@
 import json
 
 from StartupWebApp.utilities.test_base import PostgreSQLTestCase
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.contrib.auth.models import User, Group
 
@@ -173,7 +175,7 @@ class LoginAPITest(PostgreSQLTestCase):
         self.assertEqual(anonymous_carts.count(), 0, 'Anonymous cart should be deleted after merge')
 
     def test_login_with_existing_member_cart(self):
-        """Test login when member already has items in cart - should merge without duplicates"""
+        """Test login when member already has items in cart - should merge without duplicates, summing quantities"""
         # First login and add item to member cart
         self.client.post('/user/login', data={
             'username': 'testuser',
@@ -206,11 +208,42 @@ class LoginAPITest(PostgreSQLTestCase):
         self.assertEqual(response_data['cart_item_count'], 1,
                          'Member cart should still have 1 item (no duplicates)')
 
-        # Verify the original quantity is preserved (not merged)
+        # Verify the anonymous quantity was added to the member cart quantity
         user = User.objects.get(username='testuser')
         member_cart = Cart.objects.get(member=user.member)
         cart_sku = Cartsku.objects.get(cart=member_cart, sku_id=1)
-        self.assertEqual(cart_sku.quantity, 3, 'Original member cart quantity should be preserved')
+        self.assertEqual(cart_sku.quantity, 4, 'Member and anonymous cart quantities should be summed')
+        self.assertEqual(Cart.objects.count(), 1, 'Anonymous cart should be deleted after merge')
+
+    def test_cart_merge_query_count_does_not_depend_on_cart_size(self):
+        """Test that merging a large anonymous cart at login costs the same queries as merging one line"""
+        for sku_id in range(2, 8):
+            Sku.objects.create(id=sku_id, color='Silver', size='Medium', sku_type_id=1, sku_inventory_id=1)
+            Skuprice.objects.create(id=sku_id, price=1, created_date_time=timezone.now(), sku_id=sku_id)
+            Productsku.objects.create(id=sku_id, product_id=1, sku_id=sku_id)
+        login_data = {'username': 'testuser', 'password': 'ValidPass1!', 'remember_me': 'false'}
+        self.client.post('/user/login', data=login_data)
+        self.client.post('/order/cart-add-product-sku', data={'sku_id': '1', 'quantity': '1'})
+        self.client.post('/user/logout')
+
+        login_query_counts = []
+        for sku_ids in [[1], range(1, 8)]:
+            for sku_id in sku_ids:
+                self.client.post('/order/cart-add-product-sku', data={'sku_id': str(sku_id), 'quantity': '2'})
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post('/user/login', data=login_data)
+            self.assertEqual(json.loads(response.content.decode('utf8'))['login'], 'true')
+            login_query_counts.append(len(context.captured_queries))
+            self.client.post('/user/logout')
+
+        self.assertEqual(login_query_counts[0], login_query_counts[1])
+        member_cart = Cart.objects.get()
+        self.assertEqual(
+            dict(Cartsku.objects.filter(cart=member_cart).values_list('sku_id', 'quantity')),
+            {1: 5, 2: 2, 3: 2, 4: 2, 5: 2, 6: 2, 7: 2},
+        )
+        self.assertEqual(member_cart.item_count, 7)
+        self.assertEqual(member_cart.item_subtotal, 3.5 * 5 + 12)
 
     def test_case_sensitive_username(self):
         """Test that username is case-sensitive"""
@@ -23,18 +23,14 @@ from user.models import (
     Prospect,
     Chatmessage,
 )
-from order.models import Order, Cartsku, Cartshippingmethod
+from order.models import Order
 from StartupWebApp.form import validator
 from StartupWebApp.utilities import random, identifier, email_helpers
 from clientevent.models import Configuration as ClientEventConfiguration
 from django.utils import timezone
 from order.utilities import order_utils
-import stripe
 import logging
 
-stripe.api_key = settings.STRIPE_SERVER_SECRET_KEY
-stripe.log = settings.STRIPE_LOG_LEVEL
-
 
 # from user.models import
 
@@ -67,10 +63,7 @@ def token(request):
 def logged_in(request):
     # raise ValueError('A very specific bad thing happened.')
     cart = order_utils.look_up_cart(request)
-    cart_item_count = 0
-    if cart is not None:
-        for cartsku in Cartsku.objects.filter(cart=cart):
-            cart_item_count += 1
+    cart_item_count = order_utils.count_cart_items(cart)
 
     if request.user.is_authenticated:
         # print ('is_authenticated')
@@ -136,45 +129,7 @@ def client_login(request):
         login(request, user)
         # print ('successful login')
 
-        member_cart = order_utils.look_up_member_cart(request)
-        if member_cart is None:
-            # print ('member_cart is None')
-            anonymous_cart = order_utils.look_up_anonymous_cart(request)
-            if anonymous_cart is not None:
-                # logger.debug('Anonymous cart found during registration')
-                anonymous_cart.member = request.user.member
-                anonymous_cart.anonymous_cart_id = None
-                anonymous_cart.save()
-        else:
-            # print ('member_cart is NOT None')
-            anonymous_cart = order_utils.look_up_anonymous_cart(request)
-            if anonymous_cart is not None:
-                # logger.debug('Anonymous cart found during registration')
-                # merge anonymous cart into member cart
-                # skus. put any skus from the anonymous cart into the member cart if
-                # they're not already there
-                for anonymous_cart_sku in Cartsku.objects.filter(cart=anonymous_cart):
-                    sku_exists_in_member_cart = Cartsku.objects.filter(
-                        cart=member_cart, sku=anonymous_cart_sku.sku
-                    ).exists()
-                    if not sku_exists_in_member_cart:
-                        Cartsku.objects.create(
-                            cart=member_cart, sku=anonymous_cart_sku.sku, quantity=anonymous_cart_sku.quantity
-                        )
-                # shipping method. If member cart doesn't have shipping method see if we
-                # can apply the anonymous cart shipping method
-                member_cart_shipping_method_exists = Cartshippingmethod.objects.filter(cart=member_cart).exists()
-                if not member_cart_shipping_method_exists:
-                    anonymous_cart_shipping_method_exists = Cartshippingmethod.objects.filter(
-                        cart=anonymous_cart
-                    ).exists()
-                    if anonymous_cart_shipping_method_exists:
-                        Cartshippingmethod.objects.create(
-                            cart=member_cart,
-                            shippingmethod=Cartshippingmethod.objects.get(cart=anonymous_cart).shippingmethod,
-                        )
-                # delete anonymous cart
-                anonymous_cart.delete()
+        order_utils.merge_anonymous_cart(request)
 
         response = JsonResponse({'login': 'true', 'user-api-version': user_api_version}, safe=False)
         response.delete_cookie(key='an_ct', path='/', domain=settings.COOKIE_DOMAIN)
@@ -366,12 +321,7 @@ def create_account(request):
         if user is not None:
             login(request, user)
 
-            anonymous_cart = order_utils.look_up_anonymous_cart(request)
-            if anonymous_cart is not None:
-                logger.debug('Anonymous cart found during registration')
-                anonymous_cart.member = user.member
-                anonymous_cart.anonymous_cart_id = None
-                anonymous_cart.save()
+            order_utils.merge_anonymous_cart(request)
 
             if Prospect.objects.filter(email=email_address).exists():
                 prospect = Prospect.objects.get(email=email_address)
@@ -0,0 +1,245 @@
+#!/bin/bash
+
+##############################################################################
+# Create ECS Worker Service for StartupWebApp
+#
+# This script creates:
+# - ECS Service running 1 Fargate task of the webhook worker
+#   (python manage.py process_webhook_events)
+# - Rolling deployment configuration (new worker starts before the old stops)
+# - Circuit breaker for automatic rollback on failed deployments
+#
+# The worker has no port and no load balancer. Workers claim webhook events
+# with SELECT ... FOR UPDATE SKIP LOCKED, so the old and new task can overlap
+# during a deployment, and DESIRED_COUNT can be raised without changes.
+#
+# Prerequisites:
+# - ECS cluster must exist (run create-ecs-cluster.sh)
+# - Worker task definition must exist (run create-ecs-worker-task-definition.sh)
+#
+# Usage: ./scripts/infra/create-ecs-worker-service.sh
+#
+# IMPORTANT: Run this script in a separate terminal window, NOT in Claude chat
+##############################################################################
+
+set -e  # Exit on error
+set -u  # Exit on undefined variable
+
+# Colors for output
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m' # No Color
+
+# Configuration
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+# Initialize environment file
+source "${SCRIPT_DIR}/init-env.sh"
+ENV_FILE="${SCRIPT_DIR}/aws-resources.env"
+PROJECT_NAME="startupwebapp"
+ENVIRONMENT="production"
+SERVICE_NAME="${PROJECT_NAME}-worker-service"
+DESIRED_COUNT="1"
+
+echo -e "${BLUE}========================================${NC}"
+echo -e "${BLUE}Create ECS Worker Service${NC}"
+echo -e "${BLUE}========================================${NC}"
+echo ""
+
+# Source existing resource IDs
+if [ ! -f "$ENV_FILE" ]; then
+    echo -e "${RED}Error: aws-resources.env not found${NC}"
+    exit 1
+fi
+
+source "$ENV_FILE"
+
+# Verify prerequisites
+echo -e "${YELLOW}Verifying prerequisites...${NC}"
+
+if [ -z "${ECS_CLUSTER_NAME:-}" ]; then
+    echo -e "${RED}Error: ECS_CLUSTER_NAME not found in aws-resources.env${NC}"
+    echo -e "${YELLOW}Please run: ./scripts/infra/create-ecs-cluster.sh first${NC}"
+    exit 1
+fi
+
+if [ -z "${ECS_WORKER_TASK_DEFINITION_ARN:-}" ]; then
+    echo -e "${RED}Error: ECS_WORKER_TASK_DEFINITION_ARN not found in aws-resources.env${NC}"
+    echo -e "${YELLOW}Please run: ./scripts/infra/create-ecs-worker-task-definition.sh first${NC}"
+    exit 1
+fi
+
+if [ -z "${PRIVATE_SUBNET_1_ID:-}" ] || [ -z "${PRIVATE_SUBNET_2_ID:-}" ]; then
+    echo -e "${RED}Error: Private subnet IDs not found in aws-resources.env${NC}"
+    echo -e "${YELLOW}Please run: ./scripts/infra/create-vpc.sh first${NC}"
+    exit 1
+fi
+
+if [ -z "${BACKEND_SECURITY_GROUP_ID:-}" ]; then
+    echo -e "${RED}Error: BACKEND_SECURITY_GROUP_ID not found in aws-resources.env${NC}"
+    echo -e "${YELLOW}Please verify security groups are configured${NC}"
+    exit 1
+fi
+
+echo -e "${GREEN}✓ All prerequisites verified${NC}"
+echo ""
+
+# Check if service already exists
+echo -e "${YELLOW}Checking for existing worker service...${NC}"
+EXISTING_SERVICE=$(aws ecs describe-services \
+    --cluster "${ECS_CLUSTER_NAME}" \
+    --services "${SERVICE_NAME}" \
+    --region "${AWS_REGION}" \
+    --query 'services[?status!=`INACTIVE`].serviceArn' \
+    --output text 2>/dev/null || echo "")
+
+if [ -n "$EXISTING_SERVICE" ]; then
+    echo -e "${GREEN}✓ ECS Worker Service already exists: ${SERVICE_NAME}${NC}"
+    echo ""
+    echo -e "${YELLOW}To update the service, use: aws ecs update-service${NC}"
+    echo -e "${YELLOW}To destroy and recreate, use: ./scripts/infra/destroy-ecs-worker-service.sh${NC}"
+    exit 0
+fi
+
+echo -e "${YELLOW}No existing worker service found. Creating new service...${NC}"
+echo ""
+
+# Display configuration
+echo -e "${YELLOW}Configuration:${NC}"
+echo -e "  Service Name:           ${SERVICE_NAME}"
+echo -e "  Cluster:                ${ECS_CLUSTER_NAME}"
+echo -e "  Task Definition:        ${ECS_WORKER_TASK_DEFINITION_ARN}"
+echo -e "  Desired Count:          ${DESIRED_COUNT} task"
+echo -e "  Launch Type:            Fargate"
+echo -e "  Load Balancer:          None"
+echo ""
+echo -e "${YELLOW}Networking:${NC}"
+echo -e "  Subnets:                ${PRIVATE_SUBNET_1_ID}, ${PRIVATE_SUBNET_2_ID}"
+echo -e "  Security Group:         ${BACKEND_SECURITY_GROUP_ID}"
+echo -e "  Public IP:              DISABLED (private subnets)"
+echo ""
+echo -e "${YELLOW}Deployment Configuration:${NC}"
+echo -e "  Strategy:               Rolling update"
+echo -e "  Min Healthy:            100% (old worker runs until the new one starts)"
+echo -e "  Max Percent:            200%"
+echo -e "  Circuit Breaker:        Enabled (auto rollback on failure)"
+echo ""
+echo -e "${YELLOW}Cost Estimate:${NC}"
+echo -e "  1 task:                 ~\$9/month"
+echo ""
+
+read -p "Continue? (yes/no): " CONFIRM
+
+if [ "$CONFIRM" != "yes" ]; then
+    echo "Aborted."
+    exit 1
+fi
+
+# Create ECS Service
+echo ""
+echo -e "${YELLOW}Step 1: Creating ECS Worker Service...${NC}"
+
+SERVICE_ARN=$(aws ecs create-service \
+    --cluster "${ECS_CLUSTER_NAME}" \
+    --service-name "${SERVICE_NAME}" \
+    --task-definition "${ECS_WORKER_TASK_DEFINITION_ARN}" \
+    --desired-count "${DESIRED_COUNT}" \
+    --launch-type "FARGATE" \
+    --platform-version "LATEST" \
+    --network-configuration "awsvpcConfiguration={subnets=[${PRIVATE_SUBNET_1_ID},${PRIVATE_SUBNET_2_ID}],securityGroups=[${BACKEND_SECURITY_GROUP_ID}],assignPublicIp=DISABLED}" \
+    --deployment-configuration "deploymentCircuitBreaker={enable=true,rollback=true},minimumHealthyPercent=100,maximumPercent=200" \
+    --scheduling-strategy "REPLICA" \
+    --deployment-controller "type=ECS" \
+    --enable-execute-command \
+    --tags "key=Name,value=${SERVICE_NAME}" "key=Environment,value=${ENVIRONMENT}" "key=Project,value=${PROJECT_NAME}" \
+    --region "${AWS_REGION}" \
+    --query 'service.serviceArn' \
+    --output text)
+
+echo -e "${GREEN}✓ ECS Worker Service created: ${SERVICE_NAME}${NC}"
+echo -e "  ARN: ${SERVICE_ARN}"
+
+# Wait for service to stabilize (task to start)
+echo ""
+echo -e "${YELLOW}Step 2: Waiting for service to stabilize...${NC}"
+echo ""
+
+MAX_WAIT=300  # 5 minutes
+WAIT_INTERVAL=15
+ELAPSED=0
+
+while [ $ELAPSED -lt $MAX_WAIT ]; do
+    SERVICE_STATUS=$(aws ecs describe-services \
+        --cluster "${ECS_CLUSTER_NAME}" \
+        --services "${SERVICE_NAME}" \
+        --region "${AWS_REGION}" \
+        --query 'services[0].{running: runningCount, desired: desiredCount, pending: pendingCount, status: status}' \
+        --output json)
+
+    RUNNING=$(echo "$SERVICE_STATUS" | jq -r '.running')
+    DESIRED=$(echo "$SERVICE_STATUS" | jq -r '.desired')
+    PENDING=$(echo "$SERVICE_STATUS" | jq -r '.pending')
+    STATUS=$(echo "$SERVICE_STATUS" | jq -r '.status')
+
+    echo -e "  Status: ${STATUS} | Running: ${RUNNING}/${DESIRED} | Pending: ${PENDING}"
+
+    if [ "$RUNNING" == "$DESIRED" ] && [ "$RUNNING" != "0" ]; then
+        echo ""
+        echo -e "${GREEN}✓ Service stabilized! ${RUNNING} worker running.${NC}"
+        break
+    fi
+
+    sleep $WAIT_INTERVAL
+    ELAPSED=$((ELAPSED + WAIT_INTERVAL))
+done
+
+if [ $ELAPSED -ge $MAX_WAIT ]; then
+    echo ""
+    echo -e "${YELLOW}⚠ Service did not stabilize within ${MAX_WAIT} seconds.${NC}"
+    echo -e "${YELLOW}  Check CloudWatch logs: aws logs tail ${ECS_SERVICE_LOG_GROUP:-/ecs/${PROJECT_NAME}-service} --log-stream-name-prefix worker --since 10m${NC}"
+fi
+
+# Update aws-resources.env
+echo ""
+echo -e "${YELLOW}Step 3: Updating aws-resources.env...${NC}"
+
+# Check if variables exist, add or update
+if grep -q "^ECS_WORKER_SERVICE_NAME=" "$ENV_FILE"; then
+    sed -i.bak \
+        -e "s|^ECS_WORKER_SERVICE_NAME=.*|ECS_WORKER_SERVICE_NAME=\"${SERVICE_NAME}\"|" \
+        -e "s|^ECS_WORKER_SERVICE_ARN=.*|ECS_WORKER_SERVICE_ARN=\"${SERVICE_ARN}\"|" \
+        "$ENV_FILE"
+else
+    # Add new variables
+    echo "" >> "$ENV_FILE"
+    echo "# ECS Worker Service" >> "$ENV_FILE"
+    echo "ECS_WORKER_SERVICE_NAME=\"${SERVICE_NAME}\"" >> "$ENV_FILE"
+    echo "ECS_WORKER_SERVICE_ARN=\"${SERVICE_ARN}\"" >> "$ENV_FILE"
+fi
+rm -f "${ENV_FILE}.bak"
+
+echo -e "${GREEN}✓ aws-resources.env updated${NC}"
+
+# Summary
+echo ""
+echo -e "${GREEN}========================================${NC}"
+echo -e "${GREEN}ECS Worker Service Created Successfully${NC}"
+echo -e "${GREEN}========================================${NC}"
+echo ""
+echo -e "${GREEN}Service Details:${NC}"
+echo -e "  Name:                   ${SERVICE_NAME}"
+echo -e "  ARN:                    ${SERVICE_ARN}"
+echo -e "  Cluster:                ${ECS_CLUSTER_NAME}"
+echo -e "  Desired Count:          ${DESIRED_COUNT}"
+echo -e "  Launch Type:            Fargate"
+echo ""
+echo -e "${GREEN}Useful Commands:${NC}"
+echo -e "  View service:           aws ecs describe-services --cluster ${ECS_CLUSTER_NAME} --services ${SERVICE_NAME}"
+echo -e "  View logs:              aws logs tail /ecs/${PROJECT_NAME}-service --log-stream-name-prefix worker --follow"
+echo -e "  Queue stats:            aws ecs execute-command --cluster ${ECS_CLUSTER_NAME} --task <task-id> --container worker --interactive --command \"python manage.py process_webhook_events --stats\""
+echo ""
+echo -e "${GREEN}Next Steps:${NC}"
+echo -e "  1. Create Dead Letter Alarm: ./scripts/infra/create-webhook-dead-letter-alarm.sh"
+echo ""
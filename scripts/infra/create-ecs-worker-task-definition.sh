@@ -0,0 +1,292 @@
+#!/bin/bash
+
+##############################################################################
+# Create ECS Worker Task Definition for StartupWebApp
+#
+# This script creates:
+# - ECS task definition for the Stripe webhook worker
+#   (python manage.py process_webhook_events)
+# - Configured for Fargate launch type (0.25 vCPU, 0.5 GB RAM)
+# - Pulls database credentials from AWS Secrets Manager
+# - Logs to the web service's CloudWatch log group, stream prefix "worker",
+#   so the order email failure and webhook dead letter alarms see its logs
+#
+# The stripe-webhook endpoint only stores verified events; this worker
+# creates the orders, sends the confirmation emails and deletes the carts.
+# Without a running worker, paid checkouts never become orders.
+#
+# This is different from the SERVICE task definition:
+# - Service task: runs gunicorn, serves HTTP traffic behind the ALB
+# - Worker task: long-running, polls the webhook inbox, no port or ALB
+#
+# Prerequisites:
+# - ECS cluster must exist (run create-ecs-cluster.sh)
+# - IAM roles must exist (run create-ecs-task-role.sh)
+# - ECR repository must exist with image (run create-ecr.sh)
+# - Service task definition must exist (run create-ecs-service-task-definition.sh)
+#
+# Usage: ./scripts/infra/create-ecs-worker-task-definition.sh
+#
+# IMPORTANT: Run this script in a separate terminal window, NOT in Claude chat
+##############################################################################
+
+set -e  # Exit on error
+set -u  # Exit on undefined variable
+
+# Colors for output
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m' # No Color
+
+# Configuration
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+# Initialize environment file
+source "${SCRIPT_DIR}/init-env.sh"
+ENV_FILE="${SCRIPT_DIR}/aws-resources.env"
+PROJECT_NAME="startupwebapp"
+ENVIRONMENT="production"
+TASK_FAMILY="${PROJECT_NAME}-worker-task"
+TASK_CPU="256"   # 0.25 vCPU
+TASK_MEMORY="512"  # 0.5 GB
+
+echo -e "${BLUE}========================================${NC}"
+echo -e "${BLUE}Create ECS Worker Task Definition${NC}"
+echo -e "${BLUE}========================================${NC}"
+echo ""
+
+# Source existing resource IDs
+if [ ! -f "$ENV_FILE" ]; then
+    echo -e "${RED}Error: aws-resources.env not found${NC}"
+    exit 1
+fi
+
+source "$ENV_FILE"
+
+# Verify prerequisites
+echo -e "${YELLOW}Verifying prerequisites...${NC}"
+
+if [ -z "${ECS_CLUSTER_NAME:-}" ]; then
+    echo -e "${RED}Error: ECS_CLUSTER_NAME not found in aws-resources.env${NC}"
+    echo -e "${YELLOW}Please run: ./scripts/infra/create-ecs-cluster.sh first${NC}"
+    exit 1
+fi
+
+if [ -z "${ECS_TASK_EXECUTION_ROLE_ARN:-}" ]; then
+    echo -e "${RED}Error: ECS_TASK_EXECUTION_ROLE_ARN not found in aws-resources.env${NC}"
+    echo -e "${YELLOW}Please run: ./scripts/infra/create-ecs-task-role.sh first${NC}"
+    exit 1
+fi
+
+if [ -z "${ECS_TASK_ROLE_ARN:-}" ]; then
+    echo -e "${RED}Error: ECS_TASK_ROLE_ARN not found in aws-resources.env${NC}"
+    echo -e "${YELLOW}Please run: ./scripts/infra/create-ecs-task-role.sh first${NC}"
+    exit 1
+fi
+
+if [ -z "${ECR_REPOSITORY_URI:-}" ]; then
+    echo -e "${RED}Error: ECR_REPOSITORY_URI not found in aws-resources.env${NC}"
+    echo -e "${YELLOW}Please run: ./scripts/infra/create-ecr.sh first${NC}"
+    exit 1
+fi
+
+if [ -z "${DB_SECRET_ARN:-}" ]; then
+    echo -e "${RED}Error: DB_SECRET_ARN not found in aws-resources.env${NC}"
+    echo -e "${YELLOW}Please ensure Secrets Manager is configured${NC}"
+    exit 1
+fi
+
+if [ -z "${ECS_SERVICE_LOG_GROUP:-}" ]; then
+    echo -e "${RED}Error: ECS_SERVICE_LOG_GROUP not found in aws-resources.env${NC}"
+    echo -e "${YELLOW}Please run: ./scripts/infra/create-ecs-service-task-definition.sh first${NC}"
+    exit 1
+fi
+
+echo -e "${GREEN}✓ All prerequisites verified${NC}"
+echo ""
+
+# Check if task definition already exists
+if [ -n "${ECS_WORKER_TASK_DEFINITION_ARN:-}" ]; then
+    echo -e "${YELLOW}Checking if worker task definition exists...${NC}"
+    EXISTING_TASK_DEF=$(aws ecs describe-task-definition \
+        --task-definition "${TASK_FAMILY}" \
+        --region "${AWS_REGION}" \
+        --query 'taskDefinition.taskDefinitionArn' \
+        --output text 2>/dev/null || echo "")
+
+    if [ -n "$EXISTING_TASK_DEF" ] && [ "$EXISTING_TASK_DEF" != "None" ]; then
+        echo -e "${GREEN}✓ Worker task definition already exists: ${EXISTING_TASK_DEF}${NC}"
+        echo -e "${YELLOW}Note: Registering a new revision will create version :2, :3, etc.${NC}"
+        echo -e "${YELLOW}To start fresh, run ./scripts/infra/destroy-ecs-worker-task-definition.sh first${NC}"
+        echo ""
+        read -p "Register a new revision? (yes/no): " CONFIRM
+        if [ "$CONFIRM" != "yes" ]; then
+            echo "Aborted."
+            exit 0
+        fi
+    fi
+fi
+
+echo -e "${YELLOW}This will create an ECS task definition for the webhook worker${NC}"
+echo ""
+echo -e "${YELLOW}Configuration:${NC}"
+echo -e "  Task Family:    ${TASK_FAMILY}"
+echo -e "  CPU:            ${TASK_CPU} (0.25 vCPU)"
+echo -e "  Memory:         ${TASK_MEMORY} MB (0.5 GB)"
+echo -e "  Command:        python manage.py process_webhook_events"
+echo -e "  Log Group:      ${ECS_SERVICE_LOG_GROUP} (stream prefix: worker)"
+echo -e "  Image:          ${ECR_REPOSITORY_URI}:latest"
+echo ""
+read -p "Continue? (yes/no): " CONFIRM
+
+if [ "$CONFIRM" != "yes" ]; then
+    echo "Aborted."
+    exit 1
+fi
+
+# Create task definition JSON
+echo ""
+echo -e "${YELLOW}Step 1: Registering task definition...${NC}"
+
+TASK_DEF_JSON=$(cat <<EOF
+{
+  "family": "${TASK_FAMILY}",
+  "networkMode": "awsvpc",
+  "requiresCompatibilities": ["FARGATE"],
+  "cpu": "${TASK_CPU}",
+  "memory": "${TASK_MEMORY}",
+  "executionRoleArn": "${ECS_TASK_EXECUTION_ROLE_ARN}",
+  "taskRoleArn": "${ECS_TASK_ROLE_ARN}",
+  "containerDefinitions": [
+    {
+      "name": "worker",
+      "image": "${ECR_REPOSITORY_URI}:latest",
+      "essential": true,
+      "command": [
+        "python",
+        "manage.py",
+        "process_webhook_events"
+      ],
+      "stopTimeout": 60,
+      "environment": [
+        {
+          "name": "DJANGO_SETTINGS_MODULE",
+          "value": "StartupWebApp.settings_production"
+        },
+        {
+          "name": "AWS_REGION",
+          "value": "${AWS_REGION}"
+        },
+        {
+          "name": "DB_SECRET_NAME",
+          "value": "${DB_SECRET_NAME}"
+        },
+        {
+          "name": "DATABASE_NAME",
+          "value": "startupwebapp_prod"
+        },
+        {
+          "name": "ENVIRONMENT_DOMAIN",
+          "value": "https://startupwebapp.mosaicmeshai.com"
+        }
+      ],
+      "secrets": [
+        {
+          "name": "DATABASE_PASSWORD",
+          "valueFrom": "${DB_SECRET_ARN}:password::"
+        },
+        {
+          "name": "DATABASE_USER",
+          "valueFrom": "${DB_SECRET_ARN}:username::"
+        },
+        {
+          "name": "DATABASE_HOST",
+          "valueFrom": "${DB_SECRET_ARN}:host::"
+        },
+        {
+          "name": "DATABASE_PORT",
+          "valueFrom": "${DB_SECRET_ARN}:port::"
+        }
+      ],
+      "logConfiguration": {
+        "logDriver": "awslogs",
+        "options": {
+          "awslogs-group": "${ECS_SERVICE_LOG_GROUP}",
+          "awslogs-region": "${AWS_REGION}",
+          "awslogs-stream-prefix": "worker"
+        }
+      }
+    }
+  ]
+}
+EOF
+)
+
+# Register task definition
+TASK_DEF_ARN=$(aws ecs register-task-definition \
+    --region "${AWS_REGION}" \
+    --cli-input-json "$TASK_DEF_JSON" \
+    --query 'taskDefinition.taskDefinitionArn' \
+    --output text)
+
+echo -e "${GREEN}✓ Task definition registered: ${TASK_FAMILY}${NC}"
+echo -e "  ARN: ${TASK_DEF_ARN}"
+
+# Extract revision number
+TASK_DEF_REVISION=$(echo "$TASK_DEF_ARN" | awk -F: '{print $NF}')
+echo -e "  Revision: ${TASK_DEF_REVISION}"
+
+# Save to env file
+echo ""
+echo -e "${YELLOW}Step 2: Updating aws-resources.env...${NC}"
+
+# Check if variables exist, add or update
+if grep -q "^ECS_WORKER_TASK_DEFINITION_FAMILY=" "$ENV_FILE"; then
+    sed -i.bak \
+        -e "s|^ECS_WORKER_TASK_DEFINITION_FAMILY=.*|ECS_WORKER_TASK_DEFINITION_FAMILY=\"${TASK_FAMILY}\"|" \
+        -e "s|^ECS_WORKER_TASK_DEFINITION_ARN=.*|ECS_WORKER_TASK_DEFINITION_ARN=\"${TASK_DEF_ARN}\"|" \
+        -e "s|^ECS_WORKER_TASK_DEFINITION_REVISION=.*|ECS_WORKER_TASK_DEFINITION_REVISION=\"${TASK_DEF_REVISION}\"|" \
+        "$ENV_FILE"
+else
+    # Add new variables
+    echo "" >> "$ENV_FILE"
+    echo "# ECS Worker Task Definition" >> "$ENV_FILE"
+    echo "ECS_WORKER_TASK_DEFINITION_FAMILY=\"${TASK_FAMILY}\"" >> "$ENV_FILE"
+    echo "ECS_WORKER_TASK_DEFINITION_ARN=\"${TASK_DEF_ARN}\"" >> "$ENV_FILE"
+    echo "ECS_WORKER_TASK_DEFINITION_REVISION=\"${TASK_DEF_REVISION}\"" >> "$ENV_FILE"
+fi
+rm -f "${ENV_FILE}.bak"
+
+echo -e "${GREEN}✓ aws-resources.env updated${NC}"
+
+echo ""
+echo -e "${GREEN}========================================${NC}"
+echo -e "${GREEN}Worker Task Definition Created Successfully${NC}"
+echo -e "${GREEN}========================================${NC}"
+echo ""
+echo -e "${GREEN}Summary:${NC}"
+echo -e "  Family:              ${TASK_FAMILY}"
+echo -e "  ARN:                 ${TASK_DEF_ARN}"
+echo -e "  Revision:            ${TASK_DEF_REVISION}"
+echo -e "  Launch Type:         Fargate"
+echo -e "  CPU:                 ${TASK_CPU} (0.25 vCPU)"
+echo -e "  Memory:              ${TASK_MEMORY} MB (0.5 GB)"
+echo -e "  Network Mode:        awsvpc"
+echo -e "  Container Name:      worker"
+echo -e "  Command:             python manage.py process_webhook_events"
+echo -e "  Image:               ${ECR_REPOSITORY_URI}:latest"
+echo ""
+echo -e "${GREEN}CloudWatch Logs:${NC}"
+echo -e "  Log Group:           ${ECS_SERVICE_LOG_GROUP}"
+echo -e "  Stream Prefix:       worker"
+echo ""
+echo -e "${GREEN}Cost Estimate:${NC}"
+echo -e "  Per task (running):  ~\$0.012/hour"
+echo -e "  1 task monthly:      ~\$9/month"
+echo ""
+echo -e "${GREEN}Next Steps:${NC}"
+echo -e "  1. Create ECS Worker Service: ./scripts/infra/create-ecs-worker-service.sh"
+echo -e "  2. Create Dead Letter Alarm: ./scripts/infra/create-webhook-dead-letter-alarm.sh"
+echo ""
@@ -0,0 +1,240 @@
+#!/bin/bash
+
+##############################################################################
+# Create CloudWatch Alarm for Dead-Lettered Stripe Webhook Events
+#
+# This script creates:
+# - CloudWatch Log Metric Filter (detects [WEBHOOK_DEAD_LETTER] log pattern)
+# - CloudWatch Alarm (triggers when metric > 0)
+# - Alarm action (sends notification to SNS topic)
+#
+# Purpose:
+# The webhook worker retries failed Stripe events with backoff and gives up
+# on an event after its last attempt, marking it 'dead'. A dead
+# checkout.session.completed event is a paid checkout with no order, so
+# every dead event needs a person to look at it.
+#
+# How It Works:
+# 1. Worker logs: [WEBHOOK_DEAD_LETTER] event=X type=Y attempts=N error=Z
+# 2. CloudWatch Metric Filter matches log pattern
+# 3. Metric "WebhookDeadLetters" is incremented
+# 4. Alarm evaluates metric every 1 minute
+# 5. If metric > 0 in any 1-minute period → ALARM state
+# 6. SNS sends notification email to support team
+#
+# Alert Response:
+# When you receive an alert:
+# 1. Find the event: Webhookevent with status 'dead' (see last_error)
+# 2. Look the event up in the Stripe dashboard; check the order exists
+# 3. Fix the cause, then set the event back to 'pending' to reprocess it
+#
+# Prerequisites:
+# - SNS topic created (run create-order-email-failures-sns-topic.sh)
+# - ECS service logs enabled (ECS_SERVICE_LOG_GROUP in aws-resources.env)
+# - Worker logging to that group (run create-ecs-worker-task-definition.sh)
+#
+# Cost: ~$0.10/month (CloudWatch alarm + metric filter)
+#
+# Usage: ./scripts/infra/create-webhook-dead-letter-alarm.sh
+#
+# IMPORTANT: Run this script in a separate terminal window, NOT in Claude chat
+##############################################################################
+
+set -e  # Exit on error
+set -u  # Exit on undefined variable
+
+# Colors for output
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m' # No Color
+
+# Configuration
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+# Initialize environment file
+source "${SCRIPT_DIR}/init-env.sh"
+ENV_FILE="${SCRIPT_DIR}/aws-resources.env"
+PROJECT_NAME="startupwebapp"
+ENVIRONMENT="production"
+
+# Alarm configuration
+ALARM_NAME="${PROJECT_NAME}-webhook-dead-letters"
+METRIC_NAME="WebhookDeadLetters"
+METRIC_NAMESPACE="StartupWebApp/Order"
+FILTER_NAME="${PROJECT_NAME}-webhook-dead-letter-filter"
+FILTER_PATTERN='"[WEBHOOK_DEAD_LETTER]"'
+
+echo -e "${BLUE}========================================${NC}"
+echo -e "${BLUE}Create Webhook Dead Letter Alarm${NC}"
+echo -e "${BLUE}========================================${NC}"
+echo ""
+
+# Source existing resource IDs
+if [ ! -f "$ENV_FILE" ]; then
+    echo -e "${RED}Error: aws-resources.env not found${NC}"
+    exit 1
+fi
+
+source "$ENV_FILE"
+
+# Verify prerequisites
+echo -e "${YELLOW}Verifying prerequisites...${NC}"
+
+if [ -z "${SNS_TOPIC_ORDER_EMAIL_FAILURES:-}" ]; then
+    echo -e "${RED}Error: SNS_TOPIC_ORDER_EMAIL_FAILURES not found in aws-resources.env${NC}"
+    echo -e "${YELLOW}Please run: ./scripts/infra/create-order-email-failures-sns-topic.sh <email>${NC}"
+    exit 1
+fi
+
+if [ -z "${ECS_SERVICE_LOG_GROUP:-}" ]; then
+    echo -e "${RED}Error: ECS_SERVICE_LOG_GROUP not found in aws-resources.env${NC}"
+    echo -e "${YELLOW}Please ensure ECS service is deployed with CloudWatch logging enabled${NC}"
+    exit 1
+fi
+
+if [ -z "${ECS_WORKER_TASK_DEFINITION_ARN:-}" ]; then
+    echo -e "${YELLOW}Warning: ECS_WORKER_TASK_DEFINITION_ARN not found in aws-resources.env${NC}"
+    echo -e "${YELLOW}The alarm will only fire once ./scripts/infra/create-ecs-worker-task-definition.sh has run${NC}"
+fi
+
+# Verify log group exists
+LOG_GROUP_EXISTS=$(aws logs describe-log-groups \
+    --log-group-name-prefix "${ECS_SERVICE_LOG_GROUP}" \
+    --region "${AWS_REGION}" \
+    --query "logGroups[?logGroupName=='${ECS_SERVICE_LOG_GROUP}'].logGroupName" \
+    --output text 2>/dev/null || echo "")
+
+if [ -z "$LOG_GROUP_EXISTS" ]; then
+    echo -e "${RED}Error: CloudWatch log group ${ECS_SERVICE_LOG_GROUP} not found${NC}"
+    echo -e "${YELLOW}Please ensure ECS service is deployed and logging to CloudWatch${NC}"
+    exit 1
+fi
+
+echo -e "${GREEN}✓ All prerequisites verified${NC}"
+echo ""
+
+# Check if alarm already exists
+EXISTING_ALARM=$(aws cloudwatch describe-alarms \
+    --alarm-names "${ALARM_NAME}" \
+    --region "${AWS_REGION}" \
+    --query 'MetricAlarms[0].AlarmName' \
+    --output text 2>/dev/null || echo "")
+
+if [ -n "$EXISTING_ALARM" ] && [ "$EXISTING_ALARM" != "None" ]; then
+    echo -e "${GREEN}✓ CloudWatch alarm already exists: ${ALARM_NAME}${NC}"
+    echo -e "${YELLOW}To recreate, run ./scripts/infra/destroy-webhook-dead-letter-alarm.sh first${NC}"
+    exit 0
+fi
+
+echo -e "${YELLOW}This will create a CloudWatch alarm for dead-lettered webhook events${NC}"
+echo ""
+echo -e "${YELLOW}Alarm Configuration:${NC}"
+echo -e "  Alarm Name:             ${ALARM_NAME}"
+echo -e "  Log Group:              ${ECS_SERVICE_LOG_GROUP}"
+echo -e "  Filter Pattern:         ${FILTER_PATTERN}"
+echo -e "  Metric Name:            ${METRIC_NAME}"
+echo -e "  Metric Namespace:       ${METRIC_NAMESPACE}"
+echo -e "  Evaluation Period:      1 minute"
+echo -e "  Threshold:              > 0 dead events"
+echo -e "  SNS Topic:              ${SNS_TOPIC_ORDER_EMAIL_FAILURES}"
+echo ""
+echo -e "${YELLOW}Example Log Entry:${NC}"
+echo -e "  [WEBHOOK_DEAD_LETTER] event=evt_123 type=checkout.session.completed attempts=8 error=..."
+echo ""
+echo -e "${YELLOW}Cost Impact: ~\$0.10/month (CloudWatch alarm + metric)${NC}"
+echo ""
+
+read -p "Continue? (yes/no): " CONFIRM
+
+if [ "$CONFIRM" != "yes" ]; then
+    echo "Aborted."
+    exit 1
+fi
+
+# Step 1: Create Metric Filter
+echo ""
+echo -e "${YELLOW}Step 1: Creating CloudWatch Log Metric Filter...${NC}"
+
+EXISTING_FILTER=$(aws logs describe-metric-filters \
+    --log-group-name "${ECS_SERVICE_LOG_GROUP}" \
+    --filter-name-prefix "${FILTER_NAME}" \
+    --region "${AWS_REGION}" \
+    --query "metricFilters[?filterName=='${FILTER_NAME}'].filterName" \
+    --output text 2>/dev/null || echo "")
+
+if [ -n "$EXISTING_FILTER" ] && [ "$EXISTING_FILTER" != "None" ]; then
+    echo -e "${GREEN}✓ Metric filter already exists: ${FILTER_NAME}${NC}"
+else
+    aws logs put-metric-filter \
+        --log-group-name "${ECS_SERVICE_LOG_GROUP}" \
+        --filter-name "${FILTER_NAME}" \
+        --filter-pattern "${FILTER_PATTERN}" \
+        --metric-transformations \
+            metricName="${METRIC_NAME}",\
+metricNamespace="${METRIC_NAMESPACE}",\
+metricValue=1,\
+defaultValue=0 \
+        --region "${AWS_REGION}"
+
+    echo -e "${GREEN}✓ Metric filter created${NC}"
+fi
+
+# Step 2: Create CloudWatch Alarm
+echo ""
+echo -e "${YELLOW}Step 2: Creating CloudWatch Alarm...${NC}"
+
+aws cloudwatch put-metric-alarm \
+    --alarm-name "${ALARM_NAME}" \
+    --alarm-description "Alert when a Stripe webhook event is dead-lettered after its last retry. A dead checkout.session.completed event is a paid checkout without an order." \
+    --metric-name "${METRIC_NAME}" \
+    --namespace "${METRIC_NAMESPACE}" \
+    --statistic Sum \
+    --period 60 \
+    --evaluation-periods 1 \
+    --threshold 0 \
+    --comparison-operator GreaterThanThreshold \
+    --treat-missing-data notBreaching \
+    --alarm-actions "${SNS_TOPIC_ORDER_EMAIL_FAILURES}" \
+    --tags Key=Name,Value="${ALARM_NAME}" Key=Environment,Value="${ENVIRONMENT}" Key=Application,Value=StartupWebApp Key=ManagedBy,Value=InfrastructureAsCode Key=AlertType,Value=WebhookDeadLetter \
+    --region "${AWS_REGION}"
+
+echo -e "${GREEN}✓ CloudWatch alarm created${NC}"
+
+# Step 3: Update aws-resources.env
+echo ""
+echo -e "${YELLOW}Step 3: Updating aws-resources.env...${NC}"
+
+if grep -q "^CLOUDWATCH_ALARM_WEBHOOK_DEAD_LETTERS=" "$ENV_FILE"; then
+    sed -i.bak "s|^CLOUDWATCH_ALARM_WEBHOOK_DEAD_LETTERS=.*|CLOUDWATCH_ALARM_WEBHOOK_DEAD_LETTERS=\"${ALARM_NAME}\"|" "$ENV_FILE"
+else
+    echo "CLOUDWATCH_ALARM_WEBHOOK_DEAD_LETTERS=\"${ALARM_NAME}\"" >> "$ENV_FILE"
+fi
+rm -f "${ENV_FILE}.bak"
+
+echo -e "${GREEN}✓ aws-resources.env updated${NC}"
+
+# Summary
+echo ""
+echo -e "${GREEN}========================================${NC}"
+echo -e "${GREEN}CloudWatch Alarm Created Successfully${NC}"
+echo -e "${GREEN}========================================${NC}"
+echo ""
+echo -e "${GREEN}Summary:${NC}"
+echo -e "  Alarm Name:             ${ALARM_NAME}"
+echo -e "  Metric Filter:          ${FILTER_NAME}"
+echo -e "  Log Group:              ${ECS_SERVICE_LOG_GROUP}"
+echo -e "  Metric:                 ${METRIC_NAMESPACE}/${METRIC_NAME}"
+echo -e "  SNS Topic:              ${SNS_TOPIC_ORDER_EMAIL_FAILURES}"
+echo ""
+echo -e "${GREEN}When You Receive an Alert:${NC}"
+echo -e "  1. Connect to production database"
+echo -e "  2. Query: SELECT stripe_event_id, event_type, attempts, last_error FROM order_webhook_event WHERE status = 'dead';"
+echo -e "  3. Check the event in the Stripe dashboard and whether its order exists"
+echo -e "  4. Fix the cause, then reprocess: UPDATE order_webhook_event SET status = 'pending', attempts = 0, next_attempt_date_time = NOW() WHERE stripe_event_id = 'evt_...';"
+echo ""
+echo -e "${GREEN}Useful Commands:${NC}"
+echo -e "  View alarm status:      aws cloudwatch describe-alarms --alarm-names ${ALARM_NAME}"
+echo -e "  View dead letter logs:  aws logs filter-log-events --log-group-name ${ECS_SERVICE_LOG_GROUP} --filter-pattern '${FILTER_PATTERN}'"
+echo ""
@@ -0,0 +1,144 @@
+#!/bin/bash
+
+##############################################################################
+# Destroy ECS Worker Service for StartupWebApp
+#
+# This script destroys:
+# - ECS Worker Service (stops the webhook worker task)
+#
+# WARNING:
+# - Stripe webhook events will still be stored, but not processed
+# - Paid checkouts will not become orders until the service is recreated
+#   (stored events are processed once a worker runs again)
+# - Task definition is NOT deleted (allows quick recovery)
+#
+# Usage: ./scripts/infra/destroy-ecs-worker-service.sh
+#
+# IMPORTANT: Run this script in a separate terminal window, NOT in Claude chat
+##############################################################################
+
+set -e  # Exit on error
+set -u  # Exit on undefined variable
+
+# Colors for output
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+NC='\033[0m' # No Color
+
+# Configuration
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+# Initialize environment file
+source "${SCRIPT_DIR}/init-env.sh"
+ENV_FILE="${SCRIPT_DIR}/aws-resources.env"
+PROJECT_NAME="startupwebapp"
+SERVICE_NAME="${PROJECT_NAME}-worker-service"
+
+echo -e "${RED}========================================"
+echo -e "Destroy ECS Worker Service"
+echo -e "========================================${NC}"
+echo ""
+
+# Source resource IDs
+if [ ! -f "$ENV_FILE" ]; then
+    echo -e "${RED}Error: aws-resources.env not found${NC}"
+    exit 1
+fi
+
+source "$ENV_FILE"
+
+# Check if service exists in AWS
+EXISTING_SERVICE=$(aws ecs describe-services \
+    --cluster "${ECS_CLUSTER_NAME:-startupwebapp-cluster}" \
+    --services "${SERVICE_NAME}" \
+    --region "${AWS_REGION}" \
+    --query 'services[?status!=`INACTIVE`].{arn: serviceArn, status: status, running: runningCount}' \
+    --output json 2>/dev/null || echo "[]")
+
+SERVICE_COUNT=$(echo "$EXISTING_SERVICE" | jq '. | length')
+
+if [ "$SERVICE_COUNT" == "0" ]; then
+    echo -e "${YELLOW}Worker service not found in AWS, clearing env file...${NC}"
+    sed -i.bak \
+        -e "s|^ECS_WORKER_SERVICE_NAME=.*|ECS_WORKER_SERVICE_NAME=\"\"|" \
+        -e "s|^ECS_WORKER_SERVICE_ARN=.*|ECS_WORKER_SERVICE_ARN=\"\"|" \
+        "$ENV_FILE" 2>/dev/null || true
+    rm -f "${ENV_FILE}.bak"
+    echo -e "${GREEN}✓ aws-resources.env cleared${NC}"
+    exit 0
+fi
+
+RUNNING_COUNT=$(echo "$EXISTING_SERVICE" | jq -r '.[0].running')
+
+echo -e "${RED}WARNING: This will destroy the ECS Worker Service!${NC}"
+echo ""
+echo -e "${YELLOW}Service to destroy:${NC}"
+echo -e "  Name:            ${SERVICE_NAME}"
+echo -e "  Cluster:         ${ECS_CLUSTER_NAME}"
+echo -e "  Running Tasks:   ${RUNNING_COUNT}"
+echo ""
+echo -e "${RED}Impact:${NC}"
+echo -e "  - Stripe webhook events will queue up unprocessed"
+echo -e "  - Paid checkouts will not become orders until a worker runs again"
+echo ""
+read -p "Are you sure you want to continue? (type 'yes' to confirm): " confirm
+
+if [ "$confirm" != "yes" ]; then
+    echo -e "${GREEN}Aborted.${NC}"
+    exit 0
+fi
+
+# Step 1: Scale down to 0 tasks (graceful shutdown)
+echo ""
+echo -e "${YELLOW}Step 1: Scaling worker service down to 0 tasks...${NC}"
+
+aws ecs update-service \
+    --cluster "${ECS_CLUSTER_NAME}" \
+    --service "${SERVICE_NAME}" \
+    --desired-count 0 \
+    --region "${AWS_REGION}" > /dev/null 2>&1
+
+echo -e "${GREEN}✓ Worker service scaled to 0 desired tasks${NC}"
+
+# Step 2: Delete the service
+echo ""
+echo -e "${YELLOW}Step 2: Deleting ECS Worker Service...${NC}"
+
+aws ecs delete-service \
+    --cluster "${ECS_CLUSTER_NAME}" \
+    --service "${SERVICE_NAME}" \
+    --force \
+    --region "${AWS_REGION}" > /dev/null 2>&1
+
+aws ecs wait services-inactive \
+    --cluster "${ECS_CLUSTER_NAME}" \
+    --services "${SERVICE_NAME}" \
+    --region "${AWS_REGION}" 2>/dev/null || true
+
+echo -e "${GREEN}✓ ECS Worker Service deleted${NC}"
+
+# Step 3: Clear environment file
+echo ""
+echo -e "${YELLOW}Step 3: Clearing aws-resources.env...${NC}"
+
+sed -i.bak \
+    -e "s|^ECS_WORKER_SERVICE_NAME=.*|ECS_WORKER_SERVICE_NAME=\"\"|" \
+    -e "s|^ECS_WORKER_SERVICE_ARN=.*|ECS_WORKER_SERVICE_ARN=\"\"|" \
+    "$ENV_FILE" 2>/dev/null || true
+rm -f "${ENV_FILE}.bak"
+
+echo -e "${GREEN}✓ aws-resources.env cleared${NC}"
+
+echo ""
+echo -e "${GREEN}========================================"
+echo -e "ECS Worker Service Destroyed Successfully"
+echo -e "========================================${NC}"
+echo ""
+echo -e "${GREEN}What was preserved:${NC}"
+echo -e "  - Task definition: ${ECS_WORKER_TASK_DEFINITION_ARN:-startupwebapp-worker-task}"
+echo -e "  - Stored webhook events (processed once a worker runs again)"
+echo ""
+echo -e "${GREEN}To recreate the service:${NC}"
+echo -e "  ./scripts/infra/create-ecs-worker-service.sh"
+echo ""
@@ -0,0 +1,116 @@
+#!/bin/bash
+
+##############################################################################
+# Destroy ECS Worker Task Definition for StartupWebApp
+#
+# This script deregisters:
+# - ECS worker task definition (all revisions)
+#
+# The worker logs to the web service's log group, which is left in place
+# (destroy-ecs-service-task-definition.sh removes it).
+#
+# WARNING:
+# - Cannot destroy if ECS worker service is still using this task definition
+# - Destroy ECS worker service first: ./scripts/infra/destroy-ecs-worker-service.sh
+#
+# Usage: ./scripts/infra/destroy-ecs-worker-task-definition.sh
+#
+# IMPORTANT: Run this script in a separate terminal window, NOT in Claude chat
+##############################################################################
+
+set -e  # Exit on error
+set -u  # Exit on undefined variable
+
+# Colors for output
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+NC='\033[0m' # No Color
+
+# Configuration
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+# Initialize environment file
+source "${SCRIPT_DIR}/init-env.sh"
+ENV_FILE="${SCRIPT_DIR}/aws-resources.env"
+PROJECT_NAME="startupwebapp"
+TASK_FAMILY="${PROJECT_NAME}-worker-task"
+
+echo -e "${RED}========================================"
+echo -e "Destroy ECS Worker Task Definition"
+echo -e "========================================${NC}"
+echo ""
+
+# Source resource IDs
+if [ ! -f "$ENV_FILE" ]; then
+    echo -e "${RED}Error: aws-resources.env not found${NC}"
+    exit 1
+fi
+
+source "$ENV_FILE"
+
+# Check if task definition exists in env
+if [ -z "${ECS_WORKER_TASK_DEFINITION_ARN:-}" ]; then
+    echo -e "${YELLOW}No ECS_WORKER_TASK_DEFINITION_ARN found in aws-resources.env${NC}"
+    echo -e "${GREEN}Nothing to destroy.${NC}"
+    exit 0
+fi
+
+# Confirm destruction
+echo -e "${RED}WARNING: This will deregister all revisions of the worker task definition!${NC}"
+echo ""
+echo -e "${YELLOW}Task Definition to destroy:${NC}"
+echo -e "  Family: ${TASK_FAMILY}"
+echo -e "  Current ARN: ${ECS_WORKER_TASK_DEFINITION_ARN}"
+echo ""
+echo -e "${YELLOW}Note: Task definitions cannot be deleted, only deregistered.${NC}"
+echo ""
+read -p "Are you sure you want to continue? (type 'yes' to confirm): " confirm
+
+if [ "$confirm" != "yes" ]; then
+    echo -e "${GREEN}Aborted.${NC}"
+    exit 0
+fi
+
+# Step 1: Deregister all task definition revisions
+echo ""
+echo -e "${YELLOW}Step 1: Deregistering all task definition revisions...${NC}"
+
+REVISIONS=$(aws ecs list-task-definitions \
+    --family-prefix "${TASK_FAMILY}" \
+    --region "${AWS_REGION}" \
+    --query 'taskDefinitionArns[]' \
+    --output text 2>/dev/null || echo "")
+
+if [ -n "$REVISIONS" ]; then
+    for revision in $REVISIONS; do
+        echo -e "  Deregistering: ${revision}"
+        aws ecs deregister-task-definition \
+            --task-definition "${revision}" \
+            --region "${AWS_REGION}" > /dev/null 2>&1 || true
+    done
+    echo -e "${GREEN}✓ All revisions deregistered${NC}"
+else
+    echo -e "${YELLOW}  No revisions found${NC}"
+fi
+
+# Step 2: Clear environment file
+echo ""
+echo -e "${YELLOW}Step 2: Clearing aws-resources.env...${NC}"
+
+sed -i.bak \
+    -e "s|^ECS_WORKER_TASK_DEFINITION_FAMILY=.*|ECS_WORKER_TASK_DEFINITION_FAMILY=\"\"|" \
+    -e "s|^ECS_WORKER_TASK_DEFINITION_ARN=.*|ECS_WORKER_TASK_DEFINITION_ARN=\"\"|" \
+    -e "s|^ECS_WORKER_TASK_DEFINITION_REVISION=.*|ECS_WORKER_TASK_DEFINITION_REVISION=\"\"|" \
+    "$ENV_FILE" 2>/dev/null || true
+rm -f "${ENV_FILE}.bak"
+
+echo -e "${GREEN}✓ aws-resources.env cleared${NC}"
+
+echo ""
+echo -e "${GREEN}========================================"
+echo -e "Worker Task Definition Destroyed!"
+echo -e "========================================${NC}"
+echo ""
+echo -e "${YELLOW}To recreate: ./scripts/infra/create-ecs-worker-task-definition.sh${NC}"
+echo ""
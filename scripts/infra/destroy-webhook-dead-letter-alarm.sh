@@ -0,0 +1,108 @@
+#!/bin/bash
+
+##############################################################################
+# Destroy CloudWatch Alarm for Dead-Lettered Stripe Webhook Events
+#
+# This script deletes:
+# - CloudWatch Alarm
+# - CloudWatch Log Metric Filter
+#
+# WARNING: After running this script:
+# - No alerts will be sent when webhook events are dead-lettered
+# - SNS topic will remain (shared with the order email failure alarm)
+#
+# Usage: ./scripts/infra/destroy-webhook-dead-letter-alarm.sh
+#
+# IMPORTANT: Run this script in a separate terminal window, NOT in Claude chat
+##############################################################################
+
+set -e  # Exit on error
+set -u  # Exit on undefined variable
+
+# Colors for output
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+NC='\033[0m' # No Color
+
+# Configuration
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+# Initialize environment file
+source "${SCRIPT_DIR}/init-env.sh"
+ENV_FILE="${SCRIPT_DIR}/aws-resources.env"
+PROJECT_NAME="startupwebapp"
+
+# Alarm configuration (must match create script)
+ALARM_NAME="${PROJECT_NAME}-webhook-dead-letters"
+FILTER_NAME="${PROJECT_NAME}-webhook-dead-letter-filter"
+
+echo -e "${RED}========================================${NC}"
+echo -e "${RED}Destroy Webhook Dead Letter Alarm${NC}"
+echo -e "${RED}========================================${NC}"
+echo ""
+
+# Source existing resource IDs
+if [ ! -f "$ENV_FILE" ]; then
+    echo -e "${RED}Error: aws-resources.env not found${NC}"
+    exit 1
+fi
+
+source "$ENV_FILE"
+
+echo -e "${RED}WARNING: This will delete the CloudWatch alarm for dead-lettered webhook events!${NC}"
+echo ""
+echo -e "${YELLOW}Resources to be deleted:${NC}"
+echo -e "  Alarm Name:           ${ALARM_NAME}"
+echo -e "  Metric Filter:        ${FILTER_NAME}"
+echo ""
+
+read -p "Are you sure you want to continue? (type 'yes' to confirm): " confirm
+
+if [ "$confirm" != "yes" ]; then
+    echo -e "${GREEN}Aborted.${NC}"
+    exit 0
+fi
+
+# Step 1: Delete CloudWatch Alarm
+echo ""
+echo -e "${YELLOW}Step 1: Deleting CloudWatch Alarm...${NC}"
+
+aws cloudwatch delete-alarms \
+    --alarm-names "${ALARM_NAME}" \
+    --region "${AWS_REGION}" 2>/dev/null || true
+echo -e "${GREEN}✓ CloudWatch alarm deleted: ${ALARM_NAME}${NC}"
+
+# Step 2: Delete Metric Filter
+echo ""
+echo -e "${YELLOW}Step 2: Deleting CloudWatch Log Metric Filter...${NC}"
+
+if [ -n "${ECS_SERVICE_LOG_GROUP:-}" ]; then
+    aws logs delete-metric-filter \
+        --log-group-name "${ECS_SERVICE_LOG_GROUP}" \
+        --filter-name "${FILTER_NAME}" \
+        --region "${AWS_REGION}" 2>/dev/null || true
+    echo -e "${GREEN}✓ Metric filter deleted: ${FILTER_NAME}${NC}"
+else
+    echo -e "${YELLOW}No log group found in env file, skipping...${NC}"
+fi
+
+# Step 3: Clear environment file
+echo ""
+echo -e "${YELLOW}Step 3: Clearing aws-resources.env...${NC}"
+
+if grep -q "^CLOUDWATCH_ALARM_WEBHOOK_DEAD_LETTERS=" "$ENV_FILE"; then
+    sed -i.bak '/^CLOUDWATCH_ALARM_WEBHOOK_DEAD_LETTERS=/d' "$ENV_FILE"
+    rm -f "${ENV_FILE}.bak"
+    echo -e "${GREEN}✓ aws-resources.env cleared${NC}"
+else
+    echo -e "${YELLOW}No alarm variable found in env file${NC}"
+fi
+
+echo ""
+echo -e "${GREEN}========================================${NC}"
+echo -e "${GREEN}CloudWatch Alarm Destroyed Successfully${NC}"
+echo -e "${GREEN}========================================${NC}"
+echo ""
+echo -e "${YELLOW}To restore alerts: ./scripts/infra/create-webhook-dead-letter-alarm.sh${NC}"
+echo ""